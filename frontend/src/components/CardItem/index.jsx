@@ -49,6 +49,16 @@ const CardItem = ({ card, basePrice, discountRate, ctaLabel = 'Añadir al carrit
 
   const frontSrc = imageCandidates[Math.min(imageIndex, imageCandidates.length - 1)] || CONSTANTS.PLACEHOLDER_IMAGE;
 
+  // Reserva el hueco con la proporción real y el color del placeholder antes de que llegue la imagen
+  const frontStyle = useMemo(() => {
+    if (!card?.imageSize) return undefined;
+    return {
+      aspectRatio: `${card.imageSize.width} / ${card.imageSize.height}`,
+      height: '100%',
+      backgroundColor: card.imagePlaceholder ?? undefined,
+    };
+  }, [card?.imageSize, card?.imagePlaceholder]);
+
   return (
     <div className="card-item relative poke-card-group group flex flex-col items-center bg-white dark:bg-[#17233f] border-2 border-gray-200 dark:border-[#233252] hover:border-violet-600 dark:hover:border-cyan-500 rounded-2xl p-4 min-h-[480px] h-full transition-all duration-300 hover:shadow-xl dark:hover:shadow-cyan-500/20">
 
@@ -66,7 +76,7 @@ const CardItem = ({ card, basePrice, discountRate, ctaLabel = 'Añadir al carrit
       <div className="card-3d-wrapper">
         <div className="card-3d-flip">
           <div className="card-3d-face card-3d-front">
-            <img src={frontSrc} alt={card?.name} loading="lazy" onError={advanceImageCandidate} />
+            <img src={frontSrc} alt={card?.name} loading="lazy" style={frontStyle} onError={advanceImageCandidate} />
           </div>
           <div className="card-3d-face card-3d-back">
             <img src={CONSTANTS.CARD_BACK_IMAGE} alt="Reverso" aria-hidden="true" />
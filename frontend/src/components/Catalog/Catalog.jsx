@@ -1,6 +1,7 @@
 import { useMemo, useState, useEffect } from "react";
 import CardItem from "../CardItem";
 import { CONSTANTS } from "../../utils/constants";
+import { buildCardImages } from "../../utils/formatters";
 import { 
   IconFilter, 
   IconSearch, 
@@ -35,8 +36,7 @@ const normalizeListing = (listing) => ({
   seller: listing.seller?.username ?? "Vendedor",
   description: listing.description ?? "",
   image_url: listing.card?.image_url ?? "",
-  imageCandidates: listing.card?.image_url ? [listing.card.image_url] : [CONSTANTS.PLACEHOLDER_IMAGE],
-  images: listing.card?.image_url ? { small: listing.card.image_url, large: listing.card.image_url } : null,
+  ...buildCardImages(listing.card),
 });
 
 const FilterSidebar = ({ 
@@ -11,6 +11,7 @@ export default function Dashboard() {
   const [activeTab, setActiveTab] = useState("ventas"); // 'ventas' | 'compras'
   const [ventas, setVentas] = useState([]);
   const [compras, setCompras] = useState([]);
+  const [unread, setUnread] = useState({}); // order_id -> mensajes sin leer
   const [loading, setLoading] = useState(true);
 
   const fetchData = async () => {
@@ -18,13 +19,21 @@ export default function Dashboard() {
       setLoading(true);
       const urlBase = CONSTANTS.API_BASE_URL || 'http://localhost:8000';
       
-      const [resVentas, resCompras] = await Promise.all([
-        fetch(`${urlBase}/store/sales/`, { credentials: "include" }),
-        fetch(`${urlBase}/store/orders/`, { credentials: "include" })
+      const [resDashboard, resInbox] = await Promise.all([
+        fetch(`${urlBase}/store/dashboard/?include=purchases,sales,listings`, { credentials: "include" }),
+        fetch(`${urlBase}/store/inbox/`, { credentials: "include" })
       ]);
 
-      if (resVentas.ok) setVentas(await resVentas.json());
-      if (resCompras.ok) setCompras(await resCompras.json());
+      if (resDashboard.ok) {
+        const { purchases, sales, listings } = await resDashboard.json();
+        // Publicaciones y ventas en una sola lista, más recientes primero
+        setVentas([...listings, ...sales].sort((a, b) => new Date(b.created_at) - new Date(a.created_at)));
+        setCompras(purchases);
+      }
+      if (resInbox.ok) {
+        const inbox = await resInbox.json();
+        setUnread(Object.fromEntries(inbox.orders.map(entry => [entry.order_id, entry.unread])));
+      }
     } catch (error) {
       console.error("Error fetching dashboard data:", error);
     } finally {
@@ -150,8 +159,13 @@ export default function Dashboard() {
                 </div>
 
                 {item.type === 'order' && (
-                  <div className="flex items-center justify-center p-3 rounded-xl bg-violet-100 dark:bg-cyan-500/10 text-violet-600 dark:text-cyan-400 group-hover:bg-violet-600 group-hover:text-white dark:group-hover:bg-cyan-500 dark:group-hover:text-slate-950 transition-all">
+                  <div className="relative flex items-center justify-center p-3 rounded-xl bg-violet-100 dark:bg-cyan-500/10 text-violet-600 dark:text-cyan-400 group-hover:bg-violet-600 group-hover:text-white dark:group-hover:bg-cyan-500 dark:group-hover:text-slate-950 transition-all">
                     <IconMessageCircle size={22} />
+                    {unread[item.id] > 0 && (
+                      <span className="absolute -top-1.5 -right-1.5 min-w-[20px] h-5 px-1 rounded-full bg-rose-500 text-white text-[10px] font-black flex items-center justify-center">
+                        {unread[item.id]}
+                      </span>
+                    )}
                   </div>
                 )}
               </div>
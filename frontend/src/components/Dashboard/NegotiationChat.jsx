@@ -29,6 +29,12 @@ import { useAuth } from "../../hooks/useAuth";
 import { formatCurrency } from "../../utils/formatters";
 import { CONSTANTS } from "../../utils/constants";
 
+// Estados a los que puede pasar una orden (mismas reglas que store/orders.py)
+const NEXT_STATUSES = {
+  "Pendiente": ["En proceso", "Cancelado"],
+  "En proceso": ["Completado", "Cancelado"],
+};
+
 export default function NegotiationChat() {
   const { id } = useParams();
   const navigate = useNavigate();
@@ -40,6 +46,7 @@ export default function NegotiationChat() {
   const [sellerListings, setSellerListings] = useState([]);
   const [showCatalog, setShowCatalog] = useState(false);
   const messagesEndRef = useRef(null);
+  const lastReadRef = useRef(null);
 
   const fetchNegotiation = async () => {
     try {
@@ -48,6 +55,13 @@ export default function NegotiationChat() {
         if (JSON.stringify(prev) === JSON.stringify(msgs)) return prev;
         return msgs;
       });
+
+      // Marcar como leído solo cuando llega un mensaje nuevo
+      const lastId = msgs.length ? msgs[msgs.length - 1].id : null;
+      if (lastId !== null && lastId !== lastReadRef.current) {
+        lastReadRef.current = lastId;
+        chatService.markRead(id).catch(() => { lastReadRef.current = null; });
+      }
       
       const urlBase = CONSTANTS.API_BASE_URL || 'http://localhost:8000';
       const response = await fetch(`${urlBase}/store/orders/${id}/`, {
@@ -210,7 +224,7 @@ export default function NegotiationChat() {
           </div>
 
           <div className="flex items-center gap-2">
-            {(order?.is_seller || (order?.status !== "Cancelado" && order?.status !== "Completado")) && (
+            {NEXT_STATUSES[order?.status || "Pendiente"] && (
               <Dropdown classNames={{ content: "bg-white dark:bg-[#111827] border border-slate-200 dark:border-slate-800 p-1 shadow-xl", base: "dark" }}>
                 <DropdownTrigger>
                   <Button variant="flat" color="secondary" size="sm" className="font-bold rounded-xl" endContent={<IconGripVertical size={14} />}>
@@ -219,11 +233,10 @@ export default function NegotiationChat() {
                 </DropdownTrigger>
                 <DropdownMenu onAction={(key) => handleStatusChange(key)} variant="flat">
                   {order?.is_seller ? [
-                    <DropdownItem key="Pendiente" className="text-slate-700 dark:text-slate-100" startContent={<IconClock size={16} />}>Pendiente</DropdownItem>,
                     <DropdownItem key="En proceso" className="text-slate-700 dark:text-slate-100" startContent={<IconClock size={16} />}>En proceso</DropdownItem>,
                     <DropdownItem key="Completado" color="success" className="text-success-600 dark:text-success-400 font-bold" startContent={<IconCheck size={16} />}>Completado</DropdownItem>,
                     <DropdownItem key="Cancelado" color="danger" className="text-danger-600 dark:text-danger-400 font-bold" startContent={<IconX size={16} />}>Cancelado</DropdownItem>
-                  ] : [
+                  ].filter((item) => NEXT_STATUSES[order?.status || "Pendiente"].includes(item.key)) : [
                     <DropdownItem key="Cancelado" color="danger" className="text-danger-600 dark:text-danger-400 font-bold" startContent={<IconX size={16} />}>Cancelar Negociación</DropdownItem>
                   ]}
                 </DropdownMenu>
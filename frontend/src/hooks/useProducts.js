@@ -1,6 +1,6 @@
 import { useState, useRef, useCallback, useEffect } from 'react';
 import { CONSTANTS } from '../utils/constants';
-import { normalizeCard, filtrarCartas, elegirSubconjuntoAleatorio } from '../utils/formatters';
+import { buildCardImages, normalizeCard, filtrarCartas, elegirSubconjuntoAleatorio } from '../utils/formatters';
 
 const API_BASE = CONSTANTS.API_BASE_URL || 'http://localhost:8000';
 const LISTINGS_URL = `${API_BASE}/store/listings/`;
@@ -18,12 +18,7 @@ const normalizeListing = (listing) => ({
     seller: listing.seller?.username ?? 'Vendedor',
     description: listing.description ?? '',
     image_url: listing.card?.image_url ?? '',
-    imageCandidates: listing.card?.image_url
-        ? [listing.card.image_url]
-        : [CONSTANTS.PLACEHOLDER_IMAGE],
-    images: listing.card?.image_url
-        ? { small: listing.card.image_url, large: listing.card.image_url }
-        : null,
+    ...buildCardImages(listing.card),
 });
 
 export const useProducts = () => {
@@ -33,5 +33,23 @@ export const chatService = {
     });
     if (!response.ok) throw new Error("Error al actualizar estado");
     return response.json();
+  },
+
+  async markRead(orderId) {
+    const response = await fetch(`${BASE_URL}/store/orders/${orderId}/messages/read/`, {
+      method: "POST",
+      credentials: "include",
+    });
+    if (!response.ok) throw new Error("Error al marcar mensajes como leídos");
+    return response.json();
+  },
+
+  async getInbox() {
+    const response = await fetch(`${BASE_URL}/store/inbox/`, {
+      method: "GET",
+      credentials: "include",
+    });
+    if (!response.ok) throw new Error("Error al obtener bandeja de entrada");
+    return response.json();
   }
 };
@@ -39,6 +39,37 @@ export const buildImageCandidates = (card) => {
   return listaSinDuplicados(candidates);
 };
 
+// Miniatura WebP cacheada por el backend (redirige a la imagen original mientras se genera)
+export const cardImageUrl = (cardId, width) =>
+  `${CONSTANTS.API_BASE_URL}/store/cards/${cardId}/image/?w=${width}`;
+
+const BASE83 = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz#$%*+,-.:;=?@[]^_{|}~';
+
+// Color medio de un blurhash (caracteres 2 a 5): el hueco de la imagen se pinta con él mientras carga
+export const blurhashColor = (hash) => {
+  if (!hash || hash.length < 6) return null;
+  let value = 0;
+  for (const char of hash.slice(2, 6)) {
+    const digit = BASE83.indexOf(char);
+    if (digit < 0) return null;
+    value = value * 83 + digit;
+  }
+  return `rgb(${value >> 16}, ${(value >> 8) & 255}, ${value & 255})`;
+};
+
+// Miniatura primero y, si falla, la URL original de la carta
+export const buildCardImages = (card) => {
+  const small = card?.id ? cardImageUrl(card.id, 320) : card?.image_url;
+  const large = card?.id ? cardImageUrl(card.id, 640) : card?.image_url;
+  return {
+    imageCandidates: listaSinDuplicados([small, card?.image_url, CONSTANTS.PLACEHOLDER_IMAGE]),
+    images: small ? { small, large } : null,
+    // Medidas y placeholder registrados al importar (getdata.py --prefetch-images)
+    imageSize: card?.image_width && card?.image_height ? { width: card.image_width, height: card.image_height } : null,
+    imagePlaceholder: blurhashColor(card?.image_blurhash),
+  };
+};
+
 export const normalizeCard = (card) => {
   const priceValue = toNumber(card?.price ?? card?.priceEUR ?? card?.priceUsd);
   const setName = card?.set?.name || card?.setName || 'Colección local';
@@ -2,8 +2,11 @@
 
 import argparse
 import logging
+import multiprocessing
 import os
+import threading
 import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from decimal import Decimal, ROUND_HALF_UP
 
 import django
@@ -15,6 +18,7 @@ django.setup()
 
 from django.db import transaction  # noqa: E402
 
+from store import images  # noqa: E402
 from store.models import Card  # noqa: E402
 
 
@@ -26,6 +30,8 @@ logger = logging.getLogger(__name__)
 MAX_RETRIES = 5
 RETRY_DELAY_SECONDS = 5
 
+IMAGE_FIELDS = ["image_digest", "image_width", "image_height", "image_blurhash"]
+
 
 def get_headers() -> dict:
     return {
@@ -90,8 +96,8 @@ def extract_card_defaults(card_payload: dict) -> dict:
     }
 
 
-def upsert_cards(cards: list[dict], existing_keys: set[tuple[str, str]]) -> tuple[int, int]:
-    created = 0
+def upsert_cards(cards: list[dict], existing_keys: set[tuple[str, str]]) -> tuple[list[Card], int]:
+    created = []
     skipped = 0
     with transaction.atomic():
         for card_payload in cards:
@@ -103,15 +109,70 @@ def upsert_cards(cards: list[dict], existing_keys: set[tuple[str, str]]) -> tupl
             if key in existing_keys:
                 skipped += 1
                 continue
-            Card.objects.create(**defaults)
+            created.append(Card.objects.create(**defaults))
             existing_keys.add(key)
-            created += 1
     return created, skipped
 
 
-def fetch_cards(query: str | None, order_by: str | None, page_size: int, max_pages: int | None) -> None:
+def prefetch_images(cards: list[Card], downloads: int, processes: ProcessPoolExecutor) -> int:
+    """Cache the images of ``cards`` and record their digest, size and blurhash.
+
+    Downloads run on ``downloads`` threads at most; thumbnails and blurhashes
+    are CPU bound and run in the ``processes`` pool. A card whose image fails
+    is logged and left to the lazy path of cards/<id>/image/. Returns the
+    number of cards completed.
+    """
+    local = threading.local()
+
+    def download(card: Card) -> bytes:
+        # One keep-alive session per download thread.
+        if not hasattr(local, "session"):
+            local.session = requests.Session()
+        return images.download(card.image_url, local.session)
+
+    described = {}
+    with ThreadPoolExecutor(max_workers=downloads, thread_name_prefix="image-download") as pool:
+        fetches = {pool.submit(download, card): card for card in cards}
+        for future in as_completed(fetches):
+            card = fetches[future]
+            try:
+                data = future.result()
+            except images.ImageError as exc:
+                logger.warning("Skipping image of card %s: %s", card.pk, exc)
+                continue
+            card.image_digest = images.store_original(data)
+            described[processes.submit(images.describe_image, data)] = card
+
+    completed = 0
+    for future in as_completed(described):
+        card = described[future]
+        try:
+            card.image_width, card.image_height, card.image_blurhash, thumbnails = future.result()
+        except Exception as exc:  # whatever Pillow raises for an undecodable image
+            logger.warning("Could not decode image of card %s: %s", card.pk, exc)
+            card.save(update_fields=["image_digest"])
+            continue
+        images.store_thumbnails(card.image_digest, thumbnails)
+        card.save(update_fields=IMAGE_FIELDS)
+        completed += 1
+    return completed
+
+
+def fetch_cards(
+    query: str | None,
+    order_by: str | None,
+    page_size: int,
+    max_pages: int | None,
+    image_downloads: int = 0,
+    image_processes: int | None = None,
+) -> None:
+    """Import cards page by page; with ``image_downloads`` threads, also prefetch the images of new cards."""
     session = requests.Session()
     session.headers.update(get_headers())
+    processes = None
+    if image_downloads:
+        # Spawned, not forked: download threads are running when workers start.
+        processes = ProcessPoolExecutor(max_workers=image_processes, mp_context=multiprocessing.get_context("spawn"))
     try:
         current_page = 5
         total_created = 0
@@ -136,14 +197,17 @@ def fetch_cards(query: str | None, order_by: str | None, page_size: int, max_pag
                 logger.info("No cards returned on page %s", current_page)
                 break
             created, skipped = upsert_cards(cards, existing_keys)
-            total_created += created
+            total_created += len(created)
             total_skipped += skipped
             logger.info(
                 "Processed page %s (created=%s skipped_existing=%s)",
                 current_page,
-                created,
+                len(created),
                 skipped,
             )
+            if processes and created:
+                prefetched = prefetch_images(created, image_downloads, processes)
+                logger.info("Prefetched %s/%s images of page %s", prefetched, len(created), current_page)
             if not page_size or len(cards) < page_size:
                 break
             if max_pages and current_page >= max_pages:
@@ -157,6 +221,9 @@ def fetch_cards(query: str | None, order_by: str | None, page_size: int, max_pag
     except requests.RequestException as exc:
         logger.error("Network error while calling Pokemon TCG API: %s", exc)
         raise
+    finally:
+        if processes:
+            processes.shutdown()
 
 
 def request_with_retry(session: requests.Session, params: dict) -> requests.Response:
@@ -213,10 +280,41 @@ def parse_args() -> argparse.Namespace:
         type=int,
         help="Limit number of pages to fetch",
     )
-    return parser.parse_args()
+    parser.add_argument(
+        "--prefetch-images",
+        dest="prefetch_images",
+        action="store_true",
+        help="Download images of new cards and make their thumbnails and blurhash (needs Pillow)",
+    )
+    parser.add_argument(
+        "--image-downloads",
+        dest="image_downloads",
+        type=int,
+        default=8,
+        help="Concurrent image downloads with --prefetch-images",
+    )
+    parser.add_argument(
+        "--image-processes",
+        dest="image_processes",
+        type=int,
+        help="Worker processes for thumbnails with --prefetch-images (default: CPU count)",
+    )
+    args = parser.parse_args()
+    if args.prefetch_images and images.Image is None:
+        parser.error("--prefetch-images needs Pillow")
+    if args.image_downloads < 1:
+        parser.error("--image-downloads must be at least 1")
+    return args
 
 
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO)
     args = parse_args()
-    fetch_cards(args.query, args.order_by, args.page_size, args.max_pages)
+    fetch_cards(
+        args.query,
+        args.order_by,
+        args.page_size,
+        args.max_pages,
+        image_downloads=args.image_downloads if args.prefetch_images else 0,
+        image_processes=args.image_processes,
+    )
@@ -0,0 +1,102 @@
+"""Database connection hooks shared by every app.
+
+``fan_out`` runs independent read queries at the same time, each on a
+worker thread with its own connection, so a composite view waits for its
+slowest query instead of the sum of all of them:
+
+    listings, count = fan_out(
+        lambda: list(Listings.objects.filter(...)[:20]),
+        lambda: Orders.objects.filter(...).count(),
+    )
+
+Workers see the caller's routing context and SQL wrappers, so replica
+routing, ``@query_budget`` and request metrics keep working. Inside a
+transaction the queries run one after another on the caller's connection,
+since other connections would not see its uncommitted writes. Async views
+use ``afan_out``.
+"""
+
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections, connections
+
+
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    """Apply settings.SQLITE_PRAGMAS to each freshly opened SQLite connection.
+
+    Connected to ``connection_created`` in StoreConfig.ready(). No-op for
+    other vendors or when the active profile does not tune SQLite.
+    """
+    if connection.vendor != "sqlite":
+        return
+    pragmas = getattr(settings, "SQLITE_PRAGMAS", None)
+    if not pragmas:
+        return
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+
+
+_executor = None
+_executor_lock = threading.Lock()
+_worker = threading.local()
+
+
+def _pool():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=settings.DB_FAN_OUT_WORKERS, thread_name_prefix="db-fan-out")
+    return _executor
+
+
+def _run(query, wrappers, opened):
+    _worker.active = True
+    close_old_connections()
+    try:
+        # Open connections up front so their setup (SQLite pragmas) is not
+        # counted against the caller's query budget.
+        for alias in opened:
+            connections[alias].ensure_connection()
+        for alias, alias_wrappers in wrappers.items():
+            connections[alias].execute_wrappers.extend(alias_wrappers)
+        try:
+            return query()
+        finally:
+            for alias, alias_wrappers in wrappers.items():
+                del connections[alias].execute_wrappers[-len(alias_wrappers):]
+    finally:
+        close_old_connections()
+        _worker.active = False
+
+
+def fan_out(*queries):
+    """Call the zero-argument ``queries`` concurrently; returns their results in order."""
+    serial = (
+        len(queries) < 2
+        or settings.DB_FAN_OUT_WORKERS < 2
+        or getattr(_worker, "active", False)
+        or any(connections[alias].in_atomic_block for alias in connections)
+    )
+    if serial:
+        return [query() for query in queries]
+    wrappers = {
+        alias: list(connections[alias].execute_wrappers)
+        for alias in connections
+        if connections[alias].execute_wrappers
+    }
+    opened = [alias for alias in connections if connections[alias].connection is not None]
+    futures = [
+        _pool().submit(contextvars.copy_context().run, _run, query, wrappers, opened)
+        for query in queries
+    ]
+    return [future.result() for future in futures]
+
+
+async def afan_out(*queries):
+    """``fan_out`` for async views; the event loop stays free while the queries run."""
+    return await sync_to_async(fan_out)(*queries)
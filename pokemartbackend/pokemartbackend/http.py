@@ -0,0 +1,150 @@
+"""JSON response helpers shared by the store and users apps.
+
+``JsonResponse`` is a drop-in replacement for ``django.http.JsonResponse``
+that encodes with orjson when it is installed and falls back to the stdlib
+encoder otherwise. Both paths emit compact separators, raw UTF-8, Decimals
+as strings and datetimes via ``isoformat()``, so views can hand over
+``values()`` rows without converting each field first.
+
+``StreamingJsonResponse`` emits the same encoding incrementally, as a JSON
+array or as NDJSON, for payloads too large to build in memory. Async views
+pass ``asynchronous=True`` and get an async body read with ``aiterator()``.
+"""
+
+import json
+from datetime import date, datetime, time
+from decimal import Decimal
+
+from django.conf import settings
+from django.db.models import QuerySet
+from django.http import JsonResponse as DjangoJsonResponse, StreamingHttpResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+def _default(obj):
+    if isinstance(obj, Decimal):
+        return str(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class _Encoder(json.JSONEncoder):
+    def default(self, obj):
+        if isinstance(obj, (datetime, date, time)):
+            return obj.isoformat()
+        return _default(obj)
+
+
+def dumps(data) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(data, default=_default)
+    return json.dumps(data, cls=_Encoder, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+class JsonResponse(DjangoJsonResponse):
+    def __init__(self, data, safe=True, **kwargs):
+        if safe and not isinstance(data, dict):
+            raise TypeError("In order to allow non-dict objects to be serialized set the safe parameter to False.")
+        kwargs.setdefault("content_type", "application/json")
+        # Skip DjangoJsonResponse.__init__, which would json.dumps() again.
+        super(DjangoJsonResponse, self).__init__(content=dumps(data), **kwargs)
+
+
+NDJSON_CONTENT_TYPE = "application/x-ndjson"
+
+
+def wants_ndjson(request):
+    return request.GET.get("format") == "ndjson" or NDJSON_CONTENT_TYPE in request.headers.get("Accept", "")
+
+
+def _iterate(rows, asynchronous=False):
+    if isinstance(rows, QuerySet):
+        # Resolve the database now: the body is consumed after the view (and
+        # its routing context) has returned.
+        rows = rows.using(rows.db)
+        if asynchronous:
+            return rows.aiterator(chunk_size=settings.STREAM_CHUNK_SIZE)
+        return rows.iterator(chunk_size=settings.STREAM_CHUNK_SIZE)
+    return rows
+
+
+def _json_array(rows, encode, buffer_size):
+    yield b"["
+    buffer = bytearray()
+    for count, row in enumerate(rows):
+        if count:
+            buffer += b","
+        buffer += dumps(encode(row))
+        if len(buffer) >= buffer_size:
+            yield bytes(buffer)
+            buffer.clear()
+    buffer += b"]"
+    yield bytes(buffer)
+
+
+def _ndjson(rows, encode, buffer_size):
+    buffer = bytearray()
+    for row in rows:
+        buffer += dumps(encode(row))
+        buffer += b"\n"
+        if len(buffer) >= buffer_size:
+            yield bytes(buffer)
+            buffer.clear()
+    if buffer:
+        yield bytes(buffer)
+
+
+async def _ajson_array(rows, encode, buffer_size):
+    yield b"["
+    buffer = bytearray()
+    count = 0
+    async for row in rows:
+        if count:
+            buffer += b","
+        count += 1
+        buffer += dumps(encode(row))
+        if len(buffer) >= buffer_size:
+            yield bytes(buffer)
+            buffer.clear()
+    buffer += b"]"
+    yield bytes(buffer)
+
+
+async def _andjson(rows, encode, buffer_size):
+    buffer = bytearray()
+    async for row in rows:
+        buffer += dumps(encode(row))
+        buffer += b"\n"
+        if len(buffer) >= buffer_size:
+            yield bytes(buffer)
+            buffer.clear()
+    if buffer:
+        yield bytes(buffer)
+
+
+class StreamingJsonResponse(StreamingHttpResponse):
+    """Stream ``rows`` (a queryset or any iterable) through ``encode``.
+
+    Querysets are read with ``.iterator(chunk_size=STREAM_CHUNK_SIZE)`` so
+    memory stays flat regardless of result size; output is flushed in
+    ``buffer_size`` pieces (64KiB by default). ``buffer_size=0`` flushes
+    every row, e.g. for progress events. With ``asynchronous=True`` rows
+    may be a queryset or an async iterable and the body is an async
+    iterator, which ASGI servers consume without a thread hop.
+    """
+
+    def __init__(
+        self, rows, encode=None, ndjson=False, filename=None, buffer_size=64 * 1024, asynchronous=False, **kwargs
+    ):
+        encode = encode or (lambda row: row)
+        if asynchronous:
+            generate = _andjson if ndjson else _ajson_array
+        else:
+            generate = _ndjson if ndjson else _json_array
+        kwargs.setdefault("content_type", NDJSON_CONTENT_TYPE if ndjson else "application/json")
+        super().__init__(generate(_iterate(rows, asynchronous), encode, buffer_size), **kwargs)
+        if filename:
+            self["Content-Disposition"] = f'attachment; filename="{filename}"'
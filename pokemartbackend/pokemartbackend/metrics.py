@@ -0,0 +1,159 @@
+"""In-process request metrics exported in Prometheus text format.
+
+PerformanceMiddleware fills a RequestStats per request (wall time, query
+count, DB time, cache hits/misses) and folds it into per-view histograms.
+Each worker process keeps its own registry; scrape every worker or put
+them behind a single-process server for accurate totals.
+"""
+
+import threading
+from bisect import bisect_left
+from contextvars import ContextVar
+
+from django.http import HttpResponse
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+SIZE_BUCKETS = (1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+
+class RequestStats:
+    __slots__ = ("queries", "db_time", "cache_hits", "cache_misses", "statements", "_lock")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.statements = []
+        # Queries of pokemartbackend.db.fan_out are recorded from worker threads.
+        self._lock = threading.Lock()
+
+    def record_query(self, sql, duration):
+        with self._lock:
+            self.queries += 1
+            self.db_time += duration
+            self.statements.append((duration, sql))
+
+    def top_statements(self, n=5):
+        return sorted(self.statements, key=lambda item: item[0], reverse=True)[:n]
+
+
+_current = ContextVar("request_stats", default=None)
+
+
+def start_request():
+    stats = RequestStats()
+    return stats, _current.set(stats)
+
+
+def finish_request(token):
+    _current.reset(token)
+
+
+def current_stats():
+    return _current.get()
+
+
+def record_cache(hits, misses=0):
+    stats = _current.get()
+    if stats is not None:
+        stats.cache_hits += hits
+        stats.cache_misses += misses
+
+
+class Histogram:
+    def __init__(self, name, help_text, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, label, value):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._series.get(label, ([0] * (len(self.buckets) + 1), 0.0))
+            counts[index] += 1
+            self._series[label] = (counts, total + value)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {label: (list(counts), total) for label, (counts, total) in self._series.items()}
+        for label, (counts, total) in sorted(series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{view="{label}",le="{bound}"}} {cumulative}')
+            cumulative += counts[-1]
+            lines.append(f'{self.name}_bucket{{view="{label}",le="+Inf"}} {cumulative}')
+            lines.append(f'{self.name}_sum{{view="{label}"}} {total}')
+            lines.append(f'{self.name}_count{{view="{label}"}} {cumulative}')
+        return lines
+
+
+class Counter:
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help_text = help_text
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def inc(self, label, amount=1):
+        with self._lock:
+            self._series[label] = self._series.get(label, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            series = dict(self._series)
+        for label, value in sorted(series.items()):
+            lines.append(f'{self.name}_total{{view="{label}"}} {value}')
+        return lines
+
+
+REQUEST_DURATION = Histogram("pokemart_request_duration_seconds", "Wall time per request.", DURATION_BUCKETS)
+DB_DURATION = Histogram("pokemart_db_duration_seconds", "Time spent in SQL per request.", DURATION_BUCKETS)
+DB_QUERIES = Histogram("pokemart_db_queries", "SQL statements per request.", QUERY_BUCKETS)
+RESPONSE_SIZE = Histogram("pokemart_response_size_bytes", "Response body size (non-streaming).", SIZE_BUCKETS)
+CACHE_HITS = Counter("pokemart_cache_hits", "Cache lookups that found a value.")
+CACHE_MISSES = Counter("pokemart_cache_misses", "Cache lookups that found nothing.")
+SLOW_REQUESTS = Counter("pokemart_slow_requests", "Requests slower than SLOW_REQUEST_MS.")
+
+REGISTRY = (REQUEST_DURATION, DB_DURATION, DB_QUERIES, RESPONSE_SIZE, CACHE_HITS, CACHE_MISSES, SLOW_REQUESTS)
+
+
+def observe_request(view, stats, duration, size, slow):
+    REQUEST_DURATION.observe(view, duration)
+    DB_DURATION.observe(view, stats.db_time)
+    DB_QUERIES.observe(view, stats.queries)
+    if size is not None:
+        RESPONSE_SIZE.observe(view, size)
+    if stats.cache_hits:
+        CACHE_HITS.inc(view, stats.cache_hits)
+    if stats.cache_misses:
+        CACHE_MISSES.inc(view, stats.cache_misses)
+    if slow:
+        SLOW_REQUESTS.inc(view)
+
+
+def render_prometheus():
+    from users.sessions import recorded_session_stats
+
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    sessions = recorded_session_stats()
+    if sessions:
+        lines.append("# HELP pokemart_session_rows Rows in django_session at the last purge_sessions run.")
+        lines.append("# TYPE pokemart_session_rows gauge")
+        lines.append(f'pokemart_session_rows{{state="total"}} {sessions["total"]}')
+        lines.append(f'pokemart_session_rows{{state="expired"}} {sessions["expired"]}')
+    return "\n".join(lines) + "\n"
+
+
+def metrics_view(request):
+    if not (request.user.is_authenticated and request.user.is_staff):
+        return HttpResponse("Forbidden", status=403, content_type="text/plain")
+    return HttpResponse(render_prometheus(), content_type="text/plain; version=0.0.4")
@@ -0,0 +1,158 @@
+import logging
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+
+from . import metrics, routers
+
+logger = logging.getLogger(__name__)
+
+STICKY_COOKIE = "db_primary"
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+class ReplicaStickinessMiddleware:
+    """Read-your-writes for replica routing.
+
+    Unsafe requests run entirely on the primary. When a request writes, the
+    client gets a short-lived cookie that keeps its following reads on the
+    primary for REPLICA_STICKY_SECONDS, long enough to cover replica lag.
+    Routing state lives in context variables, so async requests get the
+    same treatment.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not routers.replica_aliases():
+            return self.get_response(request)
+
+        tokens = routers.begin_request(pinned=self._pinned(request))
+        try:
+            response = self.get_response(request)
+            self._stick(response)
+        finally:
+            routers.end_request(tokens)
+        return response
+
+    async def __acall__(self, request):
+        if not routers.replica_aliases():
+            return await self.get_response(request)
+
+        tokens = routers.begin_request(pinned=self._pinned(request))
+        try:
+            response = await self.get_response(request)
+            self._stick(response)
+        finally:
+            routers.end_request(tokens)
+        return response
+
+    def _pinned(self, request):
+        return request.method not in SAFE_METHODS or STICKY_COOKIE in request.COOKIES
+
+    def _stick(self, response):
+        if routers.wrote_to_primary():
+            response.set_cookie(
+                STICKY_COOKIE,
+                "1",
+                max_age=settings.REPLICA_STICKY_SECONDS,
+                httponly=True,
+                samesite="Lax",
+            )
+
+
+def _timed_queries(stats):
+    """Record the duration of every statement into ``stats``, on every alias."""
+
+    def wrapper(execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            stats.record_query(sql, time.perf_counter() - start)
+
+    stack = ExitStack()
+    for alias in connections:
+        stack.enter_context(connections[alias].execute_wrapper(wrapper))
+    return stack
+
+
+class PerformanceMiddleware:
+    """Per-request timing, SQL and cache accounting.
+
+    Adds a ``Server-Timing`` header, logs requests slower than
+    SLOW_REQUEST_MS with their most expensive statements, and feeds the
+    histograms served by ``/metrics``. Queries run while a streaming body
+    is consumed happen after this middleware returns and are not counted.
+    Async requests are measured the same way: their queries run in the
+    request's sync_to_async thread, where the SQL wrapper is installed.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        stats, token = metrics.start_request()
+        start = time.perf_counter()
+        try:
+            with _timed_queries(stats):
+                response = self.get_response(request)
+        finally:
+            metrics.finish_request(token)
+        return self._report(request, response, stats, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        stats, token = metrics.start_request()
+        start = time.perf_counter()
+        try:
+            queries = await sync_to_async(_timed_queries)(stats)
+            try:
+                response = await self.get_response(request)
+            finally:
+                await sync_to_async(queries.close)()
+        finally:
+            metrics.finish_request(token)
+        return self._report(request, response, stats, time.perf_counter() - start)
+
+    def _report(self, request, response, stats, duration):
+        match = request.resolver_match
+        view = match.view_name if match else "unresolved"
+        size = None if response.streaming else len(response.content)
+        slow = duration * 1000 >= settings.SLOW_REQUEST_MS
+        metrics.observe_request(view, stats, duration, size, slow)
+
+        response["Server-Timing"] = (
+            f'app;dur={duration * 1000:.1f}, '
+            f'db;dur={stats.db_time * 1000:.1f};desc="{stats.queries} queries", '
+            f'cache;desc="{stats.cache_hits} hits {stats.cache_misses} misses"'
+        )
+        if slow:
+            logger.warning(
+                "Slow request %s %s (%s): %.0fms, %s queries, %.0fms in SQL. Top statements:\n%s",
+                request.method,
+                request.path,
+                view,
+                duration * 1000,
+                stats.queries,
+                stats.db_time * 1000,
+                "\n".join(f"  {d * 1000:.1f}ms {sql[:300]}" for d, sql in stats.top_statements()),
+            )
+        return response
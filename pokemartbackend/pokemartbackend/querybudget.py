@@ -0,0 +1,144 @@
+"""Per-view SQL query budgets.
+
+``@query_budget(n)`` counts the statements a view runs on every database
+alias, including the ones issued while a streaming body is consumed. Going
+over budget raises QueryBudgetExceeded when QUERY_BUDGET_STRICT is on
+(DEBUG and test runs) and logs a warning otherwise, so N+1 regressions fail
+loudly in development without taking production down.
+
+Budgets count everything the view triggers, including the lazy
+``request.user`` lookup and the session read of the default db session
+engine (a cached_db hit saves that query). Async views
+are counted too: their queries run in the request's sync_to_async thread,
+so the counter is installed on that thread's connections.
+"""
+
+import functools
+import logging
+import threading
+from contextlib import ExitStack, contextmanager
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+class QueryCounter:
+    """Context manager counting SQL statements on every connection."""
+
+    def __init__(self):
+        self.count = 0
+        self.statements = []
+        # fan_out workers report to the same counter.
+        self._lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        with self._lock:
+            self.count += 1
+            self.statements.append(sql)
+        return execute(sql, params, many, context)
+
+    def __enter__(self):
+        self._stack = ExitStack()
+        for alias in connections:
+            self._stack.enter_context(connections[alias].execute_wrapper(self))
+        return self
+
+    def __exit__(self, *exc):
+        self._stack.close()
+        return False
+
+
+def _enforce(name, budget, counter):
+    if counter.count <= budget:
+        return
+    message = f"{name} ran {counter.count} queries, budget is {budget}"
+    if getattr(settings, "QUERY_BUDGET_STRICT", settings.DEBUG):
+        raise QueryBudgetExceeded(message + ":\n" + "\n".join(counter.statements))
+    logger.warning(message)
+
+
+def _streams_rows(response):
+    # File bodies (FileResponse) run no queries; rewrapping them would also
+    # stop the server from sending the file with wsgi.file_wrapper.
+    return getattr(response, "streaming", False) and getattr(response, "file_to_stream", None) is None
+
+
+def query_budget(budget):
+    """Declare the maximum number of queries ``view`` may run per call."""
+
+    def decorator(view):
+        name = f"{view.__module__}.{view.__qualname__}"
+
+        if iscoroutinefunction(view):
+            @functools.wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                counter = QueryCounter()
+                await sync_to_async(counter.__enter__)()
+                try:
+                    response = await view(request, *args, **kwargs)
+                finally:
+                    await sync_to_async(counter.__exit__)(None, None, None)
+                if _streams_rows(response):
+                    response.streaming_content = _acounted(response.streaming_content, name, budget, counter)
+                else:
+                    _enforce(name, budget, counter)
+                return response
+
+            async_wrapper.query_budget = budget
+            return async_wrapper
+
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            counter = QueryCounter()
+            with counter:
+                response = view(request, *args, **kwargs)
+            if _streams_rows(response):
+                response.streaming_content = _counted(response.streaming_content, name, budget, counter)
+            else:
+                _enforce(name, budget, counter)
+            return response
+
+        wrapper.query_budget = budget
+        return wrapper
+
+    return decorator
+
+
+def _counted(content, name, budget, counter):
+    with counter:
+        yield from content
+    _enforce(name, budget, counter)
+
+
+async def _acounted(content, name, budget, counter):
+    await sync_to_async(counter.__enter__)()
+    try:
+        async for chunk in content:
+            yield chunk
+    finally:
+        await sync_to_async(counter.__exit__)(None, None, None)
+    _enforce(name, budget, counter)
+
+
+@contextmanager
+def assert_query_budget(view, budget=None):
+    """Test helper: fail if the block runs more queries than ``view`` allows.
+
+        with assert_query_budget(views.list_orders):
+            self.client.get("/store/orders/")
+    """
+    budget = budget if budget is not None else view.query_budget
+    counter = QueryCounter()
+    with counter:
+        yield counter
+    if counter.count > budget:
+        raise AssertionError(
+            f"{view.__name__} ran {counter.count} queries, budget is {budget}:\n" + "\n".join(counter.statements)
+        )
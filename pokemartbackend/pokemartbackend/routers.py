@@ -0,0 +1,106 @@
+"""Primary/replica database routing for store queries.
+
+Reads of store models go to a random ``replica_N`` alias, writes always go
+to ``default``. A request is pinned to the primary once it writes (or when
+ReplicaStickinessMiddleware sees an unsafe method or a sticky cookie), and
+any read inside an open transaction on the primary stays there too.
+Everything outside the store app (users, sessions, auth) is left alone.
+"""
+
+import random
+from contextlib import ContextDecorator
+from contextvars import ContextVar
+
+from django.db import DEFAULT_DB_ALIAS, connections
+
+ROUTED_APPS = {"store"}
+ANALYTICS_ALIAS = "analytics"
+
+_pinned = ContextVar("db_pinned_to_primary", default=False)
+_wrote = ContextVar("db_wrote_to_primary", default=False)
+_read_alias = ContextVar("db_read_alias", default=None)
+
+
+def replica_aliases():
+    return [alias for alias in connections if alias.startswith("replica_")]
+
+
+def begin_request(pinned=False):
+    """Reset routing state for a new request; returns tokens for end_request()."""
+    return (_pinned.set(pinned), _wrote.set(False), _read_alias.set(None))
+
+
+def end_request(tokens):
+    pinned, wrote, read_alias = tokens
+    _pinned.reset(pinned)
+    _wrote.reset(wrote)
+    _read_alias.reset(read_alias)
+
+
+def pin_to_primary():
+    _pinned.set(True)
+
+
+def wrote_to_primary():
+    return _wrote.get()
+
+
+def mark_written():
+    """Treat the request as a write: pin it and give the client the sticky cookie.
+
+    For views whose writes run after the response leaves the middleware,
+    e.g. inside a streamed body.
+    """
+    _pinned.set(True)
+    _wrote.set(True)
+
+
+class analytics_reads(ContextDecorator):
+    """Send store reads inside the block to the analytics alias.
+
+    Falls back to regular replica routing when no analytics database is
+    configured. Usable as ``with analytics_reads():`` or as a view decorator.
+    """
+
+    def _recreate_cm(self):
+        # A decorated view runs in many threads at once; give every call its
+        # own instance so the reset token is never shared.
+        return type(self)()
+
+    def __enter__(self):
+        alias = ANALYTICS_ALIAS if ANALYTICS_ALIAS in connections else None
+        self._token = _read_alias.set(alias)
+        return self
+
+    def __exit__(self, *exc):
+        _read_alias.reset(self._token)
+        return False
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label not in ROUTED_APPS:
+            return None
+        if _pinned.get() or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        alias = _read_alias.get()
+        if alias:
+            return alias
+        replicas = replica_aliases()
+        return random.choice(replicas) if replicas else None
+
+    def db_for_write(self, model, **hints):
+        if model._meta.app_label in ROUTED_APPS:
+            mark_written()
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Every alias holds the same data, so cross-alias relations are fine.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas and analytics copies receive schema changes through
+        # replication, never through migrate.
+        if db == DEFAULT_DB_ALIAS:
+            return None
+        return False
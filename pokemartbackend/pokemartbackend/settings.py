@@ -10,8 +10,10 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.0/ref/settings/
 """
 
+from copy import deepcopy
 from pathlib import Path
 import os
+import sys
 from dotenv import load_dotenv
 
 load_dotenv(Path(__file__).resolve().parent.parent / ".env")
@@ -47,10 +49,12 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "pokemartbackend.middleware.PerformanceMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.common.CommonMiddleware",
+    "pokemartbackend.middleware.ReplicaStickinessMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
@@ -84,12 +88,94 @@ WSGI_APPLICATION = "pokemartbackend.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/5.0/ref/settings/#databases
 
-DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+#
+# DB_PROFILE selects the deployment profile:
+#   sqlite      – local development, default pragmas (the historical setup)
+#   sqlite-wal  – single-node deployments: WAL journal, synchronous=NORMAL,
+#                 busy_timeout and mmap applied on connect (see pokemartbackend.db)
+#   postgres    – persistent connections with health checks, optional pool
+#                 (DB_POOL=1, requires `psycopg[pool]`)
+
+DB_PROFILE = os.environ.get("DB_PROFILE", "sqlite")
+
+if DB_PROFILE == "postgres":
+    DB_POOL = os.environ.get("DB_POOL", "") == "1"
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.postgresql",
+            "NAME": os.environ.get("POSTGRES_DB", "pokemart"),
+            "USER": os.environ.get("POSTGRES_USER", "pokemart"),
+            "PASSWORD": os.environ.get("POSTGRES_PASSWORD", ""),
+            "HOST": os.environ.get("POSTGRES_HOST", "localhost"),
+            "PORT": os.environ.get("POSTGRES_PORT", "5432"),
+            # The pool owns connection lifetime, so persistent connections
+            # are only used without it.
+            "CONN_MAX_AGE": 0 if DB_POOL else int(os.environ.get("DB_CONN_MAX_AGE", 60)),
+            "CONN_HEALTH_CHECKS": True,
+            "OPTIONS": {},
+        }
     }
+    if DB_POOL:
+        DATABASES["default"]["OPTIONS"]["pool"] = {
+            "min_size": int(os.environ.get("DB_POOL_MIN_SIZE", 2)),
+            "max_size": int(os.environ.get("DB_POOL_MAX_SIZE", 10)),
+            "timeout": int(os.environ.get("DB_POOL_TIMEOUT", 10)),
+        }
+else:
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": os.environ.get("SQLITE_PATH", BASE_DIR / "db.sqlite3"),
+            # SQLite has no SELECT ... FOR UPDATE: take the write lock at
+            # BEGIN so concurrent checkouts and order edits queue on the busy
+            # timeout instead of failing with "database is locked".
+            "OPTIONS": {"transaction_mode": "IMMEDIATE"},
+            # Tests use a file rather than shared-cache :memory:, whose table
+            # locks fail at once instead of waiting for the writer.
+            "TEST": {"NAME": os.environ.get("SQLITE_TEST_PATH", BASE_DIR / "test_db.sqlite3")},
+        }
+    }
+    if DB_PROFILE == "sqlite-wal":
+        DATABASES["default"]["CONN_MAX_AGE"] = int(os.environ.get("DB_CONN_MAX_AGE", 60))
+
+# ── Read replicas ──
+# DB_REPLICAS lists read-only copies of the primary: SQLite file paths for
+# the sqlite profiles, hostnames for postgres. They become the aliases
+# replica_1..N. DB_ANALYTICS does the same for a dedicated "analytics"
+# alias that reporting queries opt into. Routing lives in
+# pokemartbackend.routers; with neither set everything stays on "default".
+DB_REPLICAS = [r.strip() for r in os.environ.get("DB_REPLICAS", "").split(",") if r.strip()]
+DB_ANALYTICS = os.environ.get("DB_ANALYTICS", "").strip()
+
+
+def _database_copy(location):
+    copy = deepcopy(DATABASES["default"])
+    copy["HOST" if DB_PROFILE == "postgres" else "NAME"] = location
+    copy["TEST"] = {"MIRROR": "default"}
+    return copy
+
+
+for _index, _location in enumerate(DB_REPLICAS, start=1):
+    DATABASES[f"replica_{_index}"] = _database_copy(_location)
+if DB_ANALYTICS:
+    DATABASES["analytics"] = _database_copy(DB_ANALYTICS)
+
+DATABASE_ROUTERS = ["pokemartbackend.routers.PrimaryReplicaRouter"]
+
+# After a client writes, its reads stay on the primary for this long so it
+# always sees its own cart and order changes despite replication lag.
+REPLICA_STICKY_SECONDS = int(os.environ.get("REPLICA_STICKY_SECONDS", 5))
+
+# PRAGMAs issued on every new SQLite connection by pokemartbackend.db. The
+# sqlite-wal set is also what `bench_db` compares against stock SQLite.
+SQLITE_WAL_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": int(os.environ.get("SQLITE_BUSY_TIMEOUT_MS", 5000)),
+    "mmap_size": int(os.environ.get("SQLITE_MMAP_SIZE", 256 * 1024 * 1024)),
+    "temp_store": "MEMORY",
 }
+SQLITE_PRAGMAS = SQLITE_WAL_PRAGMAS if DB_PROFILE == "sqlite-wal" else {}
 
 
 # Password validation
@@ -138,10 +224,130 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 # ── Resend (email OTP) ──
 RESEND_API_KEY = os.environ.get("RESEND_API_KEY", "")
 
-# In-memory cache for OTP codes (dev-friendly, no extra deps)
-CACHES = {
-    "default": {
-        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
-        "LOCATION": "otp-cache",
+# ── Cache ──
+# Set REDIS_URL to share the cache (OTP codes, sessions, catalog facets)
+# between processes; with per-process caches a worker only sees its own
+# catalog version bumps, so facets may lag by CATALOG_FACETS_CACHE_SECONDS,
+# and the per-user caches below are off unless configured.
+# Requires the `redis` package. Without it we fall back to in-memory caches
+# (dev-friendly, no extra deps).
+REDIS_URL = os.environ.get("REDIS_URL", "")
+
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "pokemartbackend.cache.InstrumentedRedisCache",
+            "LOCATION": REDIS_URL,
+        },
+        "sessions": {
+            "BACKEND": "pokemartbackend.cache.InstrumentedRedisCache",
+            "LOCATION": REDIS_URL,
+            "KEY_PREFIX": "session",
+        },
     }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "pokemartbackend.cache.InstrumentedLocMemCache",
+            "LOCATION": "otp-cache",
+        },
+        "sessions": {
+            "BACKEND": "pokemartbackend.cache.InstrumentedLocMemCache",
+            "LOCATION": "session-cache",
+        },
+    }
+
+# Requests slower than this are logged with their top SQL statements.
+SLOW_REQUEST_MS = int(os.environ.get("SLOW_REQUEST_MS", 500))
+
+# Rows fetched per round trip by streaming JSON responses.
+STREAM_CHUNK_SIZE = int(os.environ.get("STREAM_CHUNK_SIZE", 500))
+
+# Facet counts stay cached until the catalog changes, and at most this long.
+CATALOG_FACETS_CACHE_SECONDS = int(os.environ.get("CATALOG_FACETS_CACHE_SECONDS", 300))
+
+# Caches users must see their own changes through (batch lookups and
+# get_card, seller-stats, dashboard) are invalidated by deleting keys or
+# bumping version keys in the default cache. Without REDIS_URL that cache is
+# per-process, so other workers would keep serving the old payload for up
+# to the timeout after a change: they default to off (0) then. Setting one
+# explicitly accepts that much lag on a per-process cache.
+_SHARED_CACHE_SECONDS = 300 if REDIS_URL else 0
+
+# Per-id card and listing payloads served by the batch lookup endpoints.
+BATCH_LOOKUP_CACHE_SECONDS = int(os.environ.get("BATCH_LOOKUP_CACHE_SECONDS", _SHARED_CACHE_SECONDS))
+
+# Bulk inventory uploads: rows inserted per bulk_create, and the largest
+# upload accepted over HTTP (the import_inventory command has no limit).
+INVENTORY_BATCH_SIZE = int(os.environ.get("INVENTORY_BATCH_SIZE", 500))
+INVENTORY_MAX_ROWS = int(os.environ.get("INVENTORY_MAX_ROWS", 5000))
+
+# maintain_listings: rows per UPDATE, and how long an unsold listing may
+# stay Available before it is deactivated.
+LISTING_MAINTENANCE_BATCH_SIZE = int(os.environ.get("LISTING_MAINTENANCE_BATCH_SIZE", 1000))
+LISTING_STALE_DAYS = int(os.environ.get("LISTING_STALE_DAYS", 180))
+
+# seller-stats responses; order events and catalog changes retire them sooner.
+SELLER_STATS_CACHE_SECONDS = int(os.environ.get("SELLER_STATS_CACHE_SECONDS", _SHARED_CACHE_SECONDS))
+
+# dashboard/ payloads; order events and catalog changes retire them sooner.
+DASHBOARD_CACHE_SECONDS = int(os.environ.get("DASHBOARD_CACHE_SECONDS", _SHARED_CACHE_SECONDS))
+
+# archive_messages: chats of orders closed (and quiet) for this many days
+# move to compressed MessageArchive rows, this many orders per transaction.
+MESSAGE_ARCHIVE_AFTER_DAYS = int(os.environ.get("MESSAGE_ARCHIVE_AFTER_DAYS", 90))
+MESSAGE_ARCHIVE_BATCH_SIZE = int(os.environ.get("MESSAGE_ARCHIVE_BATCH_SIZE", 100))
+
+# Card images (store.images): originals and WebP thumbnails are cached on
+# disk under IMAGE_CACHE_DIR by content hash. IMAGE_SENDFILE_HEADER hands
+# files to the front server instead of streaming them from Django, e.g.
+# "X-Accel-Redirect" (nginx, with IMAGE_SENDFILE_PREFIX as the internal
+# location mapped to IMAGE_CACHE_DIR) or "X-Sendfile" (absolute paths).
+IMAGE_CACHE_DIR = Path(os.environ.get("IMAGE_CACHE_DIR", BASE_DIR / "image_cache"))
+IMAGE_THUMBNAIL_WIDTHS = tuple(
+    int(width) for width in os.environ.get("IMAGE_THUMBNAIL_WIDTHS", "160,320,640").split(",")
+)
+IMAGE_THUMBNAIL_QUALITY = int(os.environ.get("IMAGE_THUMBNAIL_QUALITY", 80))
+IMAGE_WORKERS = int(os.environ.get("IMAGE_WORKERS", 2))
+IMAGE_FETCH_TIMEOUT = float(os.environ.get("IMAGE_FETCH_TIMEOUT", 10))
+IMAGE_MAX_BYTES = int(os.environ.get("IMAGE_MAX_BYTES", 10 * 1024 * 1024))
+IMAGE_SENDFILE_HEADER = os.environ.get("IMAGE_SENDFILE_HEADER", "")
+IMAGE_SENDFILE_PREFIX = os.environ.get("IMAGE_SENDFILE_PREFIX", "")
+
+# Threads (each with its own connection) that run the independent queries of
+# composite views concurrently; see pokemartbackend.db.fan_out. It pays off
+# when queries wait on the network (postgres); in-process SQLite gains little.
+# 1 disables it.
+DB_FAN_OUT_WORKERS = int(os.environ.get("DB_FAN_OUT_WORKERS", 4))
+
+# Serve the hot read endpoints with their async implementations
+# (store.async_views). asgi.py turns this on; WSGI keeps the sync views.
+ASYNC_VIEWS = os.environ.get("ASYNC_VIEWS", "") == "1"
+
+# Views decorated with @query_budget raise when they go over budget in
+# development (DEBUG) and tests; in production the overrun is only logged.
+# QUERY_BUDGET_STRICT=1 or =0 overrides the default either way.
+QUERY_BUDGET_STRICT = os.environ.get(
+    "QUERY_BUDGET_STRICT", "1" if DEBUG or "test" in sys.argv else "0"
+) == "1"
+
+# ── Sessions ──
+# cached_db serves session reads from the "sessions" cache and only falls
+# back to django_session on a miss; signed_cookies drops the table entirely.
+# cached_db needs a cache every worker shares (REDIS_URL): with per-process
+# LocMem a logout in one worker leaves the session alive in the others, so
+# the default is db without Redis and `check` rejects cached_db on LocMem.
+# Query budgets are set against the db engine: one session read per request.
+SESSION_ENGINES = {
+    "cached_db": "django.contrib.sessions.backends.cached_db",
+    "signed_cookies": "django.contrib.sessions.backends.signed_cookies",
+    "db": "django.contrib.sessions.backends.db",
 }
+SESSION_ENGINE = SESSION_ENGINES[os.environ.get("SESSION_BACKEND", "cached_db" if REDIS_URL else "db")]
+SESSION_CACHE_ALIAS = "sessions"
+SESSION_COOKIE_AGE = int(os.environ.get("SESSION_COOKIE_AGE", 60 * 60 * 24 * 14))
+
+# Rows deleted per statement by `manage.py purge_sessions` (run it from cron).
+# It leaves the table size in SESSION_STATS_PATH for the /metrics gauge.
+SESSION_PURGE_BATCH_SIZE = int(os.environ.get("SESSION_PURGE_BATCH_SIZE", 5000))
+SESSION_STATS_PATH = Path(os.environ.get("SESSION_STATS_PATH", BASE_DIR / "session_stats.json"))
@@ -150,8 +150,11 @@ OPENAPI_SPEC = {
                 ],
                 "responses": {
                     "200": {
-                        "description": "User found",
-                        "content": {"application/json": {"schema": {"$ref": "#/components/schemas/UserResponse"}}},
+                        "description": "User found, with their reputation as a seller",
+                        "content": {"application/json": {"schema": {"allOf": [
+                            {"$ref": "#/components/schemas/UserResponse"},
+                            {"type": "object", "properties": {"reputation": {"$ref": "#/components/schemas/SellerReputation"}}},
+                        ]}}},
                     },
                     "404": {
                         "description": "User not found",
@@ -192,6 +195,30 @@ OPENAPI_SPEC = {
                 },
             }
         },
+        "/store/cards/batch/": {
+            "get": {
+                "tags": ["Cards"],
+                "summary": "Fetch several cards by id",
+                "description": "Returns an object keyed by id; unknown ids map to null.",
+                "operationId": "getCardsBatch",
+                "parameters": [
+                    {
+                        "name": "ids",
+                        "in": "query",
+                        "required": True,
+                        "schema": {"type": "string"},
+                        "description": "Comma-separated ids, at most 200",
+                    }
+                ],
+                "responses": {
+                    "200": {"description": "Payloads keyed by id"},
+                    "400": {
+                        "description": "Missing, malformed or too many ids",
+                        "content": {"application/json": {"schema": {"$ref": "#/components/schemas/Error"}}},
+                    },
+                },
+            }
+        },
         "/store/cards/search/": {
             "get": {
                 "tags": ["Cards"],
@@ -247,12 +274,58 @@ OPENAPI_SPEC = {
                 },
             }
         },
+        "/store/cards/{card_id}/image/": {
+            "get": {
+                "tags": ["Cards"],
+                "summary": "Redirect to the cached card image, or a WebP thumbnail of at least w pixels",
+                "operationId": "getCardImage",
+                "parameters": [
+                    {"name": "card_id", "in": "path", "required": True, "schema": {"type": "integer"}},
+                    {"name": "w", "in": "query", "required": False, "schema": {"type": "integer", "minimum": 1}, "description": "Minimum width; snapped up to a configured thumbnail width"},
+                ],
+                "responses": {
+                    "302": {"description": "Redirect to /store/images/{digest}/{variant} (the original while the thumbnail is being made)"},
+                    "400": {"description": "Invalid w", "content": {"application/json": {"schema": {"$ref": "#/components/schemas/Error"}}}},
+                    "404": {"description": "Card not found", "content": {"application/json": {"schema": {"$ref": "#/components/schemas/Error"}}}},
+                    "502": {"description": "Source image could not be fetched", "content": {"application/json": {"schema": {"$ref": "#/components/schemas/Error"}}}},
+                },
+            }
+        },
+        "/store/images/{digest}/{variant}": {
+            "get": {
+                "tags": ["Cards"],
+                "summary": "A cached image by content hash, served with an immutable Cache-Control",
+                "operationId": "getImage",
+                "parameters": [
+                    {"name": "digest", "in": "path", "required": True, "schema": {"type": "string", "pattern": "^[0-9a-f]{64}$"}},
+                    {"name": "variant", "in": "path", "required": True, "schema": {"type": "string", "example": "320.webp"}, "description": "original or <width>.webp"},
+                ],
+                "responses": {
+                    "200": {"description": "Image bytes", "content": {"image/webp": {}, "image/png": {}, "image/jpeg": {}}},
+                    "404": {"description": "Image not found", "content": {"application/json": {"schema": {"$ref": "#/components/schemas/Error"}}}},
+                },
+            }
+        },
         # ── Listings ─────────────────────────────────────────────────────
         "/store/listings/": {
             "get": {
                 "tags": ["Listings"],
                 "summary": "List all available listings",
                 "operationId": "listListings",
+                "parameters": [
+                    {"name": "rarity", "in": "query", "schema": {"type": "string"}},
+                    {"name": "collection", "in": "query", "schema": {"type": "string"}},
+                    {"name": "condition", "in": "query", "schema": {"type": "string"}},
+                    {"name": "seller", "in": "query", "schema": {"type": "string"}, "description": "Seller username"},
+                    {"name": "card_id", "in": "query", "schema": {"type": "integer"}},
+                    {"name": "min_price", "in": "query", "schema": {"type": "number"}},
+                    {"name": "max_price", "in": "query", "schema": {"type": "number"}},
+                    {
+                        "name": "sort",
+                        "in": "query",
+                        "schema": {"type": "string", "enum": ["newest", "oldest", "price", "-price"], "default": "newest"},
+                    },
+                ],
                 "responses": {
                     "200": {
                         "description": "List of listings",
@@ -265,6 +338,108 @@ OPENAPI_SPEC = {
                 },
             }
         },
+        "/store/listings/batch/": {
+            "get": {
+                "tags": ["Listings"],
+                "summary": "Fetch several listings by id",
+                "description": "Returns an object keyed by id; unknown ids map to null.",
+                "operationId": "getListingsBatch",
+                "parameters": [
+                    {
+                        "name": "ids",
+                        "in": "query",
+                        "required": True,
+                        "schema": {"type": "string"},
+                        "description": "Comma-separated ids, at most 200",
+                    }
+                ],
+                "responses": {
+                    "200": {"description": "Payloads keyed by id"},
+                    "400": {
+                        "description": "Missing, malformed or too many ids",
+                        "content": {"application/json": {"schema": {"$ref": "#/components/schemas/Error"}}},
+                    },
+                },
+            }
+        },
+        "/store/listings/bulk/": {
+            "post": {
+                "tags": ["Listings"],
+                "summary": "Upload many listings as CSV or NDJSON (requires auth)",
+                "description": (
+                    "Columns: card_id, price, quantity, condition, and optionally status and description. "
+                    "Send text/csv or application/x-ndjson, a multipart `file`, or pass ?format=csv|ndjson. "
+                    "The response streams NDJSON events: per-row errors, progress per batch and a final summary."
+                ),
+                "operationId": "bulkCreateListings",
+                "responses": {
+                    "200": {"description": "NDJSON progress stream", "content": {"application/x-ndjson": {}}},
+                    "400": {
+                        "description": "Unknown format, empty or oversized upload",
+                        "content": {"application/json": {"schema": {"$ref": "#/components/schemas/Error"}}},
+                    },
+                    "401": {
+                        "description": "Authentication required",
+                        "content": {"application/json": {"schema": {"$ref": "#/components/schemas/Error"}}},
+                    },
+                },
+            }
+        },
+        "/store/listings/bulk/update/": {
+            "post": {
+                "tags": ["Listings"],
+                "summary": "Change price and/or status of many own listings (requires auth)",
+                "description": (
+                    'Select listings with "ids" (at most 500) or "filter" (status, condition, card_id, rarity, '
+                    'collection, min_price, max_price). Set "status" and/or "price" as {"value": x}, '
+                    '{"percent": x} or {"recommended_factor": x}. Runs as a single UPDATE.'
+                ),
+                "operationId": "bulkUpdateListings",
+                "requestBody": {
+                    "required": True,
+                    "content": {
+                        "application/json": {
+                            "example": {"filter": {"condition": "Damaged"}, "status": "Inactive"},
+                        }
+                    },
+                },
+                "responses": {
+                    "200": {"description": "Number and ids of updated listings"},
+                    "400": {
+                        "description": "Invalid selection or change",
+                        "content": {"application/json": {"schema": {"$ref": "#/components/schemas/Error"}}},
+                    },
+                    "401": {
+                        "description": "Authentication required",
+                        "content": {"application/json": {"schema": {"$ref": "#/components/schemas/Error"}}},
+                    },
+                },
+            }
+        },
+        "/store/listings/facets/": {
+            "get": {
+                "tags": ["Listings"],
+                "summary": "Counts per rarity, collection, condition and price range",
+                "description": "Accepts the same filters as listListings. Each facet ignores its own filter.",
+                "operationId": "listingFacets",
+                "parameters": [
+                    {"name": "rarity", "in": "query", "schema": {"type": "string"}},
+                    {"name": "collection", "in": "query", "schema": {"type": "string"}},
+                    {"name": "condition", "in": "query", "schema": {"type": "string"}},
+                    {"name": "seller", "in": "query", "schema": {"type": "string"}},
+                    {"name": "card_id", "in": "query", "schema": {"type": "integer"}},
+                    {"name": "min_price", "in": "query", "schema": {"type": "number"}},
+                    {"name": "max_price", "in": "query", "schema": {"type": "number"}},
+                ],
+                "responses": {
+                    "200": {"description": "Facet counts"},
+                    "400": {
+                        "description": "Invalid price filter",
+                        "content": {"application/json": {"schema": {"$ref": "#/components/schemas/Error"}}},
+                    },
+                },
+            }
+        },
         "/store/listings/create/": {
             "post": {
                 "tags": ["Listings"],
@@ -447,6 +622,26 @@ OPENAPI_SPEC = {
                 },
             }
         },
+        "/store/dashboard/": {
+            "get": {
+                "tags": ["Orders"],
+                "summary": "Purchases, sales, active listings and seller stats of the authenticated user in one response",
+                "operationId": "getDashboard",
+                "parameters": [
+                    {"name": "include", "in": "query", "required": False, "schema": {"type": "string"}, "description": "Comma-separated sections: purchases, sales, listings, stats (default: all)"},
+                ],
+                "responses": {
+                    "200": {"description": "One key per requested section, in the shape of orders/, sales/ and seller-stats/", "content": {"application/json": {"schema": {"type": "object", "properties": {
+                        "purchases": {"type": "array", "items": {"$ref": "#/components/schemas/OrderSummary"}},
+                        "sales": {"type": "array", "items": {"$ref": "#/components/schemas/OrderSummary"}},
+                        "listings": {"type": "array", "items": {"type": "object"}},
+                        "stats": {"type": "object"},
+                    }}}}},
+                    "400": {"description": "Unknown section in include", "content": {"application/json": {"schema": {"$ref": "#/components/schemas/Error"}}}},
+                    "401": {"description": "Authentication required", "content": {"application/json": {"schema": {"$ref": "#/components/schemas/Error"}}}},
+                },
+            }
+        },
         "/store/orders/create/": {
             "post": {
                 "tags": ["Orders"],
@@ -472,6 +667,44 @@ OPENAPI_SPEC = {
                 },
             }
         },
+        "/store/inbox/": {
+            "get": {
+                "tags": ["Orders"],
+                "summary": "Unread message counts and last-message previews for all of the user's orders",
+                "operationId": "getInbox",
+                "responses": {
+                    "200": {"description": "Total unread messages and one entry per order, latest conversation first", "content": {"application/json": {"schema": {"type": "object", "properties": {
+                        "unread": {"type": "integer"},
+                        "orders": {"type": "array", "items": {"type": "object", "properties": {
+                            "order_id": {"type": "integer"},
+                            "status": {"type": "string"},
+                            "unread": {"type": "integer"},
+                            "last_read_message_id": {"type": "integer"},
+                            "last_message": {"type": "object", "nullable": True, "properties": {
+                                "id": {"type": "integer"},
+                                "sender": {"type": "string"},
+                                "preview": {"type": "string"},
+                                "created_at": {"type": "string", "format": "date-time"},
+                            }},
+                        }}},
+                    }}}}},
+                    "401": {"description": "Authentication required", "content": {"application/json": {"schema": {"$ref": "#/components/schemas/Error"}}}},
+                },
+            }
+        },
+        "/store/orders/{order_id}/messages/read/": {
+            "post": {
+                "tags": ["Orders"],
+                "summary": "Mark every message of the order as read for the authenticated user",
+                "operationId": "markOrderMessagesRead",
+                "parameters": [{"name": "order_id", "in": "path", "required": True, "schema": {"type": "integer"}}],
+                "responses": {
+                    "200": {"description": "Read cursor moved to the latest message", "content": {"application/json": {"schema": {"type": "object", "properties": {"order_id": {"type": "integer"}, "unread": {"type": "integer"}}}}}},
+                    "401": {"description": "Authentication required", "content": {"application/json": {"schema": {"$ref": "#/components/schemas/Error"}}}},
+                    "404": {"description": "Order not found or the user does not take part in it", "content": {"application/json": {"schema": {"$ref": "#/components/schemas/Error"}}}},
+                },
+            }
+        },
         # ── Reviews ──────────────────────────────────────────────────────
         "/store/reviews/create/": {
             "post": {
@@ -515,6 +748,25 @@ OPENAPI_SPEC = {
                 },
             }
         },
+        "/store/users/{username}/reviews/": {
+            "get": {
+                "tags": ["Reviews"],
+                "summary": "Reviews received by a seller, newest first, with keyset pagination",
+                "operationId": "listUserReviews",
+                "parameters": [
+                    {"name": "username", "in": "path", "required": True, "schema": {"type": "string"}},
+                    {"name": "limit", "in": "query", "required": False, "schema": {"type": "integer", "minimum": 1, "maximum": 50, "default": 20}},
+                    {"name": "cursor", "in": "query", "required": False, "schema": {"type": "string"}, "description": "next_cursor of the previous page"},
+                ],
+                "responses": {
+                    "200": {"description": "One page of reviews", "content": {"application/json": {"schema": {"type": "object", "properties": {
+                        "reviews": {"type": "array", "items": {"$ref": "#/components/schemas/Review"}},
+                        "next_cursor": {"type": "string", "nullable": True, "description": "Null on the last page"},
+                    }}}}},
+                    "400": {"description": "Invalid limit or cursor", "content": {"application/json": {"schema": {"$ref": "#/components/schemas/Error"}}}},
+                },
+            }
+        },
     },
     "components": {
         "schemas": {
@@ -536,6 +788,22 @@ OPENAPI_SPEC = {
                     "rarity": {"type": "string", "example": "Rare Holo"},
                     "image_url": {"type": "string", "format": "uri", "example": "https://images.pokemontcg.io/base1/4.png"},
                     "recommended_price": {"type": "string", "example": "120.00"},
+                    "image_width": {"type": "integer", "nullable": True, "example": 734, "description": "Null until the image is prefetched"},
+                    "image_height": {"type": "integer", "nullable": True, "example": 1024},
+                    "image_blurhash": {"type": "string", "example": "LVHC1Rt7~q%Mt7j[ofj[~qofofof", "description": "Blurhash placeholder; empty until the image is prefetched"},
+                },
+            },
+            "SellerReputation": {
+                "type": "object",
+                "properties": {
+                    "reviews": {"type": "integer", "example": 12},
+                    "average": {"type": "number", "nullable": True, "example": 4.58},
+                    "histogram": {
+                        "type": "object",
+                        "description": "Number of reviews per rating, keyed \"1\" to \"5\"",
+                        "additionalProperties": {"type": "integer"},
+                        "example": {"1": 0, "2": 0, "3": 1, "4": 3, "5": 8},
+                    },
                 },
             },
             "Listing": {
@@ -547,6 +815,7 @@ OPENAPI_SPEC = {
                         "properties": {
                             "id": {"type": "integer"},
                             "username": {"type": "string"},
+                            "reputation": {"$ref": "#/components/schemas/SellerReputation"},
                         },
                     },
                     "card": {"$ref": "#/components/schemas/Card"},
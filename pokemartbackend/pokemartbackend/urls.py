@@ -18,6 +18,7 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import include, path
 
+from .metrics import metrics_view
 from .swagger import swagger_ui, openapi_schema
 
 urlpatterns = [
@@ -26,4 +27,5 @@ urlpatterns = [
     path("users/", include("users.urls")),
     path("docs/", swagger_ui, name="swagger_ui"),
     path("docs/schema/", openapi_schema, name="openapi_schema"),
+    path("metrics", metrics_view, name="metrics"),
 ]
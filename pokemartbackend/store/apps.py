@@ -4,3 +4,19 @@ from django.apps import AppConfig
 class StoreConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "store"
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+
+        from pokemartbackend.db import apply_sqlite_pragmas
+
+        from .catalog import connect_signals
+        from .images import connect_signals as connect_image_signals
+        from .inbox import connect_receivers as connect_inbox_receivers
+        from .orders import connect_receivers
+
+        connection_created.connect(apply_sqlite_pragmas, dispatch_uid="sqlite_pragmas")
+        connect_signals()
+        connect_image_signals()
+        connect_receivers()
+        connect_inbox_receivers()
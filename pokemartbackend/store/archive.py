@@ -0,0 +1,141 @@
+"""Archival of chat history for orders closed a long time ago.
+
+``archive_messages`` finds closed orders (Completado, Cancelado) with no
+event or message in the last MESSAGE_ARCHIVE_AFTER_DAYS, encodes their
+messages exactly as list_order_messages does, stores them gzip-compressed
+as NDJSON in one MessageArchive row per order and deletes them from
+store_message. Messages that arrive later are appended on the next run.
+
+``order_messages`` (and ``aorder_messages`` for async views) serves
+archived and hot messages together, so clients never see the difference.
+Run the job through ``python manage.py archive_messages``.
+"""
+
+import gzip
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from pokemartbackend.http import dumps
+
+from .models import Message, MessageArchive, OrderEvent, Orders
+from .orders import TRANSITIONS
+from .serializers import MESSAGE_FIELDS, encode_message
+
+CLOSED_STATUSES = [status for status, following in TRANSITIONS.items() if not following]
+
+# Rows per DELETE ... WHERE id IN (...), under SQLite's parameter limit.
+DELETE_CHUNK = 500
+
+
+def archivable_orders(days):
+    """Closed orders with messages and no activity in the last ``days``."""
+    cutoff = timezone.now() - timedelta(days=days)
+    # Reads go to the primary: archived messages are deleted right after.
+    messages = Message.objects.using(DEFAULT_DB_ALIAS).filter(order=OuterRef("pk"))
+    recent_events = OrderEvent.objects.using(DEFAULT_DB_ALIAS).filter(order=OuterRef("pk"), created_at__gte=cutoff)
+    return (
+        Orders.objects.using(DEFAULT_DB_ALIAS)
+        .filter(status__in=CLOSED_STATUSES, created_at__lt=cutoff)
+        .filter(Exists(messages))
+        .exclude(Exists(messages.filter(created_at__gte=cutoff)))
+        .exclude(Exists(recent_events))
+    )
+
+
+def _decode(data):
+    return [json.loads(line) for line in gzip.decompress(bytes(data)).splitlines()]
+
+
+def _archive_batch(order_ids):
+    rows = (
+        Message.objects.using(DEFAULT_DB_ALIAS)
+        .filter(order_id__in=order_ids)
+        .order_by("order_id", "created_at", "id")
+        .values("order_id", *MESSAGE_FIELDS)
+    )
+    lines, last_ids, message_ids = {}, {}, []
+    for row in rows:
+        lines.setdefault(row["order_id"], []).append(dumps(encode_message(row)))
+        last_ids[row["order_id"]] = max(last_ids.get(row["order_id"], 0), row["id"])
+        message_ids.append(row["id"])
+    existing = MessageArchive.objects.using(DEFAULT_DB_ALIAS).in_bulk(list(lines))
+    now = timezone.now()
+    archives = []
+    for order_id, encoded in lines.items():
+        previous = existing.get(order_id)
+        body = gzip.decompress(bytes(previous.data)) if previous else b""
+        body += b"\n".join(encoded) + b"\n"
+        archives.append(MessageArchive(
+            order_id=order_id,
+            data=gzip.compress(body),
+            message_count=(previous.message_count if previous else 0) + len(encoded),
+            last_message_id=max(previous.last_message_id if previous else 0, last_ids[order_id]),
+            archived_at=now,
+        ))
+    with transaction.atomic():
+        MessageArchive.objects.bulk_create(
+            archives,
+            update_conflicts=True,
+            unique_fields=["order"],
+            update_fields=["data", "message_count", "last_message_id", "archived_at"],
+        )
+        for start in range(0, len(message_ids), DELETE_CHUNK):
+            Message.objects.filter(id__in=message_ids[start:start + DELETE_CHUNK]).delete()
+    return len(message_ids)
+
+
+def archive_messages(days=None, batch_size=None, dry_run=False):
+    """Archive every eligible order; returns ``{"orders": n, "messages": m}``."""
+    if days is None:
+        days = settings.MESSAGE_ARCHIVE_AFTER_DAYS
+    if batch_size is None:
+        batch_size = settings.MESSAGE_ARCHIVE_BATCH_SIZE
+    if days < 0 or batch_size < 1:
+        raise ValueError("days must be >= 0 and batch_size >= 1.")
+    orders = archivable_orders(days)
+    if dry_run:
+        return {
+            "orders": orders.count(),
+            "messages": Message.objects.using(DEFAULT_DB_ALIAS).filter(order__in=orders.values("pk")).count(),
+        }
+    archived_orders = archived_messages = 0
+    while True:
+        # Archived orders have no messages left, so they drop out of the query.
+        ids = list(orders.order_by("pk").values_list("pk", flat=True)[:batch_size])
+        if not ids:
+            return {"orders": archived_orders, "messages": archived_messages}
+        archived_messages += _archive_batch(ids)
+        archived_orders += len(ids)
+
+
+def _hot_messages(order_id):
+    return Message.objects.filter(order_id=order_id).order_by("created_at").values(*MESSAGE_FIELDS)
+
+
+def _archived_messages(order_id):
+    return MessageArchive.objects.filter(order_id=order_id).values_list("data", "last_message_id")
+
+
+def _merge(hot, archive):
+    if archive is None:
+        return hot
+    data, last_archived = archive
+    return _decode(data) + [message for message in hot if message["id"] > last_archived]
+
+
+def order_messages(order_id):
+    """Every message of the order, archived first, encoded for the chat."""
+    hot = [encode_message(row) for row in _hot_messages(order_id)]
+    # Read after the hot rows: if a run archives them in between, the
+    # archive has them too and the copies are dropped in _merge.
+    return _merge(hot, _archived_messages(order_id).first())
+
+
+async def aorder_messages(order_id):
+    hot = [encode_message(row) async for row in _hot_messages(order_id)]
+    return _merge(hot, await _archived_messages(order_id).afirst())
@@ -0,0 +1,87 @@
+"""Async implementations of the hottest read endpoints.
+
+Same URLs, parameters and payloads as their namesakes in ``views``, built
+on the async ORM (``afirst``, ``async for``, ``aiterator``) and the async
+cache API, so an ASGI server serves them on its event loop instead of
+handing every request to a worker thread. ``store.urls`` routes to them
+when ASYNC_VIEWS is on, which ``pokemartbackend.asgi`` enables by default.
+
+Compare both deployments with ``python manage.py benchmark --servers``.
+"""
+
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_http_methods
+
+from pokemartbackend.db import afan_out
+from pokemartbackend.http import JsonResponse, StreamingJsonResponse, wants_ndjson
+from pokemartbackend.querybudget import query_budget
+
+from .archive import aorder_messages
+from .catalog import acards_by_id
+from .serializers import encode_catalog_listing
+from .views import (
+    card_search,
+    catalog_listings,
+    feed_available,
+    feed_listings,
+    home_feed,
+    latest_feed_listings,
+    sample_feed_ids,
+)
+
+# Views whose async version lives here, by URL name.
+ASYNC_VIEW_NAMES = ("get_card", "search_cards", "list_listings", "list_order_messages", "get_home_feed")
+
+
+@csrf_exempt
+@require_http_methods(["GET"])
+@query_budget(1)
+async def get_card(request, card_id):
+    card = (await acards_by_id([card_id])).get(card_id)
+    if card is None:
+        return JsonResponse({"error": "Card not found."}, status=404)
+
+    return JsonResponse(card)
+
+
+@csrf_exempt
+@require_http_methods(["GET"])
+@query_budget(1)
+async def search_cards(request):
+    query = request.GET.get("q", "").strip()
+    if not query:
+        return JsonResponse({"error": "Query parameter 'q' is required."}, status=400)
+
+    return JsonResponse([card async for card in card_search(query)], safe=False)
+
+
+@csrf_exempt
+@require_http_methods(["GET"])
+@query_budget(1)
+async def list_listings(request):
+    listings, error = catalog_listings(request)
+    if error:
+        return error
+    return StreamingJsonResponse(
+        listings, encode_catalog_listing, ndjson=wants_ndjson(request), asynchronous=True,
+    )
+
+
+@csrf_exempt
+@require_http_methods(["GET"])
+@query_budget(2)
+async def list_order_messages(request, order_id):
+    return JsonResponse(await aorder_messages(order_id), safe=False)
+
+
+@csrf_exempt
+@require_http_methods(["GET"])
+@query_budget(3)
+async def get_home_feed(request):
+    available_ids, new_arrivals = await afan_out(
+        lambda: list(feed_available().values_list("listing_id", flat=True)),
+        lambda: list(latest_feed_listings()),
+    )
+    sampled_ids = sample_feed_ids(available_ids)
+    recommendations = [row async for row in feed_listings(sampled_ids)] if sampled_ids else []
+    return JsonResponse(home_feed(recommendations, new_arrivals))
@@ -0,0 +1,816 @@
+"""Benchmark and load-test toolkit for the store endpoints.
+
+Benchmarks never touch the configured database: each run builds a throwaway
+copy with the test-database machinery and destroys it afterwards.
+
+* ``seed_dataset`` fills it with synthetic cards, listings, users, orders
+  and messages at a configurable scale.
+* ``SCENARIOS`` holds one repeatable request per endpoint; ``run_micro``
+  measures latency, query count and allocations for each of them.
+* ``run_load`` drives weighted ``MIXES`` of scenarios from several threads.
+* ``run_servers`` compares the hot read endpoints served sync under WSGI
+  with their async versions under ASGI, at high concurrency.
+* ``check_thresholds`` compares a result set with the committed limits in
+  ``benchmark_thresholds.json``.
+
+Entry point: ``python manage.py benchmark``.
+"""
+
+import asyncio
+import io
+import json
+import random
+import statistics
+import tempfile
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from decimal import Decimal
+from pathlib import Path
+from types import ModuleType
+from urllib.parse import urlencode
+
+from django.contrib.auth import get_user_model
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.db import connections
+from django.test import Client, override_settings
+from django.urls import include, path
+
+from pokemartbackend.querybudget import QueryCounter
+
+from . import async_views, urls, views
+from .catalog import rebuild_catalog
+from .models import Card, Cart, Listings, Message, Order_details, Orders
+from .orders import orders_placed
+
+THRESHOLDS_PATH = Path(__file__).with_name("benchmark_thresholds.json")
+
+
+@contextmanager
+def temporary_database(alias="default"):
+    """Create a migrated scratch database for ``alias`` and drop it on exit.
+
+    SQLite runs on a real file (not ``:memory:``) so journal and locking
+    behaviour match production and worker threads share the same data.
+    """
+    connection = connections[alias]
+    test_settings = connection.settings_dict["TEST"]
+    saved_name, saved_test_name = connection.settings_dict["NAME"], test_settings.get("NAME")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        try:
+            if connection.vendor == "sqlite":
+                test_settings["NAME"] = str(Path(tmpdir) / "bench.sqlite3")
+            connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+            try:
+                yield connection
+            finally:
+                connections.close_all()
+                connection.creation.destroy_test_db(saved_name, verbosity=0)
+        finally:
+            test_settings["NAME"] = saved_test_name
+
+
+def seed_marketplace(listings=1, cards=None, sellers=1, prefix="bench"):
+    """Insert ``sellers`` users, ``cards`` cards and ``listings`` listings in bulk."""
+    User = get_user_model()
+    cards = cards or listings
+    User.objects.bulk_create([
+        User(username=f"{prefix}_seller_{i}", email=f"{prefix}_seller_{i}@example.com", role="seller")
+        for i in range(sellers)
+    ])
+    Card.objects.bulk_create([
+        Card(
+            name=f"Card {i}",
+            collection=f"Set {i % 20}",
+            rarity=("Common", "Uncommon", "Rare", "Rare Holo")[i % 4],
+            image_url=f"https://images.example.com/{i}.png",
+            recommended_price=Decimal("1.00") + i % 100,
+        )
+        for i in range(cards)
+    ])
+    # Re-read rather than trusting bulk_create to set pks on every backend.
+    users = list(User.objects.filter(username__startswith=f"{prefix}_seller_"))
+    card_objs = list(Card.objects.order_by("-id")[:cards])
+    Listings.objects.bulk_create([
+        Listings(
+            seller=users[i % len(users)],
+            card_id=card_objs[i % len(card_objs)],
+            price=Decimal("2.50") + i % 50,
+            quantity=10_000,
+            condition=("Near Mint", "Lightly Played", "Played")[i % 3],
+            status="Available",
+            description="",
+        )
+        for i in range(listings)
+    ])
+    rebuild_catalog()
+    return users, card_objs
+
+
+def summarize(latencies, elapsed):
+    """Throughput and latency percentiles (ms) for a list of per-op seconds."""
+    if not latencies:
+        return {"ops": 0, "ops_per_sec": 0.0, "p50_ms": 0.0, "p95_ms": 0.0, "max_ms": 0.0}
+    ordered = sorted(latencies)
+    return {
+        "ops": len(ordered),
+        "ops_per_sec": round(len(ordered) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(statistics.median(ordered) * 1000, 2),
+        "p95_ms": round(ordered[int(len(ordered) * 0.95) - 1] * 1000, 2),
+        "max_ms": round(ordered[-1] * 1000, 2),
+    }
+
+
+class Timer:
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.start
+
+
+# ─── Synthetic data ───────────────────────────────────────────────────────────
+
+SCALES = {
+    "tiny": {"cards": 30, "listings": 60, "users": 10, "orders": 20, "messages": 60},
+    "small": {"cards": 200, "listings": 500, "users": 50, "orders": 200, "messages": 1_000},
+    "medium": {"cards": 2_000, "listings": 5_000, "users": 500, "orders": 2_000, "messages": 10_000},
+    "large": {"cards": 20_000, "listings": 50_000, "users": 5_000, "orders": 20_000, "messages": 100_000},
+}
+
+CONDITIONS = [value for value, _ in Listings.CONDITION]
+RARITIES = ("Common", "Uncommon", "Rare", "Rare Holo", "Double Rare", "Illustration Rare")
+ORDER_STATUSES = ("Pendiente", "En proceso", "Completado", "Cancelado")
+
+
+def seed_dataset(cards, listings, users, orders, messages, seed=42, batch_size=1000):
+    """Bulk-insert a marketplace of the given size and return its key ids.
+
+    Half of the users are sellers. Each order holds one to three listings
+    from a single seller, matching how create_order splits carts.
+    """
+    rng = random.Random(seed)
+    User = get_user_model()
+    User.objects.bulk_create([
+        User(
+            username=f"user_{i}",
+            email=f"user_{i}@example.com",
+            role="seller" if i % 2 == 0 else "customer",
+        )
+        for i in range(users)
+    ], batch_size=batch_size)
+    user_ids = list(User.objects.filter(username__startswith="user_").values_list("id", flat=True))
+    seller_ids, buyer_ids = user_ids[0::2], user_ids[1::2] or user_ids
+
+    Card.objects.bulk_create([
+        Card(
+            name=f"Card {i}",
+            collection=f"Set {i % 40}",
+            rarity=RARITIES[i % len(RARITIES)],
+            image_url=f"https://images.example.com/cards/{i}.png",
+            recommended_price=Decimal(rng.randint(50, 50_000)) / 100,
+        )
+        for i in range(cards)
+    ], batch_size=batch_size)
+    card_ids = list(Card.objects.values_list("id", flat=True))
+
+    Listings.objects.bulk_create([
+        Listings(
+            seller_id=rng.choice(seller_ids),
+            card_id_id=rng.choice(card_ids),
+            price=Decimal(rng.randint(50, 50_000)) / 100,
+            quantity=rng.randint(1, 20),
+            condition=rng.choice(CONDITIONS),
+            status="Available" if rng.random() < 0.9 else "Inactive",
+            description="Synthetic listing",
+        )
+        for _ in range(listings)
+    ], batch_size=batch_size)
+    rebuild_catalog(batch_size=batch_size)
+    listings_by_seller = {}
+    for listing_id, seller_id, price in Listings.objects.values_list("id", "seller_id", "price"):
+        listings_by_seller.setdefault(seller_id, []).append((listing_id, price))
+    sellers_with_stock = list(listings_by_seller)
+
+    Orders.objects.bulk_create([
+        Orders(buyer_id_id=rng.choice(buyer_ids), total_price=Decimal("0"), status=rng.choice(ORDER_STATUSES))
+        for _ in range(orders)
+    ], batch_size=batch_size)
+    order_ids = list(Orders.objects.values_list("id", flat=True))
+
+    details, totals = [], {}
+    for order_id in order_ids:
+        stock = listings_by_seller[rng.choice(sellers_with_stock)]
+        for listing_id, price in rng.sample(stock, min(len(stock), rng.randint(1, 3))):
+            quantity = rng.randint(1, 3)
+            details.append(Order_details(order_id_id=order_id, listing_id_id=listing_id, quantity=quantity, unit_price=price))
+            totals[order_id] = totals.get(order_id, 0) + price * quantity
+    Order_details.objects.bulk_create(details, batch_size=batch_size)
+    Orders.objects.bulk_update(
+        [Orders(id=order_id, total_price=total) for order_id, total in totals.items()],
+        ["total_price"],
+        batch_size=batch_size,
+    )
+
+    buyers_by_order = dict(Orders.objects.values_list("id", "buyer_id"))
+    Message.objects.bulk_create([
+        Message(order_id=order_id, sender_id=buyers_by_order[order_id], content=f"Mensaje {i}")
+        for i, order_id in enumerate(rng.choices(order_ids, k=messages) if order_ids else [])
+    ], batch_size=batch_size)
+
+    return {
+        "seller_ids": seller_ids,
+        "buyer_ids": buyer_ids,
+        "card_ids": card_ids,
+        "order_ids": order_ids,
+    }
+
+
+# ─── Scenarios ────────────────────────────────────────────────────────────────
+
+class BenchContext:
+    """Per-thread state shared by scenarios: logged-in clients and handy ids."""
+
+    def __init__(self, dataset, buyer_id=None, seed=0):
+        User = get_user_model()
+        self.rng = random.Random(seed)
+        self.dataset = dataset
+        self.buyer = User.objects.get(id=buyer_id or dataset["buyer_ids"][0])
+        self.seller = User.objects.get(id=dataset["seller_ids"][0])
+        self.anonymous = Client()
+        self.buyer_client = Client()
+        self.buyer_client.force_login(self.buyer)
+        self.seller_client = Client()
+        self.seller_client.force_login(self.seller)
+        self.listing_ids = list(
+            Listings.objects.filter(status="Available").exclude(seller=self.buyer).values_list("id", flat=True)[:200]
+        )
+        self.seller_listing_id = Listings.objects.filter(seller=self.seller).values_list("id", flat=True).first()
+        self.pending = []
+
+    def listing(self):
+        return self.rng.choice(self.listing_ids)
+
+    def card(self):
+        return self.rng.choice(self.dataset["card_ids"])
+
+    def new_order(self):
+        """Create a pending order from buyer to seller outside the timed section."""
+        order = Orders.objects.create(buyer_id=self.buyer, total_price=Decimal("10.00"), status="Pendiente")
+        detail = Order_details.objects.create(
+            order_id=order, listing_id=Listings.objects.get(id=self.seller_listing_id),
+            quantity=1, unit_price=Decimal("10.00"),
+        )
+        # Log it like checkout does, so inbox rows and reservations exist.
+        orders_placed([(order, [detail])], self.buyer)
+        return order
+
+
+SCENARIOS = {}
+
+
+def scenario(name, setup=None):
+    def register(func):
+        SCENARIOS[name] = (setup, func)
+        return func
+    return register
+
+
+def _json(client, method, url, payload=None):
+    body = json.dumps(payload or {})
+    return getattr(client, method)(url, body, content_type="application/json")
+
+
+@scenario("list_limited_cards")
+def list_limited_cards(ctx, arg):
+    return ctx.anonymous.get("/store/cards/")
+
+
+@scenario("get_card")
+def get_card(ctx, arg):
+    return ctx.anonymous.get(f"/store/cards/{ctx.card()}/")
+
+
+@scenario("get_cards_batch")
+def get_cards_batch(ctx, arg):
+    ids = ctx.rng.sample(ctx.dataset["card_ids"], min(50, len(ctx.dataset["card_ids"])))
+    return ctx.anonymous.get("/store/cards/batch/", {"ids": ",".join(map(str, ids))})
+
+
+@scenario("search_cards")
+def search_cards(ctx, arg):
+    return ctx.anonymous.get("/store/cards/search/", {"q": f"Card {ctx.rng.randint(1, 9)}"})
+
+
+@scenario("list_listings")
+def list_listings(ctx, arg):
+    return ctx.anonymous.get("/store/listings/")
+
+
+@scenario("get_listing")
+def get_listing(ctx, arg):
+    return ctx.anonymous.get(f"/store/listings/{ctx.listing()}/")
+
+
+@scenario("get_listings_batch")
+def get_listings_batch(ctx, arg):
+    ids = ctx.rng.sample(ctx.listing_ids, min(50, len(ctx.listing_ids)))
+    return ctx.anonymous.get("/store/listings/batch/", {"ids": ",".join(map(str, ids))})
+
+
+@scenario("listing_facets")
+def listing_facets(ctx, arg):
+    return ctx.anonymous.get("/store/listings/facets/", {"max_price": ctx.rng.randint(1, 500)})
+
+
+@scenario("list_user_listings")
+def list_user_listings(ctx, arg):
+    return ctx.anonymous.get(f"/store/users/{ctx.seller.username}/listings/")
+
+
+@scenario("create_listing")
+def create_listing(ctx, arg):
+    return _json(ctx.seller_client, "post", "/store/listings/create/", {
+        "card_id": ctx.card(), "price": "9.99", "quantity": 1, "condition": "Near Mint",
+    })
+
+
+@scenario("update_listing")
+def update_listing(ctx, arg):
+    return _json(ctx.seller_client, "put", f"/store/listings/{ctx.seller_listing_id}/update/", {"price": "12.50"})
+
+
+@scenario("bulk_update_listings")
+def bulk_update_listings(ctx, arg):
+    return _json(ctx.seller_client, "post", "/store/listings/bulk/update/", {
+        "filter": {"condition": "Near Mint"}, "price": {"recommended_factor": "1.10"},
+    })
+
+
+def _setup_disposable_listing(ctx):
+    return Listings.objects.create(
+        seller=ctx.seller, card_id_id=ctx.card(), price=Decimal("1.00"), quantity=1,
+        condition="Played", status="Available",
+    ).id
+
+
+@scenario("delete_listing", setup=_setup_disposable_listing)
+def delete_listing(ctx, listing_id):
+    return ctx.seller_client.delete(f"/store/listings/{listing_id}/delete/")
+
+
+@scenario("list_cart_items")
+def list_cart_items(ctx, arg):
+    return ctx.buyer_client.get("/store/cart/")
+
+
+@scenario("add_cart_item")
+def add_cart_item(ctx, arg):
+    return _json(ctx.buyer_client, "post", "/store/cart/add/", {"listing_id": ctx.listing(), "quantity": 1})
+
+
+def _setup_cart_item(ctx):
+    return Cart.objects.create(user_id=ctx.buyer, listing_id_id=ctx.listing(), quantity=1).id
+
+
+@scenario("update_cart_item", setup=_setup_cart_item)
+def update_cart_item(ctx, cart_item_id):
+    return _json(ctx.buyer_client, "put", f"/store/cart/{cart_item_id}/update/", {"quantity": 2})
+
+
+@scenario("delete_cart_item", setup=_setup_cart_item)
+def delete_cart_item(ctx, cart_item_id):
+    return ctx.buyer_client.delete(f"/store/cart/{cart_item_id}/delete/")
+
+
+def _setup_full_cart(ctx):
+    Cart.objects.bulk_create([
+        Cart(user_id=ctx.buyer, listing_id_id=listing_id, quantity=1)
+        for listing_id in ctx.rng.sample(ctx.listing_ids, min(3, len(ctx.listing_ids)))
+    ])
+
+
+@scenario("create_order", setup=_setup_full_cart)
+def create_order(ctx, arg):
+    return ctx.buyer_client.post("/store/orders/create/")
+
+
+@scenario("list_orders")
+def list_orders(ctx, arg):
+    return ctx.buyer_client.get("/store/orders/")
+
+
+@scenario("list_sales")
+def list_sales(ctx, arg):
+    return ctx.seller_client.get("/store/sales/")
+
+
+@scenario("export_sales")
+def export_sales(ctx, arg):
+    return ctx.seller_client.get("/store/sales/export/")
+
+
+@scenario("get_order", setup=lambda ctx: ctx.new_order().id)
+def get_order(ctx, order_id):
+    return ctx.buyer_client.get(f"/store/orders/{order_id}/")
+
+
+@scenario("update_order_status", setup=lambda ctx: ctx.new_order().id)
+def update_order_status(ctx, order_id):
+    return _json(ctx.seller_client, "put", f"/store/orders/{order_id}/status/", {"status": "En proceso"})
+
+
+@scenario("list_order_messages", setup=lambda ctx: ctx.rng.choice(ctx.dataset["order_ids"]))
+def list_order_messages(ctx, order_id):
+    return ctx.buyer_client.get(f"/store/orders/{order_id}/messages/")
+
+
+@scenario("add_order_message", setup=lambda ctx: ctx.new_order().id)
+def add_order_message(ctx, order_id):
+    return _json(ctx.buyer_client, "post", f"/store/orders/{order_id}/messages/add/", {"content": "¿Aceptas 10?"})
+
+
+@scenario("mark_order_messages_read", setup=lambda ctx: ctx.new_order().id)
+def mark_order_messages_read(ctx, order_id):
+    return ctx.buyer_client.post(f"/store/orders/{order_id}/messages/read/")
+
+
+@scenario("get_inbox")
+def get_inbox(ctx, arg):
+    return ctx.buyer_client.get("/store/inbox/")
+
+
+@scenario("add_item_to_order", setup=lambda ctx: ctx.new_order().id)
+def add_item_to_order(ctx, order_id):
+    return _json(ctx.buyer_client, "post", f"/store/orders/{order_id}/add-item/", {
+        "listing_id": ctx.seller_listing_id, "quantity": 1,
+    })
+
+
+def _setup_two_item_order(ctx):
+    order = ctx.new_order()
+    detail = Order_details.objects.create(
+        order_id=order, listing_id_id=ctx.seller_listing_id, quantity=1, unit_price=Decimal("10.00"),
+    )
+    return order.id, detail.id
+
+
+@scenario("remove_item_from_order", setup=_setup_two_item_order)
+def remove_item_from_order(ctx, ids):
+    order_id, detail_id = ids
+    return _json(ctx.buyer_client, "post", f"/store/orders/{order_id}/remove-item/", {"detail_id": detail_id})
+
+
+@scenario("create_review", setup=lambda ctx: ctx.new_order().id)
+def create_review(ctx, order_id):
+    return _json(ctx.buyer_client, "post", "/store/reviews/create/", {"order_id": order_id, "rating": 5})
+
+
+@scenario("list_user_reviews")
+def list_user_reviews(ctx, arg):
+    return ctx.anonymous.get(f"/store/users/{ctx.seller.username}/reviews/")
+
+
+@scenario("get_home_feed")
+def get_home_feed(ctx, arg):
+    return ctx.anonymous.get("/store/home-feed/")
+
+
+@scenario("seller_stats")
+def seller_stats(ctx, arg):
+    return ctx.seller_client.get("/store/seller-stats/")
+
+
+@scenario("get_dashboard")
+def get_dashboard(ctx, arg):
+    return ctx.seller_client.get("/store/dashboard/")
+
+
+def _consume(response):
+    if response.streaming:
+        # Iterating the response also drains async bodies (ASYNC_VIEWS).
+        return b"".join(response)
+    return response.content
+
+
+# ─── Runners ──────────────────────────────────────────────────────────────────
+
+def run_micro(ctx, iterations=20, names=None):
+    """Time each scenario ``iterations`` times; returns {name: stats}."""
+    results = {}
+    for name in names or SCENARIOS:
+        setup, request = SCENARIOS[name]
+        latencies, queries, statuses = [], [], set()
+        for i in range(iterations + 1):
+            arg = setup(ctx) if setup else None
+            # QueryCounter also sees the queries fan_out runs on worker threads.
+            with QueryCounter() as captured:
+                start = time.perf_counter()
+                response = request(ctx, arg)
+                _consume(response)
+                elapsed = time.perf_counter() - start
+            statuses.add(response.status_code)
+            if i:  # the first call warms caches and is discarded
+                latencies.append(elapsed)
+                queries.append(captured.count)
+
+        arg = setup(ctx) if setup else None
+        tracemalloc.start()
+        _consume(request(ctx, arg))
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        stats = summarize(latencies, sum(latencies))
+        stats.update({
+            "queries": max(queries),
+            "alloc_peak_kib": round(peak / 1024, 1),
+            "statuses": sorted(statuses),
+        })
+        results[name] = stats
+    return results
+
+
+MIXES = {
+    "browse": {
+        "list_listings": 25, "get_listing": 25, "get_home_feed": 20, "list_limited_cards": 15,
+        "get_card": 10, "search_cards": 5,
+    },
+    "shopping": {
+        "get_listing": 20, "search_cards": 20, "add_cart_item": 20, "list_cart_items": 15,
+        "create_order": 5, "list_orders": 10, "get_home_feed": 10,
+    },
+    "marketplace": {
+        "list_listings": 15, "get_listing": 15, "search_cards": 15, "add_cart_item": 10,
+        "list_cart_items": 10, "create_order": 5, "list_orders": 5, "list_order_messages": 10,
+        "add_order_message": 5, "list_sales": 5, "seller_stats": 5,
+    },
+}
+
+
+def run_load(dataset, mix="marketplace", threads=4, requests_per_thread=50, seed=0):
+    """Drive a weighted request mix from ``threads`` concurrent clients.
+
+    Every thread logs in as its own buyer so carts and checkouts do not
+    contend on the same rows. Returns aggregate and per-scenario stats.
+    """
+    weights = MIXES[mix]
+    names, cumulative = list(weights), list(weights.values())
+    samples, errors = {}, []
+    lock = threading.Lock()
+    contexts = [
+        BenchContext(dataset, buyer_id=dataset["buyer_ids"][n % len(dataset["buyer_ids"])], seed=seed + n)
+        for n in range(threads)
+    ]
+    barrier = threading.Barrier(threads)
+
+    def worker(ctx):
+        local = {}
+        barrier.wait()
+        try:
+            for _ in range(requests_per_thread):
+                name = ctx.rng.choices(names, weights=cumulative)[0]
+                setup, request = SCENARIOS[name]
+                arg = setup(ctx) if setup else None
+                start = time.perf_counter()
+                try:
+                    response = request(ctx, arg)
+                    _consume(response)
+                except Exception as exc:  # keep the run going, report at the end
+                    with lock:
+                        errors.append(f"{name}: {exc}")
+                    continue
+                local.setdefault(name, []).append(time.perf_counter() - start)
+                if response.status_code >= 500:
+                    with lock:
+                        errors.append(f"{name}: HTTP {response.status_code}")
+        finally:
+            connections.close_all()
+        with lock:
+            for name, values in local.items():
+                samples.setdefault(name, []).extend(values)
+
+    workers = [threading.Thread(target=worker, args=(ctx,)) for ctx in contexts]
+    with Timer() as timer:
+        for t in workers:
+            t.start()
+        for t in workers:
+            t.join()
+
+    everything = [value for values in samples.values() for value in values]
+    result = summarize(everything, timer.elapsed)
+    result.update({
+        "mix": mix,
+        "threads": threads,
+        "errors": len(errors),
+        "error_samples": errors[:10],
+        "scenarios": {name: summarize(values, timer.elapsed) for name, values in sorted(samples.items())},
+    })
+    return result
+
+
+# ─── WSGI vs ASGI ─────────────────────────────────────────────────────────────
+
+def hot_urlconf(module):
+    """A URLconf serving only the hot read endpoints, taken from ``module``."""
+    patterns = [
+        path(str(pattern.pattern), getattr(module, pattern.name), name=pattern.name)
+        for pattern in urls.urlpatterns
+        if pattern.name in async_views.ASYNC_VIEW_NAMES
+    ]
+    urlconf = ModuleType(f"{module.__name__}_hot_urls")
+    urlconf.urlpatterns = [path("store/", include(patterns))]
+    return urlconf
+
+
+def hot_paths(dataset, count, seed=0):
+    """``count`` request paths spread evenly over the hot read endpoints."""
+    rng = random.Random(seed)
+    builders = [
+        lambda: f"/store/cards/{rng.choice(dataset['card_ids'])}/",
+        lambda: "/store/cards/search/?" + urlencode({"q": f"Card {rng.randint(1, 9)}"}),
+        lambda: "/store/listings/?" + urlencode({"rarity": rng.choice(RARITIES)}),
+        lambda: f"/store/orders/{rng.choice(dataset['order_ids'])}/messages/",
+        lambda: "/store/home-feed/",
+    ]
+    return [builders[i % len(builders)]() for i in range(count)]
+
+
+def _wsgi_get(app, url):
+    path_info, _, query = url.partition("?")
+    environ = {
+        "REQUEST_METHOD": "GET",
+        "PATH_INFO": path_info,
+        "QUERY_STRING": query,
+        "SERVER_NAME": "testserver",
+        "SERVER_PORT": "80",
+        "SERVER_PROTOCOL": "HTTP/1.1",
+        "wsgi.input": io.BytesIO(),
+        "wsgi.url_scheme": "http",
+    }
+    status = []
+    body = app(environ, lambda line, headers, exc_info=None: status.append(int(line.split()[0])))
+    try:
+        b"".join(body)
+    finally:
+        body.close()
+    return status[0]
+
+
+async def _asgi_get(app, url):
+    path_info, _, query = url.partition("?")
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path_info,
+        "raw_path": path_info.encode(),
+        "query_string": query.encode(),
+        "root_path": "",
+        "headers": [(b"host", b"testserver")],
+        "server": ("testserver", 80),
+        "client": ("127.0.0.1", 0),
+    }
+    received = False
+
+    async def receive():
+        nonlocal received
+        if not received:
+            received = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        # The client never disconnects; Django cancels this wait once the
+        # response has been sent.
+        await asyncio.Event().wait()
+
+    status = []
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            status.append(message["status"])
+
+    await app(scope, receive, send)
+    return status[0]
+
+
+def _drive_wsgi(app, paths, concurrency):
+    """Serve ``paths`` from ``concurrency`` threads, like a threaded WSGI server."""
+    pending = iter(paths)
+    lock = threading.Lock()
+    latencies, errors = [], []
+
+    def worker():
+        try:
+            while True:
+                with lock:
+                    url = next(pending, None)
+                if url is None:
+                    return
+                start = time.perf_counter()
+                try:
+                    status = _wsgi_get(app, url)
+                except Exception as exc:  # keep the run going, report at the end
+                    status = f"{exc}"
+                elapsed = time.perf_counter() - start
+                with lock:
+                    latencies.append(elapsed)
+                    if not isinstance(status, int) or status >= 500:
+                        errors.append(f"{url}: {status}")
+        finally:
+            connections.close_all()
+
+    workers = [threading.Thread(target=worker) for _ in range(concurrency)]
+    with Timer() as timer:
+        for t in workers:
+            t.start()
+        for t in workers:
+            t.join()
+    return latencies, errors, timer.elapsed
+
+
+async def _drive_asgi(app, paths, concurrency):
+    """Serve ``paths`` from ``concurrency`` tasks on one event loop."""
+    pending = iter(paths)
+    latencies, errors = [], []
+
+    async def worker():
+        for url in pending:
+            start = time.perf_counter()
+            try:
+                status = await _asgi_get(app, url)
+            except Exception as exc:  # keep the run going, report at the end
+                status = f"{exc}"
+            latencies.append(time.perf_counter() - start)
+            if not isinstance(status, int) or status >= 500:
+                errors.append(f"{url}: {status}")
+
+    with Timer() as timer:
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, errors, timer.elapsed
+
+
+def run_servers(dataset, concurrency=64, requests=1000, seed=0):
+    """Throughput of the hot reads: sync views under WSGI vs async views under ASGI.
+
+    ``asgi_sync`` serves the sync views under ASGI as a reference point.
+    Both sides serve the same paths after an untimed warm-up pass, so the
+    card cache is equally warm. Persistent connections are off for the run:
+    ASGI serves each request from a fresh thread that could not reuse them.
+    """
+    paths = hot_paths(dataset, requests, seed)
+    warm_up = list(dict.fromkeys(paths))
+    settings_dict = connections["default"].settings_dict
+    conn_max_age = settings_dict["CONN_MAX_AGE"]
+    settings_dict["CONN_MAX_AGE"] = 0
+    results = {"concurrency": concurrency, "requests": requests}
+    try:
+        with override_settings(ROOT_URLCONF=hot_urlconf(views)):
+            app = WSGIHandler()
+            _drive_wsgi(app, warm_up, concurrency)
+            results["wsgi"] = _server_stats(*_drive_wsgi(app, paths, concurrency))
+        # Sync views under ASGI too: what an ASGI deployment pays without them.
+        for server, module in (("asgi_sync", views), ("asgi", async_views)):
+            with override_settings(ROOT_URLCONF=hot_urlconf(module)):
+                app = ASGIHandler()
+                asyncio.run(_drive_asgi(app, warm_up, concurrency))
+                results[server] = _server_stats(*asyncio.run(_drive_asgi(app, paths, concurrency)))
+    finally:
+        settings_dict["CONN_MAX_AGE"] = conn_max_age
+        connections.close_all()
+    wsgi, asgi = results["wsgi"]["ops_per_sec"], results["asgi"]["ops_per_sec"]
+    results["asgi_speedup"] = round(asgi / wsgi, 2) if wsgi else None
+    return results
+
+
+def _server_stats(latencies, errors, elapsed):
+    stats = summarize(latencies, elapsed)
+    stats.update({"errors": len(errors), "error_samples": errors[:10]})
+    return stats
+
+
+def check_thresholds(results, thresholds):
+    """Return human-readable violations of ``thresholds`` by ``results``."""
+    failures = []
+    for name, limits in thresholds.get("micro", {}).items():
+        stats = results.get("micro", {}).get(name)
+        if stats is None:
+            continue
+        if "max_queries" in limits and stats["queries"] > limits["max_queries"]:
+            failures.append(f"{name}: {stats['queries']} queries > {limits['max_queries']}")
+        if "max_p95_ms" in limits and stats["p95_ms"] > limits["max_p95_ms"]:
+            failures.append(f"{name}: p95 {stats['p95_ms']}ms > {limits['max_p95_ms']}ms")
+    load_limits = thresholds.get("load", {})
+    load = results.get("load")
+    if load:
+        if load["errors"] > load_limits.get("max_errors", 0):
+            failures.append(f"load: {load['errors']} errors")
+        if "min_ops_per_sec" in load_limits and load["ops_per_sec"] < load_limits["min_ops_per_sec"]:
+            failures.append(f"load: {load['ops_per_sec']} req/s < {load_limits['min_ops_per_sec']}")
+    for server in ("wsgi", "asgi_sync", "asgi"):
+        stats = results.get("servers", {}).get(server)
+        if stats and stats["errors"] > load_limits.get("max_errors", 0):
+            failures.append(f"{server}: {stats['errors']} errors")
+    return failures
@@ -0,0 +1,385 @@
+"""Keeps ListingCatalogEntry in sync with Listings, Card and User.
+
+Single-object saves are handled by the signal receivers below. Code that
+changes listings in bulk (``queryset.update()``, ``bulk_create()``) skips
+signals and must call ``refresh_catalog(ids)`` afterwards, or run
+``python manage.py rebuild_catalog`` once it is done.
+
+Every change also bumps the catalog version, which retires cached facet
+counts at once, and drops the per-id payloads cached for batch lookups.
+"""
+
+import hashlib
+import time
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Count, Q
+
+from .models import Card, ListingCatalogEntry, Listings
+from .serializers import CARD_FIELDS, CATALOG_FIELDS, encode_catalog_listing
+
+
+# Query params accepted by catalog endpoints, mapped to catalog columns.
+CATALOG_FILTERS = (
+    ("rarity", "card_rarity"),
+    ("collection", "card_collection"),
+    ("condition", "condition"),
+    ("seller", "seller_username"),
+    ("card_id", "card_id"),
+)
+# Filters compared with an integer column; SQLite overflows past 64 bits.
+ID_FILTERS = ("card_id",)
+MAX_ID = 2**63 - 1
+PRICE_FILTERS = (("min_price", "price__gte"), ("max_price", "price__lte"))
+CATALOG_SORTS = {
+    "newest": "-created_at",
+    "oldest": "created_at",
+    "price": "price",
+    "-price": "-price",
+}
+
+# Facet name -> catalog column counted with GROUP BY.
+FACETS = {"rarity": "card_rarity", "collection": "card_collection", "condition": "condition"}
+PRICE_BUCKETS = ((0, 10), (10, 50), (50, 100), (100, 500), (500, None))
+
+VERSION_KEY = "catalog:version"
+CARD_KEY = "catalog:card:{}"
+LISTING_KEY = "catalog:listing:{}"
+
+# Catalog column -> lookup on Listings that feeds it.
+SOURCE_FIELDS = {
+    "listing_id": "id",
+    "seller_id": "seller_id",
+    "seller_username": "seller__username",
+    "card_id": "card_id_id",
+    "card_name": "card_id__name",
+    "card_collection": "card_id__collection",
+    "card_rarity": "card_id__rarity",
+    "card_image_url": "card_id__image_url",
+    "card_recommended_price": "card_id__recommended_price",
+    "card_image_width": "card_id__image_width",
+    "card_image_height": "card_id__image_height",
+    "card_image_blurhash": "card_id__image_blurhash",
+    "price": "price",
+    "quantity": "quantity",
+    "condition": "condition",
+    "status": "status",
+    "description": "description",
+    "created_at": "created_at",
+}
+UPDATE_FIELDS = [column for column in SOURCE_FIELDS if column != "listing_id"]
+CARD_COLUMNS = {
+    "card_name": "name",
+    "card_collection": "collection",
+    "card_rarity": "rarity",
+    "card_image_url": "image_url",
+    "card_recommended_price": "recommended_price",
+    "card_image_width": "image_width",
+    "card_image_height": "image_height",
+    "card_image_blurhash": "image_blurhash",
+}
+
+
+def catalog_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # A fresh value, never a reset, so facets cached before an eviction
+        # of this key cannot come back.
+        cache.add(VERSION_KEY, time.time_ns(), None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def bump_catalog_version():
+    cache.set(VERSION_KEY, time.time_ns(), None)
+
+
+def parse_id(value, name="id"):
+    """``value`` as a primary key in 1..MAX_ID, or ValueError."""
+    try:
+        pk = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be an integer.")
+    if not 1 <= pk <= MAX_ID:
+        raise ValueError(f"{name} must be between 1 and {MAX_ID}.")
+    return pk
+
+
+def filter_catalog(params, exclude=()):
+    """Visible catalog entries matching the request ``params``.
+
+    Raises ValueError when an id is out of range or a price bound is not a
+    number, before any query runs.
+    """
+    entries = ListingCatalogEntry.objects.filter(status="Available")
+    for param, lookup in CATALOG_FILTERS:
+        if param not in exclude and params.get(param):
+            value = params[param]
+            if param in ID_FILTERS:
+                value = parse_id(value, param)
+            entries = entries.filter(**{lookup: value})
+    for param, lookup in PRICE_FILTERS:
+        if params.get(param):
+            try:
+                bound = Decimal(params[param])
+            except InvalidOperation:
+                raise ValueError("min_price and max_price must be numbers.")
+            if not bound.is_finite():
+                raise ValueError("min_price and max_price must be numbers.")
+            entries = entries.filter(**{lookup: bound})
+    return entries
+
+
+def _bucket_label(low, high):
+    return f"{low}-{high}" if high is not None else f"{low}+"
+
+
+def _count_facets(params):
+    facets = {}
+    # Each facet ignores its own filter so the UI can show the alternatives.
+    for name, column in FACETS.items():
+        rows = (
+            filter_catalog(params, exclude=(name,))
+            .values(column)
+            .annotate(count=Count("pk"))
+            .order_by("-count", column)
+        )
+        facets[name] = [{"value": row[column], "count": row["count"]} for row in rows]
+
+    buckets = {
+        _bucket_label(low, high): Count(
+            "pk", filter=Q(price__gte=low, **({"price__lt": high} if high is not None else {}))
+        )
+        for low, high in PRICE_BUCKETS
+    }
+    counts = filter_catalog(params).aggregate(total=Count("pk"), **buckets)
+    facets["price"] = [
+        {"range": _bucket_label(low, high), "min": low, "max": high, "count": counts[_bucket_label(low, high)]}
+        for low, high in PRICE_BUCKETS
+    ]
+    return {"total": counts["total"], **facets}
+
+
+def catalog_facets(params):
+    """Facet counts for ``params``, cached until the catalog next changes."""
+    accepted = [param for param, _ in CATALOG_FILTERS + PRICE_FILTERS]
+    signature = "&".join(f"{param}={params.get(param, '')}" for param in accepted)
+    digest = hashlib.md5(signature.encode("utf-8")).hexdigest()
+    key = f"catalog:facets:{catalog_version()}:{digest}"
+    facets = cache.get(key)
+    if facets is None:
+        facets = _count_facets(params)
+        cache.set(key, facets, settings.CATALOG_FACETS_CACHE_SECONDS)
+    return facets
+
+
+def _cached_bulk(key_format, ids, load):
+    """Payloads for ``ids``: cache first, then one ``load(missing_ids)`` for the rest."""
+    if not settings.BATCH_LOOKUP_CACHE_SECONDS:
+        return load(ids)
+    keys = {key_format.format(pk): pk for pk in ids}
+    found = {keys[key]: payload for key, payload in cache.get_many(keys).items()}
+    missing = [pk for pk in ids if pk not in found]
+    if missing:
+        loaded = load(missing)
+        cache.set_many(
+            {key_format.format(pk): payload for pk, payload in loaded.items()},
+            settings.BATCH_LOOKUP_CACHE_SECONDS,
+        )
+        found.update(loaded)
+    return found
+
+
+async def _acached_bulk(key_format, ids, aload):
+    """``_cached_bulk`` for async views, with async cache calls and ``await aload(missing)``."""
+    if not settings.BATCH_LOOKUP_CACHE_SECONDS:
+        return await aload(ids)
+    keys = {key_format.format(pk): pk for pk in ids}
+    found = {keys[key]: payload for key, payload in (await cache.aget_many(keys)).items()}
+    missing = [pk for pk in ids if pk not in found]
+    if missing:
+        loaded = await aload(missing)
+        await cache.aset_many(
+            {key_format.format(pk): payload for pk, payload in loaded.items()},
+            settings.BATCH_LOOKUP_CACHE_SECONDS,
+        )
+        found.update(loaded)
+    return found
+
+
+def _card_payloads(cards):
+    return {pk: {field: getattr(card, field) for field in CARD_FIELDS} for pk, card in cards.items()}
+
+
+def cards_by_id(ids):
+    def load(missing):
+        return _card_payloads(Card.objects.only(*CARD_FIELDS).in_bulk(missing))
+
+    return _cached_bulk(CARD_KEY, ids, load)
+
+
+async def acards_by_id(ids):
+    async def aload(missing):
+        return _card_payloads(await Card.objects.only(*CARD_FIELDS).ain_bulk(missing))
+
+    return await _acached_bulk(CARD_KEY, ids, aload)
+
+
+def listings_by_id(ids):
+    def load(missing):
+        rows = ListingCatalogEntry.objects.filter(listing_id__in=missing).values(*CATALOG_FIELDS)
+        return {row["listing_id"]: encode_catalog_listing(row) for row in rows}
+
+    return _cached_bulk(LISTING_KEY, ids, load)
+
+
+def forget_listings(listing_ids):
+    cache.delete_many([LISTING_KEY.format(pk) for pk in listing_ids])
+
+
+def _upsert(entries, batch_size=None):
+    ListingCatalogEntry.objects.bulk_create(
+        entries,
+        batch_size=batch_size,
+        update_conflicts=True,
+        unique_fields=["listing"],
+        update_fields=UPDATE_FIELDS,
+    )
+
+
+def refresh_catalog(listing_ids, batch_size=500):
+    """Re-copy the given listings into the catalog; drop entries for deleted ones.
+
+    Reads go to the primary so a refresh right after a write never copies
+    stale replica data. Returns the number of entries written.
+    """
+    listing_ids = list(set(listing_ids))
+    written = 0
+    for start in range(0, len(listing_ids), batch_size):
+        chunk = listing_ids[start:start + batch_size]
+        rows = Listings.objects.using(DEFAULT_DB_ALIAS).filter(id__in=chunk).values(*SOURCE_FIELDS.values())
+        entries = [
+            ListingCatalogEntry(**{column: row[source] for column, source in SOURCE_FIELDS.items()})
+            for row in rows
+        ]
+        if entries:
+            _upsert(entries)
+        missing = set(chunk) - {entry.listing_id for entry in entries}
+        if missing:
+            ListingCatalogEntry.objects.filter(listing_id__in=missing).delete()
+        written += len(entries)
+        forget_listings(chunk)
+    if listing_ids:
+        bump_catalog_version()
+    return written
+
+
+def rebuild_catalog(batch_size=1000):
+    """Refresh every listing in primary-key batches; returns entries written."""
+    written = 0
+    last_id = 0
+    while True:
+        ids = list(
+            Listings.objects.using(DEFAULT_DB_ALIAS)
+            .filter(id__gt=last_id)
+            .order_by("id")
+            .values_list("id", flat=True)[:batch_size]
+        )
+        if not ids:
+            break
+        written += refresh_catalog(ids, batch_size=batch_size)
+        last_id = ids[-1]
+    # Entries whose listing vanished through a raw delete.
+    ListingCatalogEntry.objects.exclude(listing_id__in=Listings.objects.values("id")).delete()
+    bump_catalog_version()
+    return written
+
+
+def _entry_for(listing):
+    """Build the entry straight from ``listing`` when its card and seller are already loaded."""
+    cached = listing._state.fields_cache
+    card = cached.get("card_id")
+    seller = cached.get("seller")
+    if card is None or seller is None:
+        return None
+    return ListingCatalogEntry(
+        listing_id=listing.pk,
+        seller_id=seller.pk,
+        seller_username=seller.username,
+        card_id=card.pk,
+        **{column: getattr(card, field) for column, field in CARD_COLUMNS.items()},
+        price=listing.price,
+        quantity=listing.quantity,
+        condition=listing.condition,
+        status=listing.status,
+        description=listing.description,
+        created_at=listing.created_at,
+    )
+
+
+def listing_saved(sender, instance, created=False, raw=False, **kwargs):
+    if raw:
+        return
+    entry = _entry_for(instance)
+    if entry is None:
+        refresh_catalog([instance.pk])
+    else:
+        # A plain save is a single INSERT or UPDATE, without the transaction
+        # bulk_create opens around its upsert.
+        entry.save(force_insert=created)
+        forget_listings([instance.pk])
+        bump_catalog_version()
+
+
+def listing_deleted(sender, instance, **kwargs):
+    # The entry itself goes with the listing through the cascade.
+    forget_listings([instance.pk])
+    bump_catalog_version()
+
+
+def card_saved(sender, instance, created=False, raw=False, **kwargs):
+    # A brand-new card has no listings yet.
+    if created or raw:
+        return
+    cache.delete(CARD_KEY.format(instance.pk))
+    entries = ListingCatalogEntry.objects.filter(card_id=instance.pk)
+    listing_ids = list(entries.values_list("listing_id", flat=True))
+    if listing_ids:
+        entries.update(**{column: getattr(instance, field) for column, field in CARD_COLUMNS.items()})
+        forget_listings(listing_ids)
+        bump_catalog_version()
+
+
+def card_deleted(sender, instance, **kwargs):
+    cache.delete(CARD_KEY.format(instance.pk))
+
+
+def user_loaded(sender, instance, **kwargs):
+    # Read from __dict__ so a deferred username never triggers a query.
+    instance._catalog_username = instance.__dict__.get("username")
+
+
+def user_saved(sender, instance, created=False, raw=False, **kwargs):
+    if created or raw or instance.username == getattr(instance, "_catalog_username", instance.username):
+        return
+    entries = ListingCatalogEntry.objects.filter(seller_id=instance.pk)
+    listing_ids = list(entries.values_list("listing_id", flat=True))
+    if listing_ids:
+        entries.update(seller_username=instance.username)
+        forget_listings(listing_ids)
+        bump_catalog_version()
+    instance._catalog_username = instance.username
+
+
+def connect_signals():
+    from django.db.models.signals import post_delete, post_init, post_save
+
+    post_save.connect(listing_saved, sender=Listings, dispatch_uid="catalog_listing_saved")
+    post_delete.connect(listing_deleted, sender=Listings, dispatch_uid="catalog_listing_deleted")
+    post_save.connect(card_saved, sender=Card, dispatch_uid="catalog_card_saved")
+    post_delete.connect(card_deleted, sender=Card, dispatch_uid="catalog_card_deleted")
+    post_init.connect(user_loaded, sender=settings.AUTH_USER_MODEL, dispatch_uid="catalog_user_loaded")
+    post_save.connect(user_saved, sender=settings.AUTH_USER_MODEL, dispatch_uid="catalog_user_saved")
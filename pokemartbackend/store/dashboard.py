@@ -0,0 +1,200 @@
+"""The user's dashboard in one payload: purchases, sales, listings and stats.
+
+``dashboard(user, include)`` reads two row sets and builds every section
+from them, instead of running the queries of orders/, sales/ and
+seller-stats/ one endpoint at a time:
+
+* order rows: one UNION query returns every order the user buys or sells
+  in, one row per order line (orders without lines get one empty row);
+* listing rows: the user's Available catalog entries.
+
+Sections match the standalone endpoints: ``purchases`` is orders/,
+``sales`` plus ``listings`` is sales/ and ``stats`` is seller-stats/.
+Payloads are cached per user and section set until one of the user's
+orders gets an event (``orders_version``) or the catalog changes, when
+DASHBOARD_CACHE_SECONDS is set (by default only with a shared cache).
+"""
+
+from collections import OrderedDict
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from pokemartbackend.db import fan_out
+
+from .catalog import catalog_version
+from .models import ListingCatalogEntry, Orders
+from .orders import orders_version
+from .serializers import ORDER_FIELDS, SALES_LISTING_FIELDS, encode_order_summary, encode_sales_listing
+
+SECTIONS = ("purchases", "sales", "listings", "stats")
+# Sections -> row sets they are built from.
+NEEDS_ORDERS = {"purchases", "sales", "stats"}
+NEEDS_LISTINGS = {"listings", "stats"}
+
+COMPLETED_STATUSES = ("Completado", "Finalizado")
+
+LINE = "order_details__"
+ORDER_ROW_FIELDS = (
+    *ORDER_FIELDS,
+    "buyer_id_id",
+    "buyer_id__username",
+    LINE + "id",
+    LINE + "quantity",
+    LINE + "unit_price",
+    LINE + "listing_id__seller_id",
+    LINE + "listing_id__seller__username",
+    LINE + "listing_id__card_id__name",
+    LINE + "listing_id__card_id__image_url",
+)
+
+
+def parse_include(raw):
+    """``?include=stats,sales`` as a tuple of sections; every section when empty.
+
+    Raises ValueError on unknown sections.
+    """
+    requested = [part.strip() for part in (raw or "").split(",") if part.strip()]
+    unknown = set(requested) - set(SECTIONS)
+    if unknown:
+        raise ValueError(f"Unknown section(s): {', '.join(sorted(unknown))}. Use: {', '.join(SECTIONS)}.")
+    return tuple(section for section in SECTIONS if section in requested) if requested else SECTIONS
+
+
+def order_rows(user):
+    """Order line rows of every order ``user`` buys or sells in, newest order first."""
+    bought = Orders.objects.filter(buyer_id=user).values(*ORDER_ROW_FIELDS)
+    sold = Orders.objects.filter(order_details__listing_id__seller=user).values(*ORDER_ROW_FIELDS)
+    return bought.union(sold).order_by("-created_at", "id", LINE + "id")
+
+
+def listing_rows(user):
+    return (
+        ListingCatalogEntry.objects.filter(seller=user, status="Available")
+        .order_by("-created_at")
+        .values(*SALES_LISTING_FIELDS, "card_recommended_price")
+    )
+
+
+def _preview(line):
+    """The line in the shape of an ORDER_PREVIEW_FIELDS row."""
+    return {
+        "order_id": line["id"],
+        "listing_id__card_id__name": line[LINE + "listing_id__card_id__name"],
+        "listing_id__card_id__image_url": line[LINE + "listing_id__card_id__image_url"],
+        "listing_id__seller__username": line[LINE + "listing_id__seller__username"],
+    }
+
+
+def _group(rows):
+    """OrderedDict of order id -> its rows, in query order."""
+    orders = OrderedDict()
+    for row in rows:
+        orders.setdefault(row["id"], []).append(row)
+    return orders
+
+
+def _purchases(user, orders):
+    data = []
+    for lines in orders.values():
+        order = lines[0]
+        if order["buyer_id_id"] != user.pk:
+            continue
+        # Primera línea de la orden (la de menor id) para el icono/nombre
+        preview = _preview(order) if order[LINE + "id"] is not None else None
+        data.append(encode_order_summary(
+            order, preview,
+            seller=preview["listing_id__seller__username"] if preview else "Varios",
+        ))
+    return data
+
+
+def _sales(user, orders):
+    data = []
+    for lines in orders.values():
+        mine = [line for line in lines if line[LINE + "listing_id__seller_id"] == user.pk]
+        if mine:
+            data.append(encode_order_summary(mine[0], _preview(mine[0]), buyer=mine[0]["buyer_id__username"]))
+    return data
+
+
+def _stats(user, orders, listings):
+    sold = [
+        line
+        for lines in orders.values()
+        for line in lines
+        if line[LINE + "listing_id__seller_id"] == user.pk and line["status"] in COMPLETED_STATUSES
+    ]
+    revenue = Decimal(0)
+    months, cards = {}, {}
+    for line in sold:
+        amount = line[LINE + "unit_price"] * line[LINE + "quantity"]
+        revenue += amount
+        month = timezone.localtime(line["created_at"]).date().replace(day=1)
+        totals = months.setdefault(month, {"revenue": Decimal(0), "cards": 0})
+        totals["revenue"] += amount
+        totals["cards"] += line[LINE + "quantity"]
+        name = line[LINE + "listing_id__card_id__name"]
+        cards[name] = cards.get(name, 0) + line[LINE + "quantity"]
+
+    pending = {
+        order_id
+        for order_id, lines in orders.items()
+        if lines[0]["status"] == "Pendiente"
+        and any(line[LINE + "listing_id__seller_id"] == user.pk for line in lines)
+    }
+    return {
+        "total_cards_sold": sum(line[LINE + "quantity"] for line in sold),
+        "total_revenue": round(float(revenue), 2),
+        "active_listings": len(listings),
+        "pending_orders": len(pending),
+        "monthly_revenue": [
+            {"month": month.strftime("%b %Y"), "revenue": float(totals["revenue"]), "cards": totals["cards"]}
+            for month, totals in sorted(months.items())
+        ],
+        "price_comparison": [
+            {
+                "name": row["card_name"][:20],
+                "your_price": float(row["price"]),
+                "recommended": float(row["card_recommended_price"]),
+            }
+            for row in listings[:20]
+        ],
+        "cards_sold_breakdown": [
+            {"name": name[:18], "sold": count}
+            for name, count in sorted(cards.items(), key=lambda item: (-item[1], item[0]))[:8]
+        ],
+    }
+
+
+def build_dashboard(user, include=SECTIONS):
+    """The requested sections for ``user``, straight from the database."""
+    # Both row sets are independent: read them concurrently
+    orders, listings = fan_out(
+        lambda: _group(order_rows(user)) if NEEDS_ORDERS.intersection(include) else None,
+        lambda: list(listing_rows(user)) if NEEDS_LISTINGS.intersection(include) else None,
+    )
+    payload = {}
+    if "purchases" in include:
+        payload["purchases"] = _purchases(user, orders)
+    if "sales" in include:
+        payload["sales"] = _sales(user, orders)
+    if "listings" in include:
+        payload["listings"] = [encode_sales_listing(row) for row in listings]
+    if "stats" in include:
+        payload["stats"] = _stats(user, orders, listings)
+    return payload
+
+
+def dashboard(user, include=SECTIONS):
+    """``build_dashboard``, cached until the user's orders or the catalog change."""
+    if not settings.DASHBOARD_CACHE_SECONDS:
+        return build_dashboard(user, include)
+    key = f"dashboard:{user.pk}:{orders_version(user.pk)}:{catalog_version()}:{','.join(include)}"
+    payload = cache.get(key)
+    if payload is None:
+        payload = build_dashboard(user, include)
+        cache.set(key, payload, settings.DASHBOARD_CACHE_SECONDS)
+    return payload
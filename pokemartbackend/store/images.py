@@ -0,0 +1,361 @@
+"""Card images served from a local, content-addressed disk cache.
+
+``cards/<id>/image/?w=320`` fetches ``Card.image_url`` once, stores the
+bytes under their SHA-256 in IMAGE_CACHE_DIR and records the digest on the
+card. A background worker then writes WebP thumbnails at
+IMAGE_THUMBNAIL_WIDTHS next to the original:
+
+    <IMAGE_CACHE_DIR>/3f/3fa9…/original
+    <IMAGE_CACHE_DIR>/3f/3fa9…/320.webp
+
+The card URL redirects to ``images/<digest>/<variant>``. That URL names its
+content, so it is served with a one-year immutable Cache-Control, as a
+FileResponse (the WSGI server sends it with ``wsgi.file_wrapper``, i.e.
+sendfile) or through IMAGE_SENDFILE_HEADER by the front server. Until a
+thumbnail exists the redirect points at the original for a minute only.
+
+Catalog imports can do all of this up front (``getdata.py
+--prefetch-images``): ``describe_image`` is the CPU-bound half, a pure
+function run in a process pool, which also measures the image and encodes
+its blurhash placeholder for the Card row.
+
+Pillow is optional: without it originals are served and no thumbnails are
+made.
+"""
+
+import functools
+import hashlib
+import io
+import logging
+import math
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.conf import settings
+from django.http import FileResponse, HttpResponse
+
+from .models import Card
+
+try:
+    from PIL import Image
+except ImportError:  # pragma: no cover - optional dependency
+    Image = None
+
+# What Pillow raises for a corrupt or hostile image (SyntaxError: bad PNG chunks).
+BAD_IMAGE = (OSError, SyntaxError, ValueError, Image.DecompressionBombError) if Image else ()
+
+logger = logging.getLogger(__name__)
+
+ORIGINAL = "original"
+IMMUTABLE = "public, max-age=31536000, immutable"
+DIGEST_RE = re.compile(r"[0-9a-f]{64}")
+THUMBNAIL_RE = re.compile(r"(\d+)\.webp")
+
+CONTENT_TYPES = {"png": "image/png", "jpeg": "image/jpeg", "gif": "image/gif", "webp": "image/webp"}
+
+
+class ImageError(Exception):
+    """An image that cannot be served; ``status`` is the HTTP status to answer with."""
+
+    def __init__(self, message, status=502):
+        super().__init__(message)
+        self.status = status
+
+
+def sniff(data):
+    """Format of the image bytes in ``data`` (a CONTENT_TYPES key), or None."""
+    if data.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "png"
+    if data.startswith(b"\xff\xd8\xff"):
+        return "jpeg"
+    if data[:6] in (b"GIF87a", b"GIF89a"):
+        return "gif"
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "webp"
+    return None
+
+
+def thumbnail_name(width):
+    return f"{width}.webp"
+
+
+def variant_path(digest, variant):
+    return settings.IMAGE_CACHE_DIR / digest[:2] / digest / variant
+
+
+def _write(path, data):
+    # Write beside the target and rename, so readers never see half a file.
+    path.parent.mkdir(parents=True, exist_ok=True)
+    partial = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}")
+    partial.write_bytes(data)
+    os.replace(partial, path)
+
+
+def download(url, session=None):
+    """The image at ``url``; raises ImageError when it cannot be fetched or is not an image."""
+    chunks, size = [], 0
+    try:
+        with (session or requests).get(url, stream=True, timeout=settings.IMAGE_FETCH_TIMEOUT) as response:
+            response.raise_for_status()
+            for chunk in response.iter_content(64 * 1024):
+                size += len(chunk)
+                if size > settings.IMAGE_MAX_BYTES:
+                    raise ImageError("Source image is too large.")
+                chunks.append(chunk)
+    except requests.RequestException as exc:
+        raise ImageError(f"Could not fetch the source image: {exc}") from exc
+    data = b"".join(chunks)
+    if sniff(data) is None:
+        raise ImageError("Source is not a PNG, JPEG, GIF or WebP image.")
+    if Image is not None:
+        # Magic bytes are not enough: never cache a body Pillow cannot decode.
+        try:
+            with Image.open(io.BytesIO(data)) as image:
+                image.verify()
+        except BAD_IMAGE as exc:
+            raise ImageError(f"Source image is corrupt: {exc}") from exc
+    return data
+
+
+def store_original(data):
+    """Save ``data`` under its SHA-256 (once) and return the digest."""
+    digest = hashlib.sha256(data).hexdigest()
+    path = variant_path(digest, ORIGINAL)
+    if not path.exists():
+        _write(path, data)
+    return digest
+
+
+def cache_card_image(card_id, image_url, digest=""):
+    """Digest of the card's cached image, fetching ``image_url`` when there is no copy on disk."""
+    if digest and variant_path(digest, ORIGINAL).exists():
+        return digest
+    digest = store_original(download(image_url))
+    # update() skips the catalog receivers: the digest is not in any payload.
+    Card.objects.filter(pk=card_id).update(image_digest=digest)
+    schedule_thumbnails(digest)
+    return digest
+
+
+# ─── Thumbnails ──────────────────────────────────────────────────────────────
+
+def render_thumbnail(data, width):
+    """WebP bytes of the image ``data`` scaled down to ``width`` pixels (never up)."""
+    with Image.open(io.BytesIO(data)) as source:
+        transparent = "A" in source.getbands() or "transparency" in source.info
+        image = source.convert("RGBA" if transparent else "RGB")
+    if image.width > width:
+        image = image.resize((width, max(1, round(image.height * width / image.width))), Image.Resampling.LANCZOS)
+    out = io.BytesIO()
+    image.save(out, "WEBP", quality=settings.IMAGE_THUMBNAIL_QUALITY, method=4)
+    return out.getvalue()
+
+
+def store_thumbnails(digest, thumbnails):
+    """Write ``{width: WebP bytes}`` next to the original of ``digest`` (made elsewhere, e.g. by describe_image)."""
+    for width, data in thumbnails.items():
+        path = variant_path(digest, thumbnail_name(width))
+        if not path.exists():
+            _write(path, data)
+
+
+def make_thumbnails(digest, widths=None):
+    """Write the missing thumbnails of ``digest``; returns the widths written."""
+    if Image is None:
+        return []
+    missing = [
+        width for width in widths or settings.IMAGE_THUMBNAIL_WIDTHS
+        if not variant_path(digest, thumbnail_name(width)).exists()
+    ]
+    if missing:
+        data = variant_path(digest, ORIGINAL).read_bytes()
+        for width in missing:
+            _write(variant_path(digest, thumbnail_name(width)), render_thumbnail(data, width))
+    return missing
+
+
+def describe_image(data, widths=None):
+    """(width, height, blurhash, {width: WebP bytes}) of the image ``data``.
+
+    Pure CPU work on bytes, with no disk or database access, so it can run in
+    a ProcessPoolExecutor.
+    """
+    with Image.open(io.BytesIO(data)) as image:
+        width, height = image.size
+        placeholder = blurhash(image)
+    thumbnails = {size: render_thumbnail(data, size) for size in widths or settings.IMAGE_THUMBNAIL_WIDTHS}
+    return width, height, placeholder, thumbnails
+
+
+# ─── Blurhash ────────────────────────────────────────────────────────────────
+# https://blurha.sh: the image as a few DCT components, base83 encoded into
+# a short string the frontend turns into a placeholder.
+
+_BASE83 = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz#$%*+,-.:;=?@[]^_{|}~"
+
+
+def _base83(value, length):
+    return "".join(_BASE83[value // 83 ** (length - 1 - i) % 83] for i in range(length))
+
+
+def _linear(value):
+    value /= 255
+    return value / 12.92 if value <= 0.04045 else ((value + 0.055) / 1.055) ** 2.4
+
+
+def _srgb(value):
+    value = min(1.0, max(0.0, value))
+    return round(value * 12.92 * 255) if value <= 0.0031308 else round((1.055 * value ** (1 / 2.4) - 0.055) * 255)
+
+
+def blurhash(image, x_components=4, y_components=3):
+    """Blurhash of the Pillow ``image``, computed on a 32 pixel copy (the detail is thrown away anyway)."""
+    small = image.convert("RGB")
+    small.thumbnail((32, 32))
+    width, height = small.size
+    pixels = [tuple(_linear(channel) for channel in pixel) for pixel in small.getdata()]
+    factors = []
+    for j in range(y_components):
+        cos_y = [math.cos(math.pi * j * y / height) for y in range(height)]
+        for i in range(x_components):
+            cos_x = [math.cos(math.pi * i * x / width) for x in range(width)]
+            scale = (1 if i == j == 0 else 2) / (width * height)
+            total = [0.0, 0.0, 0.0]
+            for y in range(height):
+                for x in range(width):
+                    basis = cos_x[x] * cos_y[y]
+                    pixel = pixels[y * width + x]
+                    for channel in range(3):
+                        total[channel] += basis * pixel[channel]
+            factors.append([value * scale for value in total])
+
+    dc, ac = factors[0], factors[1:]
+    quantised_max = max(0, min(82, int(max(abs(v) for factor in ac for v in factor) * 166 - 0.5))) if ac else 0
+    max_value = (quantised_max + 1) / 166
+    encoded = _base83(x_components - 1 + (y_components - 1) * 9, 1) + _base83(quantised_max, 1)
+    encoded += _base83((_srgb(dc[0]) << 16) + (_srgb(dc[1]) << 8) + _srgb(dc[2]), 4)
+    for factor in ac:
+        r, g, b = (
+            max(0, min(18, math.floor(math.copysign(abs(v / max_value) ** 0.5, v) * 9 + 9.5))) for v in factor
+        )
+        encoded += _base83(r * 19 * 19 + g * 19 + b, 2)
+    return encoded
+
+
+_executor = None
+_executor_lock = threading.Lock()
+_pending = {}
+_pending_lock = threading.Lock()
+
+
+def _pool():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=settings.IMAGE_WORKERS, thread_name_prefix="image-thumbnails")
+    return _executor
+
+
+def _finished(digest, future):
+    with _pending_lock:
+        _pending.pop(digest, None)
+    if future.exception() is not None:
+        logger.warning("Thumbnails of image %s failed: %s", digest, future.exception())
+
+
+def schedule_thumbnails(digest):
+    """Queue ``make_thumbnails(digest)`` on the background worker; returns its Future.
+
+    A digest already queued is not queued twice. Returns None without Pillow.
+    """
+    if Image is None:
+        return None
+    with _pending_lock:
+        future = _pending.get(digest)
+        queued = future is None
+        if queued:
+            future = _pending[digest] = _pool().submit(make_thumbnails, digest)
+    if queued:
+        future.add_done_callback(functools.partial(_finished, digest))
+    return future
+
+
+def thumbnail_width(requested):
+    """The smallest configured width of at least ``requested`` (the largest when none is)."""
+    widths = sorted(settings.IMAGE_THUMBNAIL_WIDTHS)
+    return next((width for width in widths if width >= requested), widths[-1])
+
+
+def ready_variant(digest, width=None):
+    """(variant, final): the thumbnail for ``width`` when written, else the original.
+
+    ``final`` is False while the thumbnail is still being made (it is queued).
+    """
+    if width is None or Image is None:
+        return ORIGINAL, True
+    name = thumbnail_name(thumbnail_width(width))
+    if variant_path(digest, name).exists():
+        return name, True
+    schedule_thumbnails(digest)
+    return ORIGINAL, False
+
+
+# ─── Serving ─────────────────────────────────────────────────────────────────
+
+def image_response(digest, variant):
+    """The cached file as an immutable response; raises ImageError (404) when there is none."""
+    thumbnail = THUMBNAIL_RE.fullmatch(variant)
+    known = variant == ORIGINAL or (thumbnail and int(thumbnail[1]) in settings.IMAGE_THUMBNAIL_WIDTHS)
+    if not DIGEST_RE.fullmatch(digest) or not known:
+        raise ImageError("Image not found.", status=404)
+    original = variant_path(digest, ORIGINAL)
+    if not original.exists():
+        raise ImageError("Image not found.", status=404)
+    if thumbnail and Image is None:
+        raise ImageError("Image not found.", status=404)
+    path = variant_path(digest, variant)
+    if thumbnail:
+        # Asked for before the worker got to it: make it now.
+        try:
+            make_thumbnails(digest, [int(thumbnail[1])])
+        except BAD_IMAGE as exc:
+            logger.warning("Thumbnail of image %s failed: %s", digest, exc)
+            raise ImageError("Image not found.", status=404) from exc
+        content_type = CONTENT_TYPES["webp"]
+    else:
+        with open(original, "rb") as fh:
+            content_type = CONTENT_TYPES[sniff(fh.read(12))]
+
+    if settings.IMAGE_SENDFILE_HEADER:
+        response = HttpResponse(content_type=content_type)
+        relative = path.relative_to(settings.IMAGE_CACHE_DIR).as_posix()
+        prefix = settings.IMAGE_SENDFILE_PREFIX
+        response[settings.IMAGE_SENDFILE_HEADER] = prefix.rstrip("/") + "/" + relative if prefix else str(path)
+    else:
+        response = FileResponse(open(path, "rb"), content_type=content_type)
+    response["Cache-Control"] = IMMUTABLE
+    return response
+
+
+# ─── Signals ─────────────────────────────────────────────────────────────────
+
+def card_loaded(sender, instance, **kwargs):
+    # Read from __dict__ so a deferred image_url never triggers a query.
+    instance._cached_image_url = instance.__dict__.get("image_url")
+
+
+def card_saving(sender, instance, raw=False, **kwargs):
+    # A new source URL is a new image: fetch it again on the next request.
+    if not raw and instance.image_url != getattr(instance, "_cached_image_url", instance.image_url):
+        instance.image_digest = ""
+    instance._cached_image_url = instance.image_url
+
+
+def connect_signals():
+    from django.db.models.signals import post_init, pre_save
+
+    post_init.connect(card_loaded, sender=Card, dispatch_uid="images_card_loaded")
+    pre_save.connect(card_saving, sender=Card, dispatch_uid="images_card_saving")
@@ -0,0 +1,138 @@
+"""Per-participant read cursors and unread counters for order chats.
+
+Every participant of an order (its buyer and its sellers) has an OrderInbox
+row with a read cursor (the last message id they have seen), the number of
+messages they have not read yet and a preview of the latest message.
+
+``message_posted`` moves every row of the order with a single UPDATE, and
+``mark_read`` moves one cursor, so the inbox endpoint is one indexed read
+of the user's rows and never counts Message rows. Rows are opened when an
+order is placed or gains a seller; orders that predate inboxes get theirs
+on their next message or read, with their history counted as read.
+"""
+
+from django.db.models import Case, F, Max, Q, Value, When
+from django.db.models.functions import Coalesce
+
+from .models import Message, OrderEvent, OrderInbox, Order_details, Orders
+from .orders import order_events
+from .serializers import INBOX_FIELDS
+
+PREVIEW_LENGTH = 140
+
+
+def participants(order_ids):
+    """{order_id: {user_id, ...}} with the buyer and the sellers of each order."""
+    found = {}
+    for order_id, buyer_id in Orders.objects.filter(id__in=order_ids).values_list("id", "buyer_id_id"):
+        found.setdefault(order_id, set()).add(buyer_id)
+    sellers = (
+        Order_details.objects.filter(order_id__in=order_ids)
+        .values_list("order_id_id", "listing_id__seller_id")
+        .distinct()
+    )
+    for order_id, seller_id in sellers:
+        found.setdefault(order_id, set()).add(seller_id)
+    return found
+
+
+def is_participant(order_id, user):
+    """Whether ``user`` is the buyer or one of the sellers of the order."""
+    return Orders.objects.filter(
+        Q(buyer_id=user) | Q(order_details__listing_id__seller=user), id=order_id,
+    ).exists()
+
+
+def open_inboxes(order_ids, before=None):
+    """Create the missing inbox rows of ``order_ids``.
+
+    Existing history counts as read; the latest message (older than
+    ``before``, when given) becomes the preview.
+    """
+    messages = Message.objects.filter(order_id__in=order_ids)
+    if before is not None:
+        messages = messages.filter(id__lt=before)
+    latest_ids = messages.values("order_id").annotate(latest=Max("id")).values("latest")
+    latest = {
+        row["order_id"]: row
+        for row in Message.objects.filter(id__in=latest_ids).values(
+            "id", "order_id", "sender__username", "content", "created_at",
+        )
+    }
+    rows = []
+    for order_id, users in participants(order_ids).items():
+        message = latest.get(order_id)
+        preview = {}
+        if message:
+            preview = {
+                "last_read_message_id": message["id"],
+                "last_message_id": message["id"],
+                "last_message_sender": message["sender__username"],
+                "last_message_preview": message["content"][:PREVIEW_LENGTH],
+                "last_message_at": message["created_at"],
+            }
+        rows += [OrderInbox(order_id=order_id, user_id=user_id, **preview) for user_id in users]
+    OrderInbox.objects.bulk_create(rows, ignore_conflicts=True)
+
+
+def _if_newer(message_id, value, field):
+    # Two messages posted at once may commit out of order; keep the newest.
+    newer = Q(last_message_id__isnull=True) | Q(last_message_id__lt=message_id)
+    return Case(When(newer, then=Value(value)), default=F(field), output_field=OrderInbox._meta.get_field(field))
+
+
+def message_posted(message):
+    """Count ``message`` as unread for everyone in the order but its sender."""
+    sender_id = message.sender_id
+    changes = {
+        "unread_count": Case(When(user_id=sender_id, then=Value(0)), default=F("unread_count") + 1),
+        "last_read_message_id": Case(
+            When(user_id=sender_id, then=Value(message.id)), default=F("last_read_message_id"),
+            output_field=OrderInbox._meta.get_field("last_read_message_id"),
+        ),
+        "last_message_sender": _if_newer(message.id, message.sender.username, "last_message_sender"),
+        "last_message_preview": _if_newer(message.id, message.content[:PREVIEW_LENGTH], "last_message_preview"),
+        "last_message_at": _if_newer(message.id, message.created_at, "last_message_at"),
+        "last_message_id": _if_newer(message.id, message.id, "last_message_id"),
+    }
+    inboxes = OrderInbox.objects.filter(order_id=message.order_id)
+    if not inboxes.update(**changes):
+        open_inboxes([message.order_id], before=message.id)
+        inboxes.update(**changes)
+
+
+def mark_read(order_id, user):
+    """Move ``user``'s cursor to the latest message; False when they are not in the order."""
+    inboxes = OrderInbox.objects.filter(order_id=order_id, user=user)
+    changes = {"last_read_message_id": Coalesce("last_message_id", "last_read_message_id"), "unread_count": 0}
+    if inboxes.update(**changes):
+        return True
+    # Opened rows start with the whole history read.
+    open_inboxes([order_id])
+    return inboxes.exists()
+
+
+def user_inbox(user):
+    """The user's inbox rows, latest conversation first, and their unread total."""
+    rows = list(
+        OrderInbox.objects.filter(user=user)
+        .order_by(F("last_message_at").desc(nulls_last=True), "-order_id")
+        .values(*INBOX_FIELDS)
+    )
+    return rows, sum(row["unread_count"] for row in rows)
+
+
+def open_order_inboxes(sender, events, **kwargs):
+    rows = [
+        OrderInbox(order_id=event.order_id, user_id=user_id)
+        for event in events
+        if event.kind == OrderEvent.CREATED
+        or (event.kind == OrderEvent.ITEMS_CHANGED and event.data["quantity"] > 0)
+        for user_id in {event.order.buyer_id_id} | event.sellers
+    ]
+    if rows:
+        OrderInbox.objects.bulk_create(rows, ignore_conflicts=True)
+
+
+def connect_receivers():
+    order_events.connect(open_order_inboxes, dispatch_uid="inbox_open_order_inboxes")
@@ -0,0 +1,264 @@
+"""Bulk inventory import and repricing for sellers.
+
+One row per listing with the columns ``card_id, price, quantity, condition``
+and optionally ``status`` and ``description``:
+
+    card_id,price,quantity,condition,description
+    12,4.50,3,Near Mint,Primera edición
+
+``import_inventory`` validates every row, resolves all card ids with a
+single query and inserts the valid rows with ``bulk_create`` in batches.
+It yields progress events so callers can stream them as they happen:
+
+    {"line": 7, "error": "Unknown card_id 999."}
+    {"processed": 500, "created": 498, "total": 5000}
+    {"done": true, "created": 4990, "errors": 10}
+
+``bulk_update_listings`` changes price and/or status of many listings of
+one seller with a single set-based UPDATE, then re-copies them into the
+catalog.
+``adjust_stock`` does the same for stock movements of many listings.
+"""
+
+import csv
+import io
+import json
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.db.models import Case, F, OuterRef, Subquery, Value, When
+from django.db.models.functions import Round
+
+from .catalog import MAX_ID, bump_catalog_version, forget_listings, refresh_catalog
+from .maintenance import normalize_status
+from .models import Card, ListingCatalogEntry, Listings
+
+CONDITIONS = {value for value, _ in Listings.CONDITION}
+# Listings.price is DecimalField(max_digits=10, decimal_places=2).
+MAX_PRICE = Decimal("1e8")
+PRICE_RANGE_ERROR = "{} must be between 0 and 99999999.99."
+# Listings.quantity is an IntegerField: 32-bit on most backends.
+MAX_QUANTITY = 2**31 - 1
+STATUSES = {value for value, _ in Listings.STATUS}
+
+
+def parse_inventory(text, fmt):
+    """Yield ``(line_number, row)``; ``row`` is None when the line is not valid JSON."""
+    if fmt == "csv":
+        reader = csv.DictReader(io.StringIO(text))
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for number, line in enumerate(text.splitlines(), start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError:
+            row = None
+        yield number, row if isinstance(row, dict) else None
+
+
+def _integer(value, name):
+    # int() would truncate 2.7 from JSON; CSV text like "2.7" already fails.
+    if isinstance(value, bool) or (isinstance(value, float) and not value.is_integer()):
+        raise ValueError(f"{name} must be an integer.")
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be an integer.")
+
+
+def _id(value, name):
+    # SQLite overflows past 64-bit integers
+    pk = _integer(value, name)
+    if not 1 <= pk <= MAX_ID:
+        raise ValueError(f"{name} must be between 1 and {MAX_ID}.")
+    return pk
+
+
+def _clean(row):
+    """Listing fields for ``row`` (card still unresolved), or ValueError."""
+    if row is None:
+        raise ValueError("Row is not a JSON object.")
+    missing = [field for field in ("card_id", "price", "quantity", "condition") if row.get(field) in (None, "")]
+    if missing:
+        raise ValueError(f"Missing required fields: {', '.join(missing)}.")
+    card_id = _id(row["card_id"], "card_id")
+    try:
+        price = Decimal(str(row["price"]))
+    except InvalidOperation:
+        raise ValueError("price must be a number.")
+    if not price.is_finite() or price < 0 or price >= MAX_PRICE:
+        raise ValueError(PRICE_RANGE_ERROR.format("price"))
+    quantity = _integer(row["quantity"], "quantity")
+    if quantity < 0:
+        raise ValueError("quantity cannot be negative.")
+    if quantity > MAX_QUANTITY:
+        raise ValueError(f"quantity must be at most {MAX_QUANTITY}.")
+    if row["condition"] not in CONDITIONS:
+        raise ValueError(f"Unknown condition {row['condition']!r}.")
+    status = normalize_status(row.get("status") or "Available")
+    if status not in STATUSES:
+        raise ValueError(f"Unknown status {status!r}.")
+    return {
+        "card_id_id": card_id,
+        "price": price.quantize(Decimal("0.01")),
+        "quantity": quantity,
+        "condition": row["condition"],
+        "status": status,
+        "description": row.get("description") or "",
+    }
+
+
+def import_inventory(seller, rows, batch_size=500):
+    """Create listings for ``seller`` from parsed ``rows`` and yield progress events."""
+    cleaned = []
+    errors = 0
+    for line, row in rows:
+        try:
+            cleaned.append((line, _clean(row)))
+        except ValueError as exc:
+            errors += 1
+            yield {"line": line, "error": str(exc)}
+
+    card_ids = {fields["card_id_id"] for _, fields in cleaned}
+    known = set(Card.objects.filter(id__in=card_ids).values_list("id", flat=True)) if card_ids else set()
+    valid = []
+    for line, fields in cleaned:
+        if fields["card_id_id"] in known:
+            valid.append(Listings(seller=seller, **fields))
+        else:
+            errors += 1
+            yield {"line": line, "error": f"Unknown card_id {fields['card_id_id']}."}
+
+    created = 0
+    for start in range(0, len(valid), batch_size):
+        batch = valid[start:start + batch_size]
+        with transaction.atomic():
+            Listings.objects.bulk_create(batch)
+            refresh_catalog([listing.pk for listing in batch])
+        created += len(batch)
+        yield {"processed": start + len(batch), "created": created, "total": len(valid)}
+
+    yield {"done": True, "created": created, "errors": errors}
+
+
+# Filter name -> lookup on Listings.
+BULK_FILTERS = {
+    "status": "status",
+    "condition": "condition",
+    "card_id": "card_id_id",
+    "rarity": "card_id__rarity",
+    "collection": "card_id__collection",
+    "min_price": "price__gte",
+    "max_price": "price__lte",
+}
+
+
+def _decimal(value, name):
+    try:
+        number = Decimal(str(value))
+    except InvalidOperation:
+        raise ValueError(f"{name} must be a number.")
+    if not number.is_finite():
+        raise ValueError(f"{name} must be a number.")
+    return number
+
+
+def _price_expression(price):
+    """Listings expression for a price change spec."""
+    if not isinstance(price, dict) or len(price) != 1:
+        raise ValueError('price must be one of {"value": x}, {"percent": x} or {"recommended_factor": x}.')
+    (kind, raw), = price.items()
+    if kind == "value":
+        value = _decimal(raw, "price.value")
+        if value < 0 or value >= MAX_PRICE:
+            raise ValueError(PRICE_RANGE_ERROR.format("price.value"))
+        return Value(value)
+    if kind == "percent":
+        factor = 1 + _decimal(raw, "price.percent") / 100
+        if factor <= 0:
+            raise ValueError("price.percent must be greater than -100.")
+        return Round(F("price") * Value(factor), 2)
+    if kind == "recommended_factor":
+        factor = _decimal(raw, "price.recommended_factor")
+        if factor <= 0:
+            raise ValueError("price.recommended_factor must be positive.")
+        # UPDATE cannot reference joined columns; read the card's price
+        # through a correlated subquery instead.
+        recommended = Subquery(Card.objects.filter(id=OuterRef("card_id_id")).values("recommended_price")[:1])
+        return Round(recommended * Value(factor), 2)
+    raise ValueError(f"Unknown price change {kind!r}.")
+
+
+def bulk_update_listings(seller, ids=None, filters=None, status=None, price=None):
+    """Apply ``status`` and/or a ``price`` change to the seller's matching listings.
+
+    Listings are selected by ``ids`` or by ``filters`` (keys of BULK_FILTERS).
+    Returns the ids of the listings that changed. Raises ValueError on bad
+    input, including a change that would price a listing at MAX_PRICE or more.
+    """
+    if (ids is None) == (filters is None):
+        raise ValueError("Send either ids or filter.")
+    listings = Listings.objects.filter(seller=seller)
+    if ids is not None:
+        if not isinstance(ids, list) or not all(isinstance(pk, int) and not isinstance(pk, bool) for pk in ids):
+            raise ValueError("ids must be a list of integers.")
+        listings = listings.filter(id__in=[_id(pk, "ids") for pk in ids])
+    else:
+        if not isinstance(filters, dict):
+            raise ValueError("filter must be an object.")
+        unknown = set(filters) - set(BULK_FILTERS)
+        if unknown:
+            raise ValueError(f"Unknown filter(s): {', '.join(sorted(unknown))}.")
+        for name, value in filters.items():
+            if name.endswith("_price"):
+                value = _decimal(value, name)
+            elif name == "card_id":
+                value = _id(value, name)
+            listings = listings.filter(**{BULK_FILTERS[name]: value})
+
+    changes = {}
+    if status is not None:
+        status = normalize_status(status)
+        if status not in STATUSES:
+            raise ValueError(f"Unknown status {status!r}.")
+        changes["status"] = status
+    if price is not None:
+        changes["price"] = _price_expression(price)
+    if not changes:
+        raise ValueError("Nothing to update: send status and/or price.")
+
+    with transaction.atomic():
+        if price is None:
+            listing_ids = list(listings.values_list("id", flat=True))
+        else:
+            # Read the resulting prices with the ids: they must still fit the column.
+            rows = listings.annotate(new_price=changes["price"]).values_list("id", "new_price")
+            listing_ids = [pk for pk, new_price in rows if new_price is None or new_price < MAX_PRICE]
+            if len(listing_ids) < len(rows):
+                raise ValueError(PRICE_RANGE_ERROR.format("Resulting prices"))
+        if listing_ids:
+            listings.update(**changes)
+    # Re-copy the committed rows, so the catalog never recomputes prices of its own.
+    refresh_catalog(listing_ids)
+    return listing_ids
+
+
+def adjust_stock(deltas):
+    """Add ``deltas`` ({listing_id: units, negative to take}) to listing stock.
+
+    One UPDATE for all listings, mirrored onto the catalog. Stock may go
+    below zero on oversold listings; maintain_listings marks them Sold Out.
+    """
+    deltas = {pk: units for pk, units in deltas.items() if units}
+    if not deltas:
+        return
+    # Catalog entries share the listing's primary key, so one CASE fits both.
+    change = Case(*[When(pk=pk, then=Value(units)) for pk, units in deltas.items()], default=Value(0))
+    with transaction.atomic(savepoint=False):
+        Listings.objects.filter(pk__in=deltas).update(quantity=F("quantity") + change)
+        ListingCatalogEntry.objects.filter(pk__in=deltas).update(quantity=F("quantity") + change)
+    forget_listings(deltas)
+    bump_catalog_version()
@@ -0,0 +1,81 @@
+"""Set-based listing status maintenance.
+
+Each task selects the listings it has to change and updates them in
+primary-key batches, mirroring the change onto the catalog table:
+
+* ``normalize``: legacy status values (``Disponible``) become canonical.
+* ``sold_out``: Available listings with no stock become ``Sold Out``.
+* ``restock``: Sold Out listings that got stock back become ``Available``.
+* ``stale``: Available listings older than LISTING_STALE_DAYS without a
+  sale in that window become ``Inactive``.
+
+Run it periodically through ``python manage.py maintain_listings``.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from .catalog import bump_catalog_version, forget_listings
+from .models import ListingCatalogEntry, Listings, Order_details
+
+LEGACY_STATUSES = {"Disponible": "Available"}
+
+
+def normalize_status(status):
+    return LEGACY_STATUSES.get(status, status)
+
+
+def _candidates(stale_days):
+    # Reads go to the primary: a lagging replica would hand back rows that
+    # were already updated.
+    listings = Listings.objects.using(DEFAULT_DB_ALIAS)
+    cutoff = timezone.now() - timedelta(days=stale_days)
+    recent_sales = Order_details.objects.filter(listing_id=OuterRef("pk"), order_id__created_at__gte=cutoff)
+    tasks = [
+        (f"normalize:{legacy}", listings.filter(status=legacy), {"status": canonical})
+        for legacy, canonical in LEGACY_STATUSES.items()
+    ]
+    tasks += [
+        ("sold_out", listings.filter(status="Available", quantity__lte=0), {"status": "Sold Out"}),
+        ("restock", listings.filter(status="Sold Out", quantity__gt=0), {"status": "Available"}),
+        (
+            "stale",
+            listings.filter(status="Available", created_at__lt=cutoff).exclude(Exists(recent_sales)),
+            {"status": "Inactive"},
+        ),
+    ]
+    return tasks
+
+
+def _update_in_batches(queryset, changes, batch_size):
+    """Apply ``changes`` until ``queryset`` is empty; it must stop matching updated rows."""
+    updated = 0
+    while True:
+        ids = list(queryset.order_by("pk").values_list("pk", flat=True)[:batch_size])
+        if not ids:
+            return updated
+        with transaction.atomic():
+            Listings.objects.filter(pk__in=ids).update(**changes)
+            ListingCatalogEntry.objects.filter(listing_id__in=ids).update(**changes)
+        forget_listings(ids)
+        updated += len(ids)
+
+
+def run_maintenance(batch_size=None, stale_days=None, dry_run=False):
+    """Run every task; returns ``{task: listings changed (or matching, when dry_run)}``."""
+    if batch_size is None:
+        batch_size = settings.LISTING_MAINTENANCE_BATCH_SIZE
+    if stale_days is None:
+        stale_days = settings.LISTING_STALE_DAYS
+    if stale_days < 0 or batch_size < 1:
+        raise ValueError("stale_days must be >= 0 and batch_size >= 1.")
+    results = {}
+    for name, queryset, changes in _candidates(stale_days):
+        results[name] = queryset.count() if dry_run else _update_in_batches(queryset, changes, batch_size)
+    if any(results.values()) and not dry_run:
+        bump_catalog_version()
+    return results
@@ -0,0 +1,41 @@
+"""Move the chat history of long-closed orders into compressed archives.
+
+Intended to run from cron, e.g. nightly:
+
+    30 3 * * * cd /srv/pokemart && python manage.py archive_messages
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from store.archive import archive_messages
+
+
+class Command(BaseCommand):
+    help = "Archive messages of orders closed longer than N days into gzip NDJSON blobs."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            help="Archive orders with no activity for this many days (defaults to MESSAGE_ARCHIVE_AFTER_DAYS)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            help="Orders archived per transaction (defaults to MESSAGE_ARCHIVE_BATCH_SIZE)",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report how many orders and messages would be archived",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            result = archive_messages(options["days"], options["batch_size"], options["dry_run"])
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        verb = "Would archive" if options["dry_run"] else "Archived"
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {result['messages']} messages from {result['orders']} orders"
+        ))
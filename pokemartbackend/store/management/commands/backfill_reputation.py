@@ -0,0 +1,22 @@
+"""Recompute every SellerReputation row from Reviews.
+
+create_review keeps reputations up to date; run this to repair drift, or
+after reviews are written without going through it:
+
+    python manage.py backfill_reputation
+"""
+
+from django.core.management.base import BaseCommand
+
+from store.reputation import rebuild_reputation
+
+
+class Command(BaseCommand):
+    help = "Rebuild seller review counts, averages and histograms with one aggregate query."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000, help="Reputation rows written per upsert")
+
+    def handle(self, *args, **options):
+        written = rebuild_reputation(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Reputation rebuilt: {written} sellers"))
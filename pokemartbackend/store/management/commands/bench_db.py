@@ -0,0 +1,110 @@
+"""Concurrent checkout write benchmark for the configured database profile.
+
+    python manage.py bench_db --threads 8 --writes 200
+    DB_PROFILE=postgres python manage.py bench_db
+
+On SQLite the benchmark runs twice on fresh scratch files: once with stock
+settings and once with the sqlite-wal tuning, so both can be compared on
+the same machine.
+"""
+
+import threading
+import time
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connections, transaction
+from django.db.models import F
+from django.test.utils import override_settings
+
+from store.benchmarks import Timer, seed_marketplace, summarize, temporary_database
+from store.models import Listings, Order_details, Orders
+
+
+def checkout(buyer, listing_ids):
+    """One simulated checkout: order + details + stock decrement."""
+    with transaction.atomic():
+        order = Orders.objects.create(buyer_id=buyer, total_price=Decimal("0"), status="Pendiente")
+        Order_details.objects.bulk_create([
+            Order_details(order_id=order, listing_id_id=listing_id, quantity=1, unit_price=Decimal("2.50"))
+            for listing_id in listing_ids
+        ])
+        Listings.objects.filter(id__in=listing_ids).update(quantity=F("quantity") - 1)
+        Orders.objects.filter(pk=order.pk).update(total_price=Decimal("2.50") * len(listing_ids))
+
+
+class Command(BaseCommand):
+    help = "Measure concurrent checkout write throughput on the configured database."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=8)
+        parser.add_argument("--writes", type=int, default=100, help="Checkouts per thread")
+        parser.add_argument("--listings", type=int, default=50)
+
+    def handle(self, *args, **options):
+        connection = connections["default"]
+        if connection.vendor == "sqlite":
+            variants = [("sqlite (stock)", {}, None), ("sqlite-wal (tuned)", settings.SQLITE_WAL_PRAGMAS, "IMMEDIATE")]
+        else:
+            variants = [(f"{connection.vendor} ({settings.DB_PROFILE})", None, None)]
+
+        for label, pragmas, transaction_mode in variants:
+            result = self.run_variant(options, pragmas, transaction_mode)
+            self.stdout.write(
+                f"{label:<22} {result['ops_per_sec']:>8} checkouts/s  "
+                f"p50={result['p50_ms']}ms p95={result['p95_ms']}ms max={result['max_ms']}ms  "
+                f"errors={result['errors']}"
+            )
+
+    def run_variant(self, options, pragmas, transaction_mode):
+        db_options = connections["default"].settings_dict.setdefault("OPTIONS", {})
+        saved_mode = db_options.pop("transaction_mode", None)
+        if transaction_mode:
+            db_options["transaction_mode"] = transaction_mode
+        overrides = {} if pragmas is None else {"SQLITE_PRAGMAS": pragmas}
+        try:
+            with override_settings(**overrides), temporary_database():
+                return self.hammer(options)
+        finally:
+            db_options.pop("transaction_mode", None)
+            if saved_mode:
+                db_options["transaction_mode"] = saved_mode
+
+    def hammer(self, options):
+        users, _ = seed_marketplace(listings=options["listings"])
+        buyer = users[0]
+        listing_ids = list(Listings.objects.values_list("id", flat=True))
+        latencies, errors = [], []
+        lock = threading.Lock()
+        start = threading.Barrier(options["threads"])
+
+        def worker(n):
+            local = []
+            start.wait()
+            try:
+                for i in range(options["writes"]):
+                    picked = [listing_ids[(n + i + k) % len(listing_ids)] for k in range(3)]
+                    t0 = time.perf_counter()
+                    try:
+                        checkout(buyer, picked)
+                    except OperationalError as exc:
+                        with lock:
+                            errors.append(str(exc))
+                        continue
+                    local.append(time.perf_counter() - t0)
+            finally:
+                connections.close_all()
+            with lock:
+                latencies.extend(local)
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(options["threads"])]
+        with Timer() as timer:
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+
+        result = summarize(latencies, timer.elapsed)
+        result["errors"] = len(errors)
+        return result
@@ -0,0 +1,77 @@
+"""Compare the legacy instance-based list_listings encoding with store.serializers.
+
+    python manage.py bench_serializers --listings 5000 --repeat 5
+"""
+
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+from django.http import JsonResponse as DjangoJsonResponse
+
+from pokemartbackend import http
+from pokemartbackend.http import JsonResponse
+from store.benchmarks import Timer, seed_marketplace, temporary_database
+from store.models import Listings
+from store.serializers import LISTING_FIELDS, encode_listing
+
+
+def legacy_list_listings():
+    listings = Listings.objects.filter(status="Available").select_related("card_id", "seller").order_by("-created_at")
+    data = [
+        {
+            "id": listing.id,
+            "seller": {"id": listing.seller.id, "username": listing.seller.username},
+            "card": {
+                "id": listing.card_id.id,
+                "name": listing.card_id.name,
+                "collection": listing.card_id.collection,
+                "rarity": listing.card_id.rarity,
+                "image_url": listing.card_id.image_url,
+                "recommended_price": str(listing.card_id.recommended_price),
+            },
+            "price": str(listing.price),
+            "quantity": listing.quantity,
+            "condition": listing.condition,
+            "status": listing.status,
+            "description": listing.description,
+            "created_at": listing.created_at.isoformat(),
+        }
+        for listing in listings
+    ]
+    return DjangoJsonResponse(data, safe=False)
+
+
+def values_list_listings():
+    listings = Listings.objects.filter(status="Available").order_by("-created_at").values(*LISTING_FIELDS)
+    return JsonResponse([encode_listing(row) for row in listings], safe=False)
+
+
+class Command(BaseCommand):
+    help = "Benchmark response CPU time, size and allocations for list_listings encoders."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--listings", type=int, default=2000)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        with temporary_database():
+            seed_marketplace(listings=options["listings"], cards=options["listings"] // 2, sellers=50)
+            variants = [
+                ("legacy instances + stdlib", legacy_list_listings),
+                (f"values() + {'orjson' if http.orjson else 'stdlib compact'}", values_list_listings),
+            ]
+            for label, build in variants:
+                build()  # warm up connection and caches
+                best = None
+                for _ in range(options["repeat"]):
+                    with Timer() as timer:
+                        response = build()
+                    best = timer.elapsed if best is None else min(best, timer.elapsed)
+                tracemalloc.start()
+                build()
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                self.stdout.write(
+                    f"{label:<30} best={best * 1000:8.1f}ms  bytes={len(response.content):>10}  "
+                    f"peak_alloc={peak / 1024:8.0f}KiB"
+                )
@@ -0,0 +1,133 @@
+"""Seed a scratch database, benchmark every store endpoint and run a load mix.
+
+    python manage.py benchmark --scale small --output bench.json --check
+    python manage.py benchmark --scale medium --mix browse --threads 8
+    python manage.py benchmark --only list_listings get_home_feed --skip-load
+    python manage.py benchmark --servers --concurrency 128 --skip-load
+
+With ``--check`` the command exits non-zero when a result breaks the
+limits in store/benchmark_thresholds.json, so CI can flag regressions.
+"""
+
+import json
+import platform
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.utils import timezone
+
+from store.benchmarks import (
+    MIXES,
+    SCALES,
+    SCENARIOS,
+    THRESHOLDS_PATH,
+    BenchContext,
+    Timer,
+    check_thresholds,
+    run_load,
+    run_micro,
+    run_servers,
+    seed_dataset,
+    temporary_database,
+)
+
+
+class Command(BaseCommand):
+    help = "Benchmark store endpoints on synthetic data and check regression thresholds."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+        for entity in ("cards", "listings", "users", "orders", "messages"):
+            parser.add_argument(f"--{entity}", type=int, help=f"Override the number of {entity}")
+        parser.add_argument("--iterations", type=int, default=20, help="Timed calls per endpoint")
+        parser.add_argument("--only", nargs="+", choices=sorted(SCENARIOS), help="Benchmark only these endpoints")
+        parser.add_argument("--skip-load", action="store_true")
+        parser.add_argument("--mix", choices=sorted(MIXES), default="marketplace")
+        parser.add_argument("--threads", type=int, default=4)
+        parser.add_argument("--requests", type=int, default=50, help="Requests per load-test thread")
+        parser.add_argument(
+            "--servers", action="store_true", help="Compare sync views under WSGI with async views under ASGI",
+        )
+        parser.add_argument("--concurrency", type=int, default=64, help="Concurrent requests for --servers")
+        parser.add_argument("--server-requests", type=int, default=1000, help="Requests per server for --servers")
+        parser.add_argument("--output", help="Write results as JSON to this file")
+        parser.add_argument("--thresholds", default=str(THRESHOLDS_PATH))
+        parser.add_argument("--check", action="store_true", help="Fail if thresholds are exceeded")
+
+    def handle(self, *args, **options):
+        sizes = dict(SCALES[options["scale"]])
+        for entity in sizes:
+            if options[entity] is not None:
+                sizes[entity] = options[entity]
+
+        results = {
+            "started_at": timezone.now().isoformat(),
+            "scale": sizes,
+            "python": platform.python_version(),
+            "database": connections["default"].vendor,
+        }
+        setup_test_environment()
+        try:
+            with temporary_database():
+                with Timer() as timer:
+                    dataset = seed_dataset(**sizes)
+                results["seed_seconds"] = round(timer.elapsed, 2)
+                self.stdout.write(f"Seeded {sizes} in {timer.elapsed:.1f}s")
+
+                results["micro"] = run_micro(BenchContext(dataset), options["iterations"], options["only"])
+                self.report_micro(results["micro"])
+
+                if not options["skip_load"]:
+                    results["load"] = run_load(dataset, options["mix"], options["threads"], options["requests"])
+                    self.report_load(results["load"])
+
+                if options["servers"]:
+                    results["servers"] = run_servers(dataset, options["concurrency"], options["server_requests"])
+                    self.report_servers(results["servers"])
+        finally:
+            teardown_test_environment()
+
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as fh:
+                json.dump(results, fh, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+
+        if options["check"]:
+            with open(options["thresholds"], encoding="utf-8") as fh:
+                failures = check_thresholds(results, json.load(fh))
+            if failures:
+                for failure in failures:
+                    self.stderr.write(self.style.ERROR(failure))
+                raise CommandError(f"{len(failures)} benchmark threshold(s) exceeded")
+            self.stdout.write(self.style.SUCCESS("All benchmark thresholds met"))
+
+    def report_micro(self, micro):
+        self.stdout.write(f"\n{'endpoint':<24}{'p50 ms':>9}{'p95 ms':>9}{'queries':>9}{'alloc KiB':>11}  status")
+        for name, stats in micro.items():
+            self.stdout.write(
+                f"{name:<24}{stats['p50_ms']:>9}{stats['p95_ms']:>9}{stats['queries']:>9}"
+                f"{stats['alloc_peak_kib']:>11}  {','.join(map(str, stats['statuses']))}"
+            )
+
+    def report_load(self, load):
+        self.stdout.write(
+            f"\nLoad mix '{load['mix']}' x{load['threads']} threads: {load['ops']} requests, "
+            f"{load['ops_per_sec']} req/s, p50={load['p50_ms']}ms p95={load['p95_ms']}ms errors={load['errors']}"
+        )
+        for sample in load["error_samples"]:
+            self.stderr.write(f"  {sample}")
+        sys.stdout.flush()
+
+    def report_servers(self, servers):
+        self.stdout.write(f"\nHot reads x{servers['concurrency']} concurrent, {servers['requests']} requests each:")
+        for server in ("wsgi", "asgi_sync", "asgi"):
+            stats = servers[server]
+            self.stdout.write(
+                f"  {server:<10}{stats['ops_per_sec']} req/s, p50={stats['p50_ms']}ms "
+                f"p95={stats['p95_ms']}ms errors={stats['errors']}"
+            )
+            for sample in stats["error_samples"]:
+                self.stderr.write(f"    {sample}")
+        self.stdout.write(f"  async speedup: {servers['asgi_speedup']}x")
@@ -0,0 +1,48 @@
+"""Import a seller's inventory from a CSV or NDJSON file.
+
+    python manage.py import_inventory stock.csv --seller ash
+    python manage.py import_inventory stock.ndjson --seller ash --batch-size 1000
+
+The format is taken from the file extension unless ``--format`` is given.
+Rows that fail validation are reported and skipped; the rest are inserted.
+"""
+
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from store.inventory import import_inventory, parse_inventory
+
+
+class Command(BaseCommand):
+    help = "Bulk-create listings for a seller from a CSV or NDJSON inventory file."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--seller", required=True, help="Username that will own the listings")
+        parser.add_argument("--format", choices=("csv", "ndjson"))
+        parser.add_argument("--batch-size", type=int, default=settings.INVENTORY_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        path = Path(options["path"])
+        fmt = options["format"] or ("csv" if path.suffix == ".csv" else "ndjson")
+        try:
+            seller = get_user_model().objects.get(username=options["seller"])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"Unknown seller {options['seller']!r}")
+        try:
+            text = path.read_text(encoding="utf-8-sig")
+        except OSError as exc:
+            raise CommandError(str(exc))
+
+        for event in import_inventory(seller, parse_inventory(text, fmt), batch_size=options["batch_size"]):
+            if "error" in event:
+                self.stderr.write(f"line {event['line']}: {event['error']}")
+            elif "processed" in event:
+                self.stdout.write(f"{event['processed']}/{event['total']} listings created")
+            else:
+                self.stdout.write(self.style.SUCCESS(
+                    f"Imported {event['created']} listings ({event['errors']} rows rejected)"
+                ))
@@ -0,0 +1,41 @@
+"""Normalize listing statuses, flip empty listings to Sold Out and retire stale ones.
+
+Intended to run from cron, e.g. every 15 minutes:
+
+    */15 * * * * cd /srv/pokemart && python manage.py maintain_listings
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from store.maintenance import run_maintenance
+
+
+class Command(BaseCommand):
+    help = "Bulk-update listing statuses (legacy values, sold out, restocked, stale) in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            help="Listings updated per statement (defaults to LISTING_MAINTENANCE_BATCH_SIZE)",
+        )
+        parser.add_argument(
+            "--stale-days",
+            type=int,
+            help="Deactivate unsold listings older than this (defaults to LISTING_STALE_DAYS)",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report how many listings each task would change",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            results = run_maintenance(options["batch_size"], options["stale_days"], options["dry_run"])
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        verb = "would change" if options["dry_run"] else "changed"
+        for task, count in results.items():
+            self.stdout.write(f"{task}: {verb} {count} listings")
+        self.stdout.write(self.style.SUCCESS(f"Listing maintenance done ({sum(results.values())} total)"))
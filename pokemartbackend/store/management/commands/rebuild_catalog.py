@@ -0,0 +1,22 @@
+"""Rebuild the ListingCatalogEntry read model from Listings, Card and User.
+
+Run it after bulk listing changes that bypass model signals (raw SQL,
+``queryset.update()``, ``bulk_create()``), or to repair drift:
+
+    python manage.py rebuild_catalog --batch-size 2000
+"""
+
+from django.core.management.base import BaseCommand
+
+from store.catalog import rebuild_catalog
+
+
+class Command(BaseCommand):
+    help = "Re-copy every listing into the denormalized catalog table."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000, help="Listings refreshed per upsert")
+
+    def handle(self, *args, **options):
+        written = rebuild_catalog(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Catalog rebuilt: {written} entries"))
@@ -0,0 +1,78 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:21
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_catalog(apps, schema_editor):
+    Listings = apps.get_model('store', 'Listings')
+    ListingCatalogEntry = apps.get_model('store', 'ListingCatalogEntry')
+    db = schema_editor.connection.alias
+    rows = (
+        Listings.objects.using(db)
+        .values(
+            'id', 'seller_id', 'seller__username', 'card_id_id', 'card_id__name', 'card_id__collection',
+            'card_id__rarity', 'card_id__image_url', 'card_id__recommended_price',
+            'price', 'quantity', 'condition', 'status', 'description', 'created_at',
+        )
+        .iterator(chunk_size=1000)
+    )
+    batch = []
+    for row in rows:
+        batch.append(ListingCatalogEntry(
+            listing_id=row['id'],
+            seller_id=row['seller_id'],
+            seller_username=row['seller__username'],
+            card_id=row['card_id_id'],
+            card_name=row['card_id__name'],
+            card_collection=row['card_id__collection'],
+            card_rarity=row['card_id__rarity'],
+            card_image_url=row['card_id__image_url'],
+            card_recommended_price=row['card_id__recommended_price'],
+            price=row['price'],
+            quantity=row['quantity'],
+            condition=row['condition'],
+            status=row['status'],
+            description=row['description'],
+            created_at=row['created_at'],
+        ))
+        if len(batch) == 1000:
+            ListingCatalogEntry.objects.using(db).bulk_create(batch)
+            batch = []
+    ListingCatalogEntry.objects.using(db).bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0004_alter_orders_status_message'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ListingCatalogEntry',
+            fields=[
+                ('listing', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='catalog_entry', serialize=False, to='store.listings')),
+                ('seller_username', models.CharField(max_length=150)),
+                ('card_name', models.CharField(max_length=100)),
+                ('card_collection', models.CharField(max_length=100)),
+                ('card_rarity', models.CharField(max_length=50)),
+                ('card_image_url', models.URLField()),
+                ('card_recommended_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('quantity', models.IntegerField(default=0)),
+                ('condition', models.CharField(max_length=50)),
+                ('status', models.CharField(max_length=45)),
+                ('description', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField()),
+                ('card', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='store.card')),
+                ('seller', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', '-created_at'], name='catalog_status_created_idx'), models.Index(fields=['status', 'price'], name='catalog_status_price_idx'), models.Index(fields=['card_rarity', 'status'], name='catalog_rarity_idx'), models.Index(fields=['card_collection', 'status'], name='catalog_collection_idx'), models.Index(fields=['condition', 'status'], name='catalog_condition_idx'), models.Index(fields=['seller_username', 'status', '-created_at'], name='catalog_seller_name_idx'), models.Index(fields=['seller', 'status'], name='catalog_seller_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_catalog, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:28
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def normalize_legacy_statuses(apps, schema_editor):
+    # Lets queries filter on status="Available" instead of status__in=[...].
+    db = schema_editor.connection.alias
+    for model_name in ('Listings', 'ListingCatalogEntry'):
+        model = apps.get_model('store', model_name)
+        model.objects.using(db).filter(status='Disponible').update(status='Available')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0005_listingcatalogentry'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='listings',
+            index=models.Index(fields=['status', 'quantity'], name='listing_status_quantity_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='listings',
+            index=models.Index(fields=['status', 'created_at'], name='listing_status_created_idx'),
+        ),
+        migrations.RunPython(normalize_legacy_statuses, migrations.RunPython.noop),
+    ]
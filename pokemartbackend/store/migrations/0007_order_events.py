@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:31
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0006_listing_status_maintenance'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderEvent',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('kind', models.CharField(choices=[('created', 'Created'), ('status_changed', 'Status changed'), ('items_changed', 'Items changed')], max_length=20)),
+                ('from_status', models.CharField(blank=True, default='', max_length=45)),
+                ('to_status', models.CharField(blank=True, default='', max_length=45)),
+                ('data', models.JSONField(blank=True, default=dict)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('actor', models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('order', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='events', to='store.orders')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['order', 'created_at'], name='order_event_order_idx'), models.Index(fields=['kind', 'created_at'], name='order_event_kind_idx')],
+            },
+        ),
+    ]
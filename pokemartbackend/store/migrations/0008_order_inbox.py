@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:36
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0007_order_events'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderInbox',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('last_read_message_id', models.BigIntegerField(default=0)),
+                ('unread_count', models.IntegerField(default=0)),
+                ('last_message_id', models.BigIntegerField(blank=True, null=True)),
+                ('last_message_sender', models.CharField(blank=True, default='', max_length=150)),
+                ('last_message_preview', models.CharField(blank=True, default='', max_length=140)),
+                ('last_message_at', models.DateTimeField(blank=True, null=True)),
+                ('order', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='inboxes', to='store.orders')),
+                ('user', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', '-last_message_at'], name='order_inbox_user_idx')],
+                'constraints': [models.UniqueConstraint(fields=('order', 'user'), name='order_inbox_order_user_uniq')],
+            },
+        ),
+    ]
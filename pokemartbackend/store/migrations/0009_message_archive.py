@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:39
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0008_order_inbox'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MessageArchive',
+            fields=[
+                ('order', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='message_archive', serialize=False, to='store.orders')),
+                ('data', models.BinaryField()),
+                ('message_count', models.IntegerField(default=0)),
+                ('last_message_id', models.BigIntegerField()),
+                ('archived_at', models.DateTimeField()),
+            ],
+        ),
+    ]
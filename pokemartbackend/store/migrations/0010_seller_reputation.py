@@ -0,0 +1,61 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:57
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, F, Q
+
+
+def backfill_reputation(apps, schema_editor):
+    Reviews = apps.get_model('store', 'Reviews')
+    SellerReputation = apps.get_model('store', 'SellerReputation')
+    db = schema_editor.connection.alias
+    histogram = {f'rating_{rating}': Count('id', distinct=True, filter=Q(rating=rating)) for rating in range(1, 6)}
+    rows = (
+        Reviews.objects.using(db)
+        .values(seller=F('order_id__order_details__listing_id__seller_id'))
+        .filter(seller__isnull=False)
+        .annotate(review_count=Count('id', distinct=True), **histogram)
+        .order_by()
+    )
+    SellerReputation.objects.using(db).bulk_create(
+        [
+            SellerReputation(
+                seller_id=row.pop('seller'),
+                rating_total=sum(rating * row[f'rating_{rating}'] for rating in range(1, 6)),
+                **row,
+            )
+            for row in rows
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0009_message_archive'),
+        ('users', '0002_user_avatar_url'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SellerReputation',
+            fields=[
+                ('seller', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='reputation', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('review_count', models.IntegerField(default=0)),
+                ('rating_total', models.IntegerField(default=0)),
+                ('rating_1', models.IntegerField(default=0)),
+                ('rating_2', models.IntegerField(default=0)),
+                ('rating_3', models.IntegerField(default=0)),
+                ('rating_4', models.IntegerField(default=0)),
+                ('rating_5', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='listingcatalogentry',
+            name='seller_reputation',
+            field=models.ForeignObject(from_fields=['seller'], null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='store.sellerreputation', to_fields=['seller']),
+        ),
+        migrations.RunPython(backfill_reputation, migrations.RunPython.noop),
+    ]
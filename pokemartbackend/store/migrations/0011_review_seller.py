@@ -0,0 +1,53 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:01
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Q, Subquery, Sum
+
+
+def backfill_review_seller(apps, schema_editor):
+    Order_details = apps.get_model('store', 'Order_details')
+    Reviews = apps.get_model('store', 'Reviews')
+    SellerReputation = apps.get_model('store', 'SellerReputation')
+    db = schema_editor.connection.alias
+    first_seller = (
+        Order_details.objects.using(db)
+        .filter(order_id=OuterRef('order_id'))
+        .order_by('id')
+        .values('listing_id__seller_id')[:1]
+    )
+    Reviews.objects.using(db).update(seller_id=Subquery(first_seller))
+
+    # Reputation now counts each review for that seller only.
+    histogram = {f'rating_{rating}': Count('id', filter=Q(rating=rating)) for rating in range(1, 6)}
+    rows = (
+        Reviews.objects.using(db)
+        .filter(seller__isnull=False)
+        .values('seller_id')
+        .annotate(review_count=Count('id'), rating_total=Sum('rating'), **histogram)
+        .order_by()
+    )
+    SellerReputation.objects.using(db).all().delete()
+    SellerReputation.objects.using(db).bulk_create([SellerReputation(**row) for row in rows], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0010_seller_reputation'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reviews',
+            name='seller',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='received_reviews', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='reviews',
+            index=models.Index(fields=['seller', '-created_at', '-id'], name='review_seller_created_idx'),
+        ),
+        migrations.RunPython(backfill_review_seller, migrations.RunPython.noop),
+    ]
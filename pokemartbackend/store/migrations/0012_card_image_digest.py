@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0011_review_seller'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='card',
+            name='image_digest',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+    ]
@@ -47,6 +47,12 @@ class Listings(models.Model):
     status = models.CharField(max_length=45)
     description = models.TextField(blank=True, null=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'quantity'], name='listing_status_quantity_idx'),
+            models.Index(fields=['status', 'created_at'], name='listing_status_created_idx'),
+        ]
+
     def __str__(self):
         return f"Listings(id={self.id}, seller={self.seller}, card_id={self.card_id}, price={self.price}, quantity={self.quantity})"
     
@@ -71,18 +77,67 @@ class Card(models.Model):
     rarity = models.CharField(max_length=50)
     image_url = models.URLField(max_length=200)
     recommended_price = models.DecimalField(max_digits=10, decimal_places=2)
+    # SHA-256 of the cached copy of image_url; see store.images.
+    image_digest = models.CharField(max_length=64, blank=True, default='')
+    # Filled in when the image is prefetched (getdata.py --prefetch-images).
+    image_width = models.PositiveIntegerField(null=True, blank=True)
+    image_height = models.PositiveIntegerField(null=True, blank=True)
+    image_blurhash = models.CharField(max_length=64, blank=True, default='')
 
     def __str__(self):
         return f"Card(id={self.id}, name={self.name}, collection={self.collection}, rarity={self.rarity})"
 
 
+class OrderEvent(models.Model):
+    """Append-only history of an order, written by store.orders."""
+
+    CREATED = 'created'
+    STATUS_CHANGED = 'status_changed'
+    ITEMS_CHANGED = 'items_changed'
+    KIND = [
+        (CREATED, 'Created'),
+        (STATUS_CHANGED, 'Status changed'),
+        (ITEMS_CHANGED, 'Items changed'),
+        ]
+
+    id = models.BigAutoField(primary_key=True)
+    order = models.ForeignKey('Orders', on_delete=models.CASCADE, related_name='events', db_index=False)
+    actor = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, related_name='+', db_index=False)
+    kind = models.CharField(max_length=20, choices=KIND)
+    from_status = models.CharField(max_length=45, blank=True, default='')
+    to_status = models.CharField(max_length=45, blank=True, default='')
+    data = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['order', 'created_at'], name='order_event_order_idx'),
+            models.Index(fields=['kind', 'created_at'], name='order_event_kind_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError("OrderEvent rows are append-only.")
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"OrderEvent(id={self.id}, order_id={self.order_id}, kind={self.kind}, to_status={self.to_status})"
+
 class Reviews(models.Model):
     id = models.AutoField(primary_key=True)
     order_id = models.OneToOneField('Orders', on_delete=models.CASCADE, related_name='review')
+    # Seller of the order's first line, copied at creation so seller pages
+    # never join through Order_details and Listings.
+    seller = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='received_reviews', db_index=False)
     rating = models.IntegerField()
     comment = models.TextField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['seller', '-created_at', '-id'], name='review_seller_created_idx'),
+        ]
+
     def __str__(self):
         return f"Reviews(id={self.id}, order_id={self.order_id}, rating={self.rating})"
 
@@ -94,4 +149,103 @@ class Message(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
-        return f"Message(id={self.id}, sender={self.sender.username}, order_id={self.order.id})"
\ No newline at end of file
+        return f"Message(id={self.id}, sender={self.sender.username}, order_id={self.order.id})"
+
+class MessageArchive(models.Model):
+    """Chat history of a closed order moved out of store_message; see store.archive."""
+    order = models.OneToOneField('Orders', on_delete=models.CASCADE, primary_key=True, related_name='message_archive')
+    data = models.BinaryField()  # gzip-compressed NDJSON, one encoded message per line
+    message_count = models.IntegerField(default=0)
+    last_message_id = models.BigIntegerField()
+    archived_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"MessageArchive(order_id={self.order_id}, messages={self.message_count})"
+
+class OrderInbox(models.Model):
+    """A participant's read cursor and unread counter for one order's chat.
+
+    Maintained by store.inbox when messages are posted or read.
+    """
+    id = models.BigAutoField(primary_key=True)
+    order = models.ForeignKey('Orders', on_delete=models.CASCADE, related_name='inboxes', db_index=False)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+', db_index=False)
+    last_read_message_id = models.BigIntegerField(default=0)
+    unread_count = models.IntegerField(default=0)
+    last_message_id = models.BigIntegerField(null=True, blank=True)
+    last_message_sender = models.CharField(max_length=150, blank=True, default='')
+    last_message_preview = models.CharField(max_length=140, blank=True, default='')
+    last_message_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['order', 'user'], name='order_inbox_order_user_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['user', '-last_message_at'], name='order_inbox_user_idx'),
+        ]
+
+    def __str__(self):
+        return f"OrderInbox(order_id={self.order_id}, user_id={self.user_id}, unread={self.unread_count})"
+
+class ListingCatalogEntry(models.Model):
+    """Join-free copy of what catalog pages show for a listing.
+
+    Maintained by store.catalog from listing, card and user changes; do not
+    write to it directly.
+    """
+    listing = models.OneToOneField('Listings', on_delete=models.CASCADE, primary_key=True, related_name='catalog_entry')
+    seller = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+', db_index=False)
+    seller_username = models.CharField(max_length=150)
+    card = models.ForeignKey('Card', on_delete=models.CASCADE, related_name='+')
+    card_name = models.CharField(max_length=100)
+    card_collection = models.CharField(max_length=100)
+    card_rarity = models.CharField(max_length=50)
+    card_image_url = models.URLField(max_length=200)
+    card_recommended_price = models.DecimalField(max_digits=10, decimal_places=2)
+    card_image_width = models.PositiveIntegerField(null=True)
+    card_image_height = models.PositiveIntegerField(null=True)
+    card_image_blurhash = models.CharField(max_length=64, blank=True, default='')
+    price = models.DecimalField(max_digits=10, decimal_places=2)
+    quantity = models.IntegerField(default=0)
+    condition = models.CharField(max_length=50)
+    status = models.CharField(max_length=45)
+    description = models.TextField(blank=True, null=True)
+    created_at = models.DateTimeField()
+    # No column of its own: joins seller_id straight to the seller's reputation.
+    seller_reputation = models.ForeignObject(
+        'SellerReputation', on_delete=models.DO_NOTHING, from_fields=['seller'], to_fields=['seller'],
+        related_name='+', null=True,
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', '-created_at'], name='catalog_status_created_idx'),
+            models.Index(fields=['status', 'price'], name='catalog_status_price_idx'),
+            models.Index(fields=['card_rarity', 'status'], name='catalog_rarity_idx'),
+            models.Index(fields=['card_collection', 'status'], name='catalog_collection_idx'),
+            models.Index(fields=['condition', 'status'], name='catalog_condition_idx'),
+            models.Index(fields=['seller_username', 'status', '-created_at'], name='catalog_seller_name_idx'),
+            models.Index(fields=['seller', 'status'], name='catalog_seller_idx'),
+        ]
+
+    def __str__(self):
+        return f"ListingCatalogEntry(listing_id={self.listing_id}, card={self.card_name}, seller={self.seller_username})"
+
+class SellerReputation(models.Model):
+    """Review count, rating total and 1-5 histogram of a seller.
+
+    Maintained by store.reputation when reviews are created; rebuild it with
+    ``python manage.py backfill_reputation``.
+    """
+    seller = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True, related_name='reputation')
+    review_count = models.IntegerField(default=0)
+    rating_total = models.IntegerField(default=0)
+    rating_1 = models.IntegerField(default=0)
+    rating_2 = models.IntegerField(default=0)
+    rating_3 = models.IntegerField(default=0)
+    rating_4 = models.IntegerField(default=0)
+    rating_5 = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"SellerReputation(seller_id={self.seller_id}, reviews={self.review_count})"
@@ -0,0 +1,233 @@
+"""Order lifecycle: allowed status transitions and the OrderEvent log.
+
+Status changes go through ``change_status``, which locks the order row,
+checks the transition and who is asking, and appends an OrderEvent in the
+same transaction. Negotiation edits (``add_item`` / ``remove_item``) work
+the same way and move ``total_price`` by the item's delta with a single
+``F()`` update, so concurrent edits can never write a stale total:
+
+    Pendiente ──> En proceso ──> Completado
+        │              │
+        └──────────────┴───────> Cancelado
+
+Every batch of new events is announced through the ``order_events`` signal
+(``events=[OrderEvent, ...]``, each with a transient ``sellers`` set), so
+consumers react to what changed instead of rescanning orders. Receivers run
+inside the writer's transaction. The built-in ones reserve stock when an
+order is placed, release it when the order is cancelled, and retire the
+cached stats of everyone involved.
+"""
+
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.dispatch import Signal
+
+from .inventory import adjust_stock
+from .models import Listings, OrderEvent, Order_details, Orders
+
+# Status -> statuses it may move to. "Finalizado" is the legacy name of
+# Completado; both are final, like Cancelado.
+TRANSITIONS = {
+    "Pendiente": {"En proceso", "Cancelado"},
+    "En proceso": {"Completado", "Cancelado"},
+    "Completado": set(),
+    "Cancelado": set(),
+    "Finalizado": set(),
+}
+
+VERSION_KEY = "orders:version:{}"
+
+order_events = Signal()
+
+
+class OrderError(Exception):
+    """A rejected order change; ``status`` is the HTTP status to answer with."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def orders_version(user_id):
+    """Changes whenever an order the user buys or sells in gets an event."""
+    key = VERSION_KEY.format(user_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def order_sellers(order_id):
+    return set(Order_details.objects.filter(order_id=order_id).values_list("listing_id__seller_id", flat=True))
+
+
+def _announce(events):
+    OrderEvent.objects.bulk_create(events)
+    order_events.send(sender=OrderEvent, events=events)
+
+
+def orders_placed(placed, actor):
+    """Log and announce new orders; ``placed`` is ``[(order, details), ...]``.
+
+    The details must have their listings loaded (no query is made for them).
+    """
+    events = []
+    for order, details in placed:
+        items = {}
+        for detail in details:
+            key = str(detail.listing_id.pk)
+            items[key] = items.get(key, 0) + detail.quantity
+        event = OrderEvent(
+            order=order, actor=actor, kind=OrderEvent.CREATED, to_status=order.status, data={"items": items},
+        )
+        event.sellers = {detail.listing_id.seller_id for detail in details}
+        events.append(event)
+    _announce(events)
+    return events
+
+
+def change_status(order_id, new_status, user):
+    """Move the order to ``new_status`` on behalf of ``user``; returns the order.
+
+    Sellers of the order may take any allowed transition, the buyer may only
+    cancel. Asking for the current status is a no-op. Raises OrderError.
+    """
+    if new_status not in TRANSITIONS:
+        raise OrderError(f"Estado desconocido: {new_status}.")
+    with transaction.atomic():
+        order = Orders.objects.select_for_update().get(id=order_id)
+        sellers = order_sellers(order.pk)
+        if user.pk not in sellers and not (order.buyer_id_id == user.pk and new_status == "Cancelado"):
+            raise OrderError("No tienes permiso para realizar esta acción.", status=403)
+        if new_status == order.status:
+            return order
+        if new_status not in TRANSITIONS.get(order.status, ()):
+            raise OrderError(f"No se puede pasar de {order.status} a {new_status}.", status=409)
+
+        event = OrderEvent(
+            order=order, actor=user, kind=OrderEvent.STATUS_CHANGED, from_status=order.status, to_status=new_status,
+        )
+        event.sellers = sellers
+        order.status = new_status
+        order.save(update_fields=["status"])
+        _announce([event])
+    return order
+
+
+OPEN_STATUSES = {status for status, following in TRANSITIONS.items() if following}
+
+
+def _lock_for_edit(order_id, user):
+    """Lock the order and load its details as (id, listing, seller, quantity, unit_price) rows."""
+    order = Orders.objects.select_for_update().get(id=order_id)
+    rows = list(
+        Order_details.objects.filter(order_id=order.pk).values_list(
+            "id", "listing_id_id", "listing_id__seller_id", "quantity", "unit_price",
+        )
+    )
+    sellers = {row[2] for row in rows}
+    if user.pk not in sellers and order.buyer_id_id != user.pk:
+        raise OrderError("No tienes permiso para realizar esta acción.", status=403)
+    if order.status not in OPEN_STATUSES:
+        raise OrderError("La negociación ya está cerrada.", status=409)
+    return order, rows, sellers
+
+
+def _items_changed(order, user, listing_id, quantity, delta, sellers):
+    """Move the order total by ``delta`` and log the change of ``quantity`` units."""
+    Orders.objects.filter(pk=order.pk).update(total_price=F("total_price") + delta)
+    # The row is locked, so the total we read plus our delta is what was stored.
+    order.total_price += delta
+    event = OrderEvent(
+        order=order, actor=user, kind=OrderEvent.ITEMS_CHANGED, from_status=order.status, to_status=order.status,
+        data={"listing_id": listing_id, "quantity": quantity, "total_delta": str(delta)},
+    )
+    event.sellers = sellers
+    _announce([event])
+
+
+def add_item(order_id, listing_id, quantity, user):
+    """Add ``quantity`` units of a listing to the order; returns the order."""
+    if quantity < 1:
+        raise OrderError("La cantidad debe ser al menos 1.")
+    with transaction.atomic():
+        order, rows, sellers = _lock_for_edit(order_id, user)
+        listing = Listings.objects.only("id", "seller_id", "price").get(id=listing_id)
+        existing = next((row for row in rows if row[1] == listing.pk), None)
+        if existing:
+            detail_id, unit_price = existing[0], existing[4]
+            Order_details.objects.filter(pk=detail_id).update(quantity=F("quantity") + quantity)
+        else:
+            unit_price = listing.price
+            Order_details.objects.create(order_id=order, listing_id=listing, quantity=quantity, unit_price=unit_price)
+        _items_changed(order, user, listing.pk, quantity, unit_price * quantity, sellers | {listing.seller_id})
+    return order
+
+
+def remove_item(order_id, detail_id, user):
+    """Drop one detail line from the order; the order must keep at least one."""
+    with transaction.atomic():
+        order, rows, sellers = _lock_for_edit(order_id, user)
+        removed = next((row for row in rows if row[0] == detail_id), None)
+        if removed is None:
+            raise Order_details.DoesNotExist("Order_details matching query does not exist.")
+        if len(rows) <= 1:
+            raise OrderError("La negociación debe tener al menos una carta.")
+        _, listing_id, _, quantity, unit_price = removed
+        Order_details.objects.filter(pk=detail_id).delete()
+        _items_changed(order, user, listing_id, -quantity, -unit_price * quantity, sellers)
+    return order
+
+
+# ─── Built-in receivers ───────────────────────────────────────────────────────
+
+def move_stock(sender, events, **kwargs):
+    """Take stock when an order is placed or grows, give it back on cancel or removal."""
+    deltas = {}
+
+    def add(listing_id, units):
+        deltas[int(listing_id)] = deltas.get(int(listing_id), 0) + units
+
+    for event in events:
+        if event.kind == OrderEvent.CREATED:
+            for listing_id, quantity in event.data["items"].items():
+                add(listing_id, -quantity)
+    edited = [event for event in events if event.kind == OrderEvent.ITEMS_CHANGED]
+    cancelled = [
+        event.order_id for event in events
+        if event.kind == OrderEvent.STATUS_CHANGED and event.to_status == "Cancelado"
+    ]
+    # Orders placed before reservations existed never took stock.
+    reservations = OrderEvent.objects.filter(kind=OrderEvent.CREATED)
+    if edited:
+        reserved = set(
+            reservations.filter(order_id__in={event.order_id for event in edited}).values_list("order_id", flat=True)
+        )
+        for event in edited:
+            if event.order_id in reserved:
+                add(event.data["listing_id"], -event.data["quantity"])
+    if cancelled:
+        rows = Order_details.objects.filter(
+            order_id__in=reservations.filter(order_id__in=cancelled).values("order_id"),
+        ).values_list("listing_id_id", "quantity")
+        for listing_id, quantity in rows:
+            add(listing_id, quantity)
+    adjust_stock(deltas)
+
+
+def retire_cached_stats(sender, events, **kwargs):
+    users = set()
+    for event in events:
+        users.add(event.order.buyer_id_id)
+        users.update(event.sellers)
+    now = time.time_ns()
+    cache.set_many({VERSION_KEY.format(user_id): now for user_id in users}, None)
+
+
+def connect_receivers():
+    order_events.connect(move_stock, dispatch_uid="orders_move_stock")
+    order_events.connect(retire_cached_stats, dispatch_uid="orders_retire_cached_stats")
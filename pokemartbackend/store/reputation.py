@@ -0,0 +1,110 @@
+"""Seller reputation: review count, rating total and 1-5 histogram.
+
+A review rates the seller stored on it (the seller of the order's first
+line, see ``first_seller``). ``review_created`` moves that seller's
+SellerReputation row with a single UPDATE of ``F()`` increments, so listing
+and seller payloads read the aggregate through one join instead of walking
+reviews → orders → details → listings on every render.
+``rebuild_reputation`` recomputes every row from Reviews with one GROUP BY
+query; run it through ``python manage.py backfill_reputation``.
+
+``seller_reviews`` pages through a seller's reviews, newest first, on the
+(seller, created_at, id) index with a keyset cursor instead of an offset.
+"""
+
+import base64
+from datetime import datetime
+
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery, Sum
+
+from .catalog import forget_listings
+from .models import ListingCatalogEntry, Order_details, Reviews, SellerReputation
+from .serializers import HISTOGRAM_FIELDS, RATINGS, REVIEW_FIELDS
+
+
+def _increments(rating):
+    return {
+        "review_count": F("review_count") + 1,
+        "rating_total": F("rating_total") + rating,
+        f"rating_{rating}": F(f"rating_{rating}") + 1,
+    }
+
+
+def first_seller(order_ref="pk"):
+    """Subquery: the seller of the first line of the order at ``order_ref``."""
+    lines = Order_details.objects.filter(order_id=OuterRef(order_ref)).order_by("id")
+    return Subquery(lines.values("listing_id__seller_id")[:1])
+
+
+def review_created(review):
+    """Count ``review`` in the reputation of its seller."""
+    if review.seller_id is None:
+        return
+    # Empty row first, so concurrent first reviews of a seller both count.
+    SellerReputation.objects.bulk_create([SellerReputation(seller_id=review.seller_id)], ignore_conflicts=True)
+    SellerReputation.objects.filter(seller_id=review.seller_id).update(**_increments(review.rating))
+    # Cached listing payloads carry the seller's reputation.
+    forget_listings(
+        ListingCatalogEntry.objects.filter(seller_id=review.seller_id).values_list("listing_id", flat=True)
+    )
+
+
+def reputation_rows():
+    """{seller_id: {field: value}} computed from Reviews in one GROUP BY query."""
+    rows = (
+        Reviews.objects.filter(seller__isnull=False)
+        .values("seller_id")
+        .annotate(
+            review_count=Count("id"),
+            rating_total=Sum("rating"),
+            **{field: Count("id", filter=Q(rating=rating)) for rating, field in zip(RATINGS, HISTOGRAM_FIELDS)},
+        )
+        .order_by()
+    )
+    return {row.pop("seller_id"): row for row in rows}
+
+
+def rebuild_reputation(batch_size=1000):
+    """Replace every SellerReputation row with one computed from Reviews; returns rows written."""
+    with transaction.atomic():
+        rows = reputation_rows()
+        SellerReputation.objects.exclude(seller_id__in=list(rows)).delete()
+        SellerReputation.objects.bulk_create(
+            [SellerReputation(seller_id=seller_id, **values) for seller_id, values in rows.items()],
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=["seller"],
+            update_fields=["review_count", "rating_total", *HISTOGRAM_FIELDS],
+        )
+    forget_listings(ListingCatalogEntry.objects.filter(seller_id__in=list(rows)).values_list("listing_id", flat=True))
+    return len(rows)
+
+
+def encode_cursor(row):
+    raw = f"{row['created_at'].isoformat()}|{row['id']}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor):
+    """(created_at, id) of the last review of the previous page; ValueError when malformed."""
+    try:
+        created_at, review_id = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8").split("|")
+        return datetime.fromisoformat(created_at), int(review_id)
+    except ValueError as exc:
+        raise ValueError("Invalid cursor.") from exc
+
+
+def seller_reviews(username, cursor=None, limit=20):
+    """One page of the seller's reviews, newest first, and the cursor of the next page (None at the end).
+
+    Raises ValueError on a malformed cursor.
+    """
+    reviews = Reviews.objects.filter(seller__username=username)
+    if cursor:
+        created_at, review_id = decode_cursor(cursor)
+        reviews = reviews.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=review_id))
+    # One extra row tells whether another page follows.
+    rows = list(reviews.order_by("-created_at", "-id").values(*REVIEW_FIELDS)[:limit + 1])
+    next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return rows[:limit], next_cursor
@@ -0,0 +1,290 @@
+"""Compact encoders for store payloads.
+
+Each ``*_FIELDS`` tuple is meant for ``queryset.values(*FIELDS)`` and the
+matching ``encode_*`` function turns one such row into the public payload.
+Rows are plain dicts, so no model instances are built, and Decimal and
+datetime values are passed through for pokemartbackend.http.JsonResponse to
+encode.
+"""
+
+CARD_FIELDS = (
+    "id", "name", "collection", "rarity", "image_url", "recommended_price",
+    "image_width", "image_height", "image_blurhash",
+)
+
+
+def prefixed(prefix, fields):
+    return tuple(prefix + field for field in fields)
+
+
+def encode_card(row, prefix=""):
+    return {field: row[prefix + field] for field in CARD_FIELDS}
+
+
+LISTING_FIELDS = (
+    "id", "price", "quantity", "condition", "status", "description", "created_at",
+    "seller__id", "seller__username",
+    *prefixed("card_id__", CARD_FIELDS),
+)
+
+
+def encode_listing(row):
+    return {
+        "id": row["id"],
+        "seller": {"id": row["seller__id"], "username": row["seller__username"]},
+        "card": encode_card(row, "card_id__"),
+        "price": row["price"],
+        "quantity": row["quantity"],
+        "condition": row["condition"],
+        "status": row["status"],
+        "description": row["description"],
+        "created_at": row["created_at"],
+    }
+
+
+RATINGS = range(1, 6)
+HISTOGRAM_FIELDS = tuple(f"rating_{rating}" for rating in RATINGS)
+REPUTATION_FIELDS = ("review_count", "rating_total", *HISTOGRAM_FIELDS)
+
+
+def encode_reputation(row, prefix=""):
+    """Reputation from SellerReputation columns; a seller without reviews has no row (all None)."""
+    count = row[prefix + "review_count"] or 0
+    return {
+        "reviews": count,
+        "average": round(row[prefix + "rating_total"] / count, 2) if count else None,
+        "histogram": {str(rating): row[prefix + field] or 0 for rating, field in zip(RATINGS, HISTOGRAM_FIELDS)},
+    }
+
+
+# Catalog reads come from ListingCatalogEntry; the seller's reputation is
+# its only join.
+CATALOG_FIELDS = (
+    "listing_id", "price", "quantity", "condition", "status", "description", "created_at",
+    "seller_id", "seller_username",
+    "card_id", "card_name", "card_collection", "card_rarity", "card_image_url", "card_recommended_price",
+    "card_image_width", "card_image_height", "card_image_blurhash",
+    *prefixed("seller_reputation__", REPUTATION_FIELDS),
+)
+
+
+def encode_catalog_listing(row):
+    """Same payload as encode_listing, built from a catalog row, plus the seller's reputation."""
+    return {
+        "id": row["listing_id"],
+        "seller": {
+            "id": row["seller_id"],
+            "username": row["seller_username"],
+            "reputation": encode_reputation(row, "seller_reputation__"),
+        },
+        "card": {
+            "id": row["card_id"],
+            "name": row["card_name"],
+            "collection": row["card_collection"],
+            "rarity": row["card_rarity"],
+            "image_url": row["card_image_url"],
+            "recommended_price": row["card_recommended_price"],
+            "image_width": row["card_image_width"],
+            "image_height": row["card_image_height"],
+            "image_blurhash": row["card_image_blurhash"],
+        },
+        "price": row["price"],
+        "quantity": row["quantity"],
+        "condition": row["condition"],
+        "status": row["status"],
+        "description": row["description"],
+        "created_at": row["created_at"],
+    }
+
+
+FEED_LISTING_FIELDS = (
+    "listing_id", "price", "condition", "created_at", "seller_username",
+    "card_name", "card_image_url", "card_collection", "card_rarity",
+)
+
+
+def encode_feed_listing(row, with_rarity=True):
+    card = {
+        "name": row["card_name"],
+        "image_url": row["card_image_url"],
+        "collection": row["card_collection"],
+    }
+    if with_rarity:
+        card["rarity"] = row["card_rarity"]
+    return {
+        "id": row["listing_id"],
+        "price": row["price"],
+        "condition": row["condition"],
+        "seller": row["seller_username"],
+        "card": card,
+    }
+
+
+USER_LISTING_FIELDS = ("listing_id", "price", "condition", "card_name", "card_image_url", "card_rarity")
+
+
+def encode_user_listing(row):
+    return {
+        "id": row["listing_id"],
+        "card": {
+            "name": row["card_name"],
+            "image_url": row["card_image_url"],
+            "rarity": row["card_rarity"],
+        },
+        "price": float(row["price"]),
+        "condition": row["condition"],
+    }
+
+
+CART_ITEM_FIELDS = (
+    "id", "quantity", "added_at",
+    "listing_id__id", "listing_id__price", "listing_id__condition",
+    "listing_id__status", "listing_id__description",
+    *prefixed("listing_id__card_id__", CARD_FIELDS),
+)
+
+
+def encode_cart_item(row):
+    prefix = "listing_id__card_id__"
+    return {
+        "cart_item_id": row["id"],
+        "quantity": row["quantity"],
+        "added_at": row["added_at"],
+        "listing": {
+            "listing_id": row["listing_id__id"],
+            "price": row["listing_id__price"],
+            "condition": row["listing_id__condition"],
+            "status": row["listing_id__status"],
+            "description": row["listing_id__description"],
+            "card": {"card_id": row[prefix + "id"], **{f: row[prefix + f] for f in CARD_FIELDS[1:]}},
+        },
+    }
+
+
+ORDER_FIELDS = ("id", "total_price", "status", "created_at")
+
+# First detail of an order, used for the icon/name shown in dashboard rows.
+ORDER_PREVIEW_FIELDS = (
+    "order_id", "listing_id__card_id__name", "listing_id__card_id__image_url", "listing_id__seller__username",
+)
+
+
+def encode_order_summary(row, preview, **extra):
+    return {
+        "id": row["id"],
+        "type": "order",
+        "total_price": float(row["total_price"]),
+        "status": row["status"],
+        "created_at": row["created_at"],
+        "item_name": preview["listing_id__card_id__name"] if preview else "Varios",
+        "image": preview["listing_id__card_id__image_url"] if preview else None,
+        **extra,
+    }
+
+
+# Available listings shown next to the orders in sales/.
+SALES_LISTING_FIELDS = ("listing_id", "price", "created_at", "card_name", "card_image_url")
+
+
+def encode_sales_listing(row):
+    return {
+        "id": f"listing_{row['listing_id']}",  # Prefijo para distinguir de órdenes
+        "real_id": row["listing_id"],
+        "type": "listing",
+        "total_price": float(row["price"]),
+        "status": "Available",
+        "created_at": row["created_at"],
+        "item_name": row["card_name"],
+        "image": row["card_image_url"],
+        "buyer": None,
+    }
+
+
+ORDER_DETAIL_FIELDS = (
+    "id", "quantity", "unit_price",
+    "listing_id__id", "listing_id__price", "listing_id__condition",
+    "listing_id__seller_id", "listing_id__seller__username",
+    "listing_id__card_id__id", "listing_id__card_id__name", "listing_id__card_id__image_url",
+)
+
+
+def encode_order_detail(row):
+    return {
+        "id": row["id"],
+        "listing": {
+            "id": row["listing_id__id"],
+            "price": row["listing_id__price"],
+            "condition": row["listing_id__condition"],
+            "seller_username": row["listing_id__seller__username"],
+            "card": {
+                "id": row["listing_id__card_id__id"],
+                "name": row["listing_id__card_id__name"],
+                "image_url": row["listing_id__card_id__image_url"],
+            },
+        },
+        "quantity": row["quantity"],
+        "unit_price": row["unit_price"],
+    }
+
+
+SALES_EXPORT_FIELDS = (
+    "order_id", "order_id__status", "order_id__created_at", "order_id__buyer_id__username",
+    "listing_id", "listing_id__card_id__name", "listing_id__condition", "quantity", "unit_price",
+)
+
+
+def encode_sales_line(row):
+    return {
+        "order_id": row["order_id"],
+        "status": row["order_id__status"],
+        "created_at": row["order_id__created_at"],
+        "buyer": row["order_id__buyer_id__username"],
+        "listing_id": row["listing_id"],
+        "card_name": row["listing_id__card_id__name"],
+        "condition": row["listing_id__condition"],
+        "quantity": row["quantity"],
+        "unit_price": row["unit_price"],
+    }
+
+
+REVIEW_FIELDS = ("id", "order_id", "rating", "comment", "created_at")
+
+
+def encode_review(row):
+    return {field: row[field] for field in REVIEW_FIELDS}
+
+
+MESSAGE_FIELDS = ("id", "sender__username", "content", "created_at")
+
+
+def encode_message(row):
+    return {
+        "id": row["id"],
+        "sender": row["sender__username"],
+        "content": row["content"],
+        "created_at": row["created_at"],
+    }
+
+
+INBOX_FIELDS = (
+    "order_id", "order__status", "unread_count", "last_read_message_id",
+    "last_message_id", "last_message_sender", "last_message_preview", "last_message_at",
+)
+
+
+def encode_inbox_entry(row):
+    last_message = None
+    if row["last_message_id"] is not None:
+        last_message = {
+            "id": row["last_message_id"],
+            "sender": row["last_message_sender"],
+            "preview": row["last_message_preview"],
+            "created_at": row["last_message_at"],
+        }
+    return {
+        "order_id": row["order_id"],
+        "status": row["order__status"],
+        "unread": row["unread_count"],
+        "last_read_message_id": row["last_read_message_id"],
+        "last_message": last_message,
+    }
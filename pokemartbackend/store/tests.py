@@ -1,3 +1,1127 @@
-from django.test import TestCase
+import io
+import json
+import tempfile
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from pathlib import Path
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync, iscoroutinefunction, sync_to_async
+from django.db import connection, transaction
+from django.db.models import F, Sum
+from django.http import FileResponse, HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from pokemartbackend import routers
+from pokemartbackend.db import fan_out
+from pokemartbackend.http import StreamingJsonResponse
+from pokemartbackend.middleware import STICKY_COOKIE
+from pokemartbackend.querybudget import QueryBudgetExceeded, QueryCounter, assert_query_budget, query_budget
+from users.models import User
+
+from .benchmarks import (
+    SCALES,
+    THRESHOLDS_PATH,
+    BenchContext,
+    check_thresholds,
+    hot_urlconf,
+    run_micro,
+    seed_dataset,
+    seed_marketplace,
+)
+from . import async_views, images, views
+from .archive import archive_messages
+from .catalog import rebuild_catalog
+from .maintenance import run_maintenance
+from .orders import add_item, remove_item
+from .models import (
+    Card,
+    ListingCatalogEntry,
+    Listings,
+    Message,
+    MessageArchive,
+    Order_details,
+    OrderEvent,
+    OrderInbox,
+    Orders,
+    Reviews,
+    SellerReputation,
+)
+from .reputation import rebuild_reputation, reputation_rows
+
+
+@mock.patch("pokemartbackend.routers.replica_aliases", return_value=["replica_1"])
+class PrimaryReplicaRouterTests(TransactionTestCase):
+    def setUp(self):
+        self.router = routers.PrimaryReplicaRouter()
+        self.tokens = routers.begin_request()
+
+    def tearDown(self):
+        routers.end_request(self.tokens)
+
+    def test_store_reads_go_to_replica(self, _):
+        self.assertEqual(self.router.db_for_read(Listings), "replica_1")
+
+    def test_other_apps_are_not_routed(self, _):
+        self.assertIsNone(self.router.db_for_read(User))
+
+    def test_write_pins_following_reads_to_primary(self, _):
+        self.assertEqual(self.router.db_for_write(Card), "default")
+        self.assertTrue(routers.wrote_to_primary())
+        self.assertEqual(self.router.db_for_read(Card), "default")
+
+    def test_reads_inside_transaction_stay_on_primary(self, _):
+        with transaction.atomic():
+            self.assertEqual(self.router.db_for_read(Card), "default")
+
+    def test_analytics_reads_fall_back_without_alias(self, _):
+        with routers.analytics_reads():
+            self.assertEqual(self.router.db_for_read(Card), "replica_1")
+
+
+class BenchmarkQueryThresholdTests(TestCase):
+    """Every endpoint must stay within its committed query count."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.dataset = seed_dataset(**SCALES["tiny"])
+
+    def test_endpoints_within_query_thresholds(self):
+        with open(THRESHOLDS_PATH, encoding="utf-8") as fh:
+            thresholds = json.load(fh)
+        query_limits = {
+            name: {"max_queries": limits["max_queries"]}
+            for name, limits in thresholds["micro"].items()
+        }
+        micro = run_micro(BenchContext(self.dataset), iterations=1)
+        for name, stats in micro.items():
+            self.assertLess(max(stats["statuses"]), 500, name)
+        self.assertEqual(check_thresholds({"micro": micro}, {"micro": query_limits}), [])
+
+
+@override_settings(QUERY_BUDGET_STRICT=True)
+class QueryBudgetTests(TestCase):
+    def setUp(self):
+        self.request = RequestFactory().get("/")
+
+    def test_view_over_budget_raises(self):
+        @query_budget(1)
+        def view(request):
+            list(Card.objects.all())
+            list(Listings.objects.all())
+            return HttpResponse()
+
+        with self.assertRaises(QueryBudgetExceeded):
+            view(self.request)
+
+    @override_settings(QUERY_BUDGET_STRICT=False)
+    def test_overrun_is_only_logged_when_not_strict(self):
+        @query_budget(0)
+        def view(request):
+            list(Card.objects.all())
+            return HttpResponse()
+
+        with self.assertLogs("pokemartbackend.querybudget", "WARNING") as logs:
+            self.assertEqual(view(self.request).status_code, 200)
+        self.assertIn("ran 1 queries, budget is 0", logs.output[0])
+
+    def test_streamed_queries_count_against_budget(self):
+        @query_budget(0)
+        def view(request):
+            return StreamingJsonResponse(Card.objects.values("id"))
+
+        response = view(self.request)
+        with self.assertRaises(QueryBudgetExceeded):
+            b"".join(response.streaming_content)
+
+    async def test_async_view_over_budget_raises(self):
+        @query_budget(1)
+        async def view(request):
+            [card async for card in Card.objects.all()]
+            [listing async for listing in Listings.objects.all()]
+            return HttpResponse()
+
+        self.assertTrue(iscoroutinefunction(view))
+        with self.assertRaises(QueryBudgetExceeded):
+            await view(self.request)
+
+    async def test_async_streamed_queries_count_against_budget(self):
+        @query_budget(0)
+        async def view(request):
+            return StreamingJsonResponse(Card.objects.values("id"), asynchronous=True)
+
+        response = await view(self.request)
+        with self.assertRaises(QueryBudgetExceeded):
+            [chunk async for chunk in response.streaming_content]
+
+    def test_fan_out_queries_count_against_budget(self):
+        @query_budget(1)
+        def view(request):
+            fan_out(lambda: list(Card.objects.all()), lambda: list(Listings.objects.all()))
+            return HttpResponse()
+
+        with self.assertRaises(QueryBudgetExceeded):
+            view(self.request)
+
+    def test_assert_query_budget_uses_view_budget(self):
+        @query_budget(1)
+        def view(request):
+            return HttpResponse()
+
+        with assert_query_budget(view) as counter:
+            list(Card.objects.all())
+        self.assertEqual(counter.count, 1)
+
+
+class StreamingJsonResponseTests(SimpleTestCase):
+    def body(self, response):
+        return b"".join(response.streaming_content)
+
+    def test_rows_are_framed_as_a_json_array(self):
+        rows = [{"id": 1, "price": Decimal("1.50")}, {"id": 2, "price": Decimal("3.00")}]
+        response = StreamingJsonResponse(rows, buffer_size=0)
+        self.assertEqual(response["Content-Type"], "application/json")
+        self.assertEqual(json.loads(self.body(response)), [{"id": 1, "price": "1.50"}, {"id": 2, "price": "3.00"}])
+
+    def test_ndjson_emits_one_row_per_line(self):
+        response = StreamingJsonResponse(
+            iter([{"id": 1}, {"id": 2}]), encode=lambda row: {"card": row["id"]}, ndjson=True, filename="cards.ndjson",
+        )
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="cards.ndjson"')
+        self.assertEqual(self.body(response), b'{"card":1}\n{"card":2}\n')
+
+    def test_empty_iterables(self):
+        self.assertEqual(self.body(StreamingJsonResponse([])), b"[]")
+        self.assertEqual(self.body(StreamingJsonResponse([], ndjson=True)), b"")
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        users, self.cards = seed_marketplace(listings=2, cards=2, prefix="export")
+        self.seller = users[0]
+        self.buyer = User.objects.create_user(username="export_buyer", email="export_buyer@example.com", password="x")
+        order = Orders.objects.create(buyer_id=self.buyer, total_price=Decimal("5.00"))
+        for listing in Listings.objects.all():
+            Order_details.objects.create(order_id=order, listing_id=listing, quantity=1, unit_price=listing.price)
+
+    def test_card_export_is_admin_only(self):
+        self.assertEqual(self.client.get("/store/cards/export/").status_code, 401)
+        self.client.force_login(self.buyer)
+        self.assertEqual(self.client.get("/store/cards/export/").status_code, 403)
+
+        admin = User.objects.create_user(username="export_admin", email="export_admin@example.com", password="x", is_staff=True)
+        self.client.force_login(admin)
+        response = self.client.get("/store/cards/export/?format=ndjson")
+        self.assertEqual(response.status_code, 200)
+        rows = [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+        self.assertEqual([row["id"] for row in rows], sorted(card.id for card in self.cards))
+
+    def test_sales_export_only_lists_the_sellers_lines(self):
+        self.assertEqual(self.client.get("/store/sales/export/").status_code, 401)
+        self.client.force_login(self.buyer)
+        self.assertEqual(json.loads(b"".join(self.client.get("/store/sales/export/").streaming_content)), [])
+
+        self.client.force_login(self.seller)
+        response = self.client.get("/store/sales/export/")
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="sales.json"')
+        lines = json.loads(b"".join(response.streaming_content))
+        self.assertEqual(len(lines), 2)
+        self.assertEqual({line["buyer"] for line in lines}, {"export_buyer"})
+
+
+@override_settings(BATCH_LOOKUP_CACHE_SECONDS=300)
+class MetricsTests(TestCase):
+    def setUp(self):
+        _, self.cards = seed_marketplace(listings=1, prefix="metrics")
+
+    def scrape(self):
+        response = self.client.get("/metrics")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "text/plain; version=0.0.4")
+        samples = {}
+        for line in response.content.decode().splitlines():
+            if line and not line.startswith("#"):
+                name, value = line.rsplit(" ", 1)
+                samples[name] = float(value)
+        return response.content.decode(), samples
+
+    def test_requests_queries_and_cache_lookups_are_exported(self):
+        self.assertEqual(self.client.get("/metrics").status_code, 403)
+        self.client.force_login(User.objects.create_user(
+            username="metrics_admin", email="metrics_admin@example.com", password="x", is_staff=True,
+        ))
+        ids = f"{self.cards[0].id},999999"
+        self.client.get("/store/cards/batch/", {"ids": ids})
+        _, before = self.scrape()
+
+        # The card is cached now; the unknown id is looked up again.
+        self.client.get("/store/cards/batch/", {"ids": ids})
+        text, after = self.scrape()
+
+        view = 'view="get_cards_batch"'
+        for metric in ("pokemart_request_duration_seconds", "pokemart_db_queries"):
+            self.assertIn(f"# TYPE {metric} histogram", text)
+            key = f"{metric}_count{{{view}}}"
+            self.assertEqual(after[key] - before[key], 1)
+            self.assertEqual(after[f'{metric}_bucket{{{view},le="+Inf"}}'], after[key])
+        self.assertEqual(after[f"pokemart_db_queries_sum{{{view}}}"] - before[f"pokemart_db_queries_sum{{{view}}}"], 1)
+        for metric in ("pokemart_cache_hits", "pokemart_cache_misses"):
+            self.assertIn(f"# TYPE {metric} counter", text)
+            key = f"{metric}_total{{{view}}}"
+            self.assertEqual(after[key] - before.get(key, 0), 1)
+
+
+class FanOutTests(TransactionTestCase):
+    def setUp(self):
+        seed_marketplace(listings=3, prefix="fanout")
+
+    def test_queries_run_on_worker_threads(self):
+        def count(model):
+            return threading.get_ident(), model.objects.count()
+
+        with QueryCounter() as counter:
+            (card_thread, cards), (listing_thread, listings) = fan_out(lambda: count(Card), lambda: count(Listings))
+        self.assertEqual((cards, listings), (3, 3))
+        self.assertNotIn(threading.get_ident(), {card_thread, listing_thread})
+        self.assertEqual(counter.count, 2)
+
+    def test_worker_sees_routing_context(self):
+        tokens = routers.begin_request(pinned=True)
+        try:
+            self.assertEqual(fan_out(routers._pinned.get, routers._pinned.get), [True, True])
+        finally:
+            routers.end_request(tokens)
+
+    def test_runs_serially_inside_a_transaction(self):
+        with transaction.atomic():
+            card = Card.objects.create(name="Nueva", collection="Set", rarity="Common", recommended_price=1)
+            threads = fan_out(threading.get_ident, lambda: Card.objects.filter(id=card.id).exists())
+        self.assertEqual(threads, [threading.get_ident(), True])
+
+
+class ListingCatalogSyncTests(TestCase):
+    def setUp(self):
+        self.users, self.cards = seed_marketplace(listings=2, prefix="catalog")
+        self.listing = Listings.objects.order_by("id").first()
+
+    def entry(self):
+        return ListingCatalogEntry.objects.get(listing_id=self.listing.id)
+
+    def test_listing_changes_are_copied(self):
+        self.listing.price = "99.00"
+        self.listing.save()
+        self.assertEqual(str(self.entry().price), "99.00")
+
+        self.listing.delete()
+        self.assertFalse(ListingCatalogEntry.objects.filter(listing_id=self.listing.id).exists())
+
+    def test_card_and_username_changes_are_copied(self):
+        card = Card.objects.get(id=self.listing.card_id_id)
+        card.name = "Charizard"
+        card.save()
+        seller = User.objects.get(id=self.listing.seller_id)
+        seller.username = "renamed_seller"
+        seller.save()
+
+        entry = self.entry()
+        self.assertEqual(entry.card_name, "Charizard")
+        self.assertEqual(entry.seller_username, "renamed_seller")
+
+    def test_rebuild_repairs_bulk_updates(self):
+        Listings.objects.update(status="Inactive")
+        self.assertEqual(rebuild_catalog(), 2)
+        self.assertFalse(ListingCatalogEntry.objects.filter(status="Available").exists())
+
+    def test_list_listings_filters_and_sorts(self):
+        response = self.client.get("/store/listings/", {"condition": "Near Mint", "sort": "price"})
+        rows = json.loads(b"".join(response))
+        self.assertEqual([row["condition"] for row in rows], ["Near Mint"])
+
+        self.assertEqual(self.client.get("/store/listings/", {"sort": "name"}).status_code, 400)
+
+
+class ListingFacetsTests(TestCase):
+    def setUp(self):
+        seed_marketplace(listings=6, prefix="facets")
+
+    def test_counts_group_by_and_ignore_own_filter(self):
+        facets = self.client.get("/store/listings/facets/", {"condition": "Played"}).json()
+        self.assertEqual(facets["total"], 2)
+        self.assertEqual(sum(row["count"] for row in facets["condition"]), 6)
+        self.assertEqual(sum(row["count"] for row in facets["price"]), 2)
+
+    def test_listing_change_invalidates_cached_counts(self):
+        url = "/store/listings/facets/"
+        self.assertEqual(self.client.get(url).json()["total"], 6)
+        with self.assertNumQueries(0):
+            self.client.get(url)
+
+        listing = Listings.objects.first()
+        listing.status = "Inactive"
+        listing.save()
+        self.assertEqual(self.client.get(url).json()["total"], 5)
+
+    def test_rejects_non_finite_price_bounds(self):
+        for params in ({"min_price": "nan"}, {"min_price": "inf"}, {"max_price": "-Infinity"}):
+            self.assertEqual(self.client.get("/store/listings/facets/", params).status_code, 400)
+            self.assertEqual(self.client.get("/store/listings/", params).status_code, 400)
+
+    def test_rejects_card_ids_outside_the_column(self):
+        for card_id in ("99999999999999999999", "0", "abc"):
+            response = self.client.get("/store/listings/", {"card_id": card_id})
+            self.assertEqual(response.status_code, 400)
+            self.assertFalse(response.streaming)
+            self.assertEqual(self.client.get("/store/listings/facets/", {"card_id": card_id}).status_code, 400)
+
+
+@override_settings(BATCH_LOOKUP_CACHE_SECONDS=300)
+class BatchLookupTests(TestCase):
+    def setUp(self):
+        _, self.cards = seed_marketplace(listings=3, prefix="batch")
+        self.listing_ids = list(Listings.objects.values_list("id", flat=True))
+
+    def test_cards_batch_maps_ids_and_caches(self):
+        ids = f"{self.cards[0].id},{self.cards[1].id},999999"
+        with self.assertNumQueries(1):
+            first = self.client.get("/store/cards/batch/", {"ids": ids}).json()
+        self.assertEqual(first[str(self.cards[0].id)]["name"], self.cards[0].name)
+        self.assertIsNone(first["999999"])
+
+        # Only the missing id goes back to the database.
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get("/store/cards/batch/", {"ids": ids}).json(), first)
+
+    @override_settings(BATCH_LOOKUP_CACHE_SECONDS=0)
+    def test_nothing_is_cached_without_a_timeout(self):
+        card = self.cards[0]
+        self.client.get("/store/cards/batch/", {"ids": card.id})
+        # A change this process never hears about, as if made by another worker.
+        Card.objects.filter(id=card.id).update(name="Mewtwo")
+        self.assertEqual(self.client.get("/store/cards/batch/", {"ids": card.id}).json()[str(card.id)]["name"], "Mewtwo")
+        self.assertEqual(self.client.get(f"/store/cards/{card.id}/").json()["name"], "Mewtwo")
+
+    def test_listings_batch_reflects_updates(self):
+        ids = ",".join(map(str, self.listing_ids))
+        payload = self.client.get("/store/listings/batch/", {"ids": ids}).json()
+        self.assertEqual(len(payload), 3)
+
+        listing = Listings.objects.get(id=self.listing_ids[0])
+        listing.price = "42.00"
+        listing.save()
+        payload = self.client.get("/store/listings/batch/", {"ids": ids}).json()
+        self.assertEqual(payload[str(listing.id)]["price"], "42.00")
+
+    def test_rejects_bad_ids(self):
+        self.assertEqual(self.client.get("/store/cards/batch/", {"ids": "1,x"}).status_code, 400)
+        self.assertEqual(self.client.get("/store/cards/batch/", {"ids": "99999999999999999999999"}).status_code, 400)
+        self.assertEqual(self.client.get("/store/listings/batch/", {"ids": "0,-1"}).status_code, 400)
+        too_many = ",".join(str(i) for i in range(201))
+        self.assertEqual(self.client.get("/store/listings/batch/", {"ids": too_many}).status_code, 400)
+
+
+class BulkInventoryTests(TestCase):
+    def setUp(self):
+        self.users, self.cards = seed_marketplace(listings=1, cards=3, prefix="inventory")
+        self.client.force_login(self.users[0])
+
+    def upload(self, body, content_type):
+        response = self.client.post("/store/listings/bulk/", body, content_type=content_type)
+        self.assertEqual(response.status_code, 200)
+        return [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+
+    def test_csv_rows_are_validated_and_created(self):
+        card = self.cards[0].id
+        body = "\n".join([
+            "card_id,price,quantity,condition,description",
+            f"{card},4.50,3,Near Mint,Primera",
+            f"{card},abc,1,Near Mint,",
+            f"999999,1.00,1,Played,",
+            f"{card},2.00,1,Mint,",
+            f"{card},3.00,2,Played,",
+        ])
+        events = self.upload(body, "text/csv")
+        errors = {event["line"]: event["error"] for event in events if "error" in event}
+        self.assertEqual(sorted(errors), [3, 4, 5])
+        self.assertEqual(events[-1], {"done": True, "created": 2, "errors": 3})
+        self.assertEqual(ListingCatalogEntry.objects.filter(seller=self.users[0], card_id=card).count(), 3)
+
+    def test_ndjson_upload_in_batches(self):
+        lines = [
+            json.dumps({"card_id": self.cards[i % 3].id, "price": "1.25", "quantity": 1, "condition": "Played"})
+            for i in range(7)
+        ]
+        with self.settings(INVENTORY_BATCH_SIZE=3):
+            events = self.upload("\n".join(lines + ["not json"]), "application/x-ndjson")
+        progress = [event for event in events if "processed" in event]
+        self.assertEqual([event["processed"] for event in progress], [3, 6, 7])
+        self.assertEqual(events[-1], {"done": True, "created": 7, "errors": 1})
+
+    def test_fractional_quantities_are_rejected(self):
+        line = {"card_id": self.cards[0].id, "price": "1.25", "quantity": 2.7, "condition": "Played"}
+        events = self.upload(json.dumps(line), "application/x-ndjson")
+        self.assertEqual(events[0], {"line": 1, "error": "quantity must be an integer."})
+        self.assertEqual(events[-1], {"done": True, "created": 0, "errors": 1})
+
+    def test_oversized_integers_are_row_errors(self):
+        card = self.cards[0].id
+        lines = [
+            {"card_id": 10**20, "price": "1.25", "quantity": 1, "condition": "Played"},
+            {"card_id": card, "price": "1.25", "quantity": 10**20, "condition": "Played"},
+            {"card_id": card, "price": "1.25", "quantity": 1, "condition": "Played"},
+        ]
+        events = self.upload("\n".join(map(json.dumps, lines)), "application/x-ndjson")
+        self.assertEqual([event["line"] for event in events if "error" in event], [1, 2])
+        self.assertEqual(events[-1], {"done": True, "created": 1, "errors": 2})
+
+    # "default" stands in for a replica so the stickiness middleware is active.
+    @mock.patch("pokemartbackend.routers.replica_aliases", return_value=["default"])
+    def test_upload_sets_the_sticky_cookie(self, _):
+        line = {"card_id": self.cards[0].id, "price": "1.25", "quantity": 2, "condition": "Played"}
+        response = self.client.post("/store/listings/bulk/", json.dumps(line), content_type="application/x-ndjson")
+        self.assertIn(STICKY_COOKIE, response.cookies)
+        b"".join(response.streaming_content)
+
+
+class BulkUpdateListingsTests(TestCase):
+    def setUp(self):
+        self.users, self.cards = seed_marketplace(listings=6, cards=3, prefix="reprice")
+        self.seller = self.users[0]
+        self.client.force_login(self.seller)
+
+    def post(self, payload):
+        return self.client.post("/store/listings/bulk/update/", json.dumps(payload), content_type="application/json")
+
+    def test_filter_status_change_mirrors_catalog(self):
+        response = self.post({"filter": {"condition": "Played"}, "status": "Inactive"})
+        self.assertEqual(response.json()["updated"], 2)
+        self.assertEqual(Listings.objects.filter(status="Inactive").count(), 2)
+        self.assertEqual(ListingCatalogEntry.objects.filter(status="Inactive").count(), 2)
+
+    def test_recommended_factor_and_percent(self):
+        listing = Listings.objects.select_related("card_id").first()
+        self.post({"ids": [listing.id], "price": {"recommended_factor": "1.5"}})
+        expected = (listing.card_id.recommended_price * Decimal("1.5")).quantize(Decimal("0.01"))
+        listing.refresh_from_db()
+        self.assertEqual(listing.price, expected)
+        self.assertEqual(ListingCatalogEntry.objects.get(listing_id=listing.id).price, expected)
+
+        self.post({"ids": [listing.id], "price": {"percent": -10}})
+        listing.refresh_from_db()
+        self.assertEqual(listing.price, (expected * Decimal("0.9")).quantize(Decimal("0.01")))
+
+    def test_prices_stay_within_the_column(self):
+        listing = Listings.objects.first()
+        self.assertEqual(self.post({"ids": [listing.id], "price": {"value": "1e12"}}).status_code, 400)
+        self.assertEqual(self.post({"ids": [listing.id], "price": {"value": "99999999.99"}}).status_code, 200)
+        self.assertEqual(self.post({"ids": [listing.id], "price": {"percent": 1}}).status_code, 400)
+        self.assertEqual(self.post({"ids": [listing.id], "price": {"recommended_factor": "1e9"}}).status_code, 400)
+        listing.refresh_from_db()
+        self.assertEqual(listing.price, Decimal("99999999.99"))
+        self.assertEqual(self.client.get(f"/store/listings/{listing.id}/").status_code, 200)
+
+    def test_ids_outside_the_column_are_rejected(self):
+        huge = 10**20
+        for payload in ({"ids": [huge]}, {"ids": [0]}, {"ids": [True]}, {"filter": {"card_id": huge}}):
+            response = self.post({**payload, "status": "Inactive"})
+            self.assertEqual(response.status_code, 400, payload)
+        self.assertFalse(Listings.objects.filter(status="Inactive").exists())
+
+    def test_other_sellers_listings_are_untouched(self):
+        other = User.objects.create_user(username="reprice_other", password="x")
+        self.client.force_login(other)
+        response = self.post({"ids": list(Listings.objects.values_list("id", flat=True)), "status": "Inactive"})
+        self.assertEqual(response.json()["updated"], 0)
+        self.assertEqual(self.post({"filter": {}, "price": {"percent": -100}}).status_code, 400)
+
+
+class ListingMaintenanceTests(TestCase):
+    def setUp(self):
+        seed_marketplace(listings=5, prefix="maintenance")
+        self.ids = list(Listings.objects.order_by("id").values_list("id", flat=True))
+
+    def test_statuses_are_updated_in_batches_and_mirrored(self):
+        Listings.objects.filter(id=self.ids[0]).update(status="Disponible")
+        Listings.objects.filter(id=self.ids[1]).update(quantity=0)
+        Listings.objects.filter(id=self.ids[2]).update(status="Sold Out")
+        Listings.objects.filter(id=self.ids[3]).update(created_at=timezone.now() - timedelta(days=400))
+
+        results = run_maintenance(batch_size=1, stale_days=180)
+
+        self.assertEqual(results, {"normalize:Disponible": 1, "sold_out": 1, "restock": 1, "stale": 1})
+        statuses = dict(ListingCatalogEntry.objects.values_list("listing_id", "status"))
+        self.assertEqual(
+            [statuses[pk] for pk in self.ids],
+            ["Available", "Sold Out", "Available", "Inactive", "Available"],
+        )
+        self.assertEqual(sum(run_maintenance().values()), 0)
+
+    def test_zero_stale_days_is_not_the_default(self):
+        self.assertEqual(run_maintenance(dry_run=True)["stale"], 0)
+        self.assertEqual(run_maintenance(stale_days=0, dry_run=True)["stale"], 5)
+        with self.assertRaises(ValueError):
+            run_maintenance(batch_size=0)
+
+
+class OrderLifecycleTests(TestCase):
+    def setUp(self):
+        users, _ = seed_marketplace(listings=1, prefix="lifecycle")
+        self.seller = users[0]
+        self.buyer = User.objects.create_user(username="lifecycle_buyer", password="x")
+        self.listing = Listings.objects.get()
+        self.client.force_login(self.buyer)
+        self.client.post(
+            "/store/cart/add/", json.dumps({"listing_id": self.listing.id, "quantity": 3}),
+            content_type="application/json",
+        )
+        self.order_id = self.client.post("/store/orders/create/").json()["orders"][0]["id"]
+
+    def put_status(self, user, status):
+        self.client.force_login(user)
+        return self.client.put(
+            f"/store/orders/{self.order_id}/status/", json.dumps({"status": status}), content_type="application/json",
+        )
+
+    def stock(self):
+        return Listings.objects.get().quantity, ListingCatalogEntry.objects.get().quantity
+
+    def test_transitions_are_enforced_and_logged(self):
+        self.assertEqual(self.stock(), (9_997, 9_997))
+        self.assertEqual(self.put_status(self.buyer, "En proceso").status_code, 403)
+        self.assertEqual(self.put_status(self.seller, "Enviado").status_code, 400)
+        self.assertEqual(self.put_status(self.seller, "En proceso").status_code, 200)
+        self.assertEqual(self.put_status(self.seller, "Pendiente").status_code, 409)
+        self.assertEqual(self.put_status(self.seller, "Completado").status_code, 200)
+        self.assertEqual(self.put_status(self.buyer, "Cancelado").status_code, 409)
+
+        events = OrderEvent.objects.filter(order_id=self.order_id).order_by("created_at", "id")
+        self.assertEqual(
+            [(event.kind, event.from_status, event.to_status) for event in events],
+            [("created", "", "Pendiente"), ("status_changed", "Pendiente", "En proceso"),
+             ("status_changed", "En proceso", "Completado")],
+        )
+        self.assertEqual(events[0].data, {"items": {str(self.listing.id): 3}})
+        self.assertEqual(self.stock(), (9_997, 9_997))
+
+    @override_settings(SELLER_STATS_CACHE_SECONDS=300)
+    def test_cancel_releases_stock_and_retires_stats(self):
+        self.client.force_login(self.seller)
+        self.assertEqual(self.client.get("/store/seller-stats/").json()["pending_orders"], 1)
+
+        self.assertEqual(self.put_status(self.buyer, "Cancelado").json(), {"id": self.order_id, "status": "Cancelado"})
+        self.assertEqual(self.stock(), (10_000, 10_000))
+        self.client.force_login(self.seller)
+        self.assertEqual(self.client.get("/store/seller-stats/").json()["pending_orders"], 0)
+
+
+def details_total(order_id):
+    return Order_details.objects.filter(order_id=order_id).aggregate(total=Sum(F("quantity") * F("unit_price")))["total"]
+
+
+class OrderNegotiationTests(TestCase):
+    def setUp(self):
+        users, _ = seed_marketplace(listings=2, prefix="negotiation")
+        self.seller = users[0]
+        self.buyer = User.objects.create_user(username="negotiation_buyer", password="x")
+        self.first, self.second = Listings.objects.order_by("id")
+        self.client.force_login(self.buyer)
+        self.client.post(
+            "/store/cart/add/", json.dumps({"listing_id": self.first.id, "quantity": 1}),
+            content_type="application/json",
+        )
+        self.order_id = self.client.post("/store/orders/create/").json()["orders"][0]["id"]
+
+    def post(self, action, payload):
+        return self.client.post(
+            f"/store/orders/{self.order_id}/{action}/", json.dumps(payload), content_type="application/json",
+        )
+
+    def test_edits_move_total_stock_and_log_events(self):
+        self.post("add-item", {"listing_id": self.first.id, "quantity": 2})
+        response = self.post("add-item", {"listing_id": self.second.id, "quantity": 4})
+        self.assertEqual(Decimal(str(response.json()["total"])), details_total(self.order_id))
+        self.assertEqual(Listings.objects.get(id=self.first.id).quantity, 10_000 - 3)
+
+        detail = Order_details.objects.get(order_id=self.order_id, listing_id=self.second.id)
+        response = self.post("remove-item", {"detail_id": detail.id})
+        self.assertEqual(Decimal(str(response.json()["total"])), details_total(self.order_id))
+        self.assertEqual(Orders.objects.get(id=self.order_id).total_price, details_total(self.order_id))
+        self.assertEqual(ListingCatalogEntry.objects.get(listing_id=self.second.id).quantity, 10_000)
+        self.assertEqual(
+            [event.data["quantity"] for event in OrderEvent.objects.filter(kind=OrderEvent.ITEMS_CHANGED).order_by("id")],
+            [2, 4, -4],
+        )
+
+    def test_only_participants_edit_open_orders(self):
+        self.client.force_login(User.objects.create_user(username="negotiation_other", email="other@example.com", password="x"))
+        self.assertEqual(self.post("add-item", {"listing_id": self.second.id}).status_code, 403)
+        Orders.objects.filter(id=self.order_id).update(status="Cancelado")
+        self.client.force_login(self.buyer)
+        self.assertEqual(self.post("add-item", {"listing_id": self.second.id}).status_code, 409)
+
+
+class OrderNegotiationConcurrencyTests(TransactionTestCase):
+    def test_concurrent_edits_keep_total_consistent(self):
+        users, _ = seed_marketplace(listings=3, prefix="stress")
+        buyer = User.objects.create_user(username="stress_buyer", password="x")
+        listings = list(Listings.objects.order_by("id"))
+        order = Orders.objects.create(buyer_id=buyer, total_price=listings[0].price)
+        Order_details.objects.create(order_id=order, listing_id=listings[0], quantity=1, unit_price=listings[0].price)
+
+        errors = []
+
+        def edit(worker):
+            try:
+                for i in range(10):
+                    add_item(order.id, listings[(worker + i) % 3].id, 1, buyer)
+                    detail = Order_details.objects.filter(order_id=order.id).exclude(listing_id=listings[0]).first()
+                    if detail and i % 3 == 2:
+                        try:
+                            remove_item(order.id, detail.id, buyer)
+                        except Order_details.DoesNotExist:
+                            pass  # another thread removed it first
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=edit, args=(worker,)) for worker in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        order.refresh_from_db()
+        self.assertEqual(order.total_price, details_total(order.id))
+
+
+class OrderInboxTests(TestCase):
+    def setUp(self):
+        users, _ = seed_marketplace(listings=1, prefix="inbox")
+        self.seller = users[0]
+        self.buyer = User.objects.create_user(username="inbox_buyer", email="inbox_buyer@example.com", password="x")
+        self.client.force_login(self.buyer)
+        self.client.post(
+            "/store/cart/add/", json.dumps({"listing_id": Listings.objects.get().id, "quantity": 1}),
+            content_type="application/json",
+        )
+        self.order_id = self.client.post("/store/orders/create/").json()["orders"][0]["id"]
+
+    def send(self, user, content):
+        self.client.force_login(user)
+        return self.client.post(
+            f"/store/orders/{self.order_id}/messages/add/", json.dumps({"content": content}),
+            content_type="application/json",
+        )
+
+    def inbox(self, user):
+        self.client.force_login(user)
+        return self.client.get("/store/inbox/").json()
+
+    def test_counters_follow_messages_and_reads(self):
+        self.send(self.buyer, "¿Aceptas 10?")
+        self.send(self.buyer, "¿Y 12?")
+        reply = self.send(self.seller, "Hecho").json()
+
+        inbox = self.inbox(self.seller)
+        self.assertEqual(inbox["unread"], 0)
+        self.assertEqual(inbox["orders"][0]["last_message"]["preview"], "Hecho")
+        self.assertEqual(self.inbox(self.buyer)["unread"], 1)
+
+        self.client.force_login(self.buyer)
+        self.assertEqual(self.client.post(f"/store/orders/{self.order_id}/messages/read/").status_code, 200)
+        entry = self.inbox(self.buyer)["orders"][0]
+        self.assertEqual((entry["unread"], entry["last_read_message_id"]), (0, reply["id"]))
+
+    def test_orders_without_inbox_rows_are_opened_with_history_read(self):
+        OrderInbox.objects.all().delete()
+        Message.objects.create(order_id=self.order_id, sender=self.seller, content="Hola")
+        self.send(self.seller, "¿Sigues ahí?")
+
+        self.assertEqual(self.inbox(self.buyer)["unread"], 1)
+        self.assertEqual(self.inbox(self.seller)["orders"][0]["unread"], 0)
+        outsider = User.objects.create_user(username="inbox_other", email="inbox_other@example.com", password="x")
+        self.client.force_login(outsider)
+        self.assertEqual(self.client.post(f"/store/orders/{self.order_id}/messages/read/").status_code, 404)
+
+    def test_only_participants_post_and_failures_store_nothing(self):
+        outsider = User.objects.create_user(username="inbox_other", email="inbox_other@example.com", password="x")
+        self.assertEqual(self.send(outsider, "Hola").status_code, 403)
+        self.assertEqual(OrderInbox.objects.filter(unread_count__gt=0).count(), 0)
+        self.client.force_login(self.buyer)
+        missing = self.client.post("/store/orders/999999/messages/add/", json.dumps({"content": "x"}),
+                                   content_type="application/json")
+        self.assertEqual(missing.status_code, 404)
+
+        with mock.patch("store.views.message_posted", side_effect=RuntimeError("inbox down")):
+            self.assertEqual(self.send(self.buyer, "¿Aceptas 10?").status_code, 400)
+        self.assertFalse(Message.objects.filter(order_id=self.order_id).exists())
+
+
+class DashboardTests(TestCase):
+    def setUp(self):
+        users, _ = seed_marketplace(listings=2, prefix="dashboard")
+        self.seller = users[0]
+        self.buyer = User.objects.create_user(username="dashboard_buyer", password="x")
+        self.client.force_login(self.buyer)
+        self.client.post(
+            "/store/cart/add/", json.dumps({"listing_id": Listings.objects.order_by("id").first().id, "quantity": 2}),
+            content_type="application/json",
+        )
+        self.order_id = self.client.post("/store/orders/create/").json()["orders"][0]["id"]
+        self.client.force_login(self.seller)
+
+    def get(self, include=None):
+        return self.client.get("/store/dashboard/", {"include": include} if include else {})
+
+    def test_sections_match_the_standalone_endpoints(self):
+        with assert_query_budget(views.get_dashboard):
+            payload = self.get().json()
+        self.assertEqual(list(payload), ["purchases", "sales", "listings", "stats"])
+        sales = sorted(payload["listings"] + payload["sales"], key=lambda row: row["created_at"], reverse=True)
+        self.assertEqual(sales, self.client.get("/store/sales/").json())
+        self.assertEqual(payload["stats"], self.client.get("/store/seller-stats/").json())
+        self.assertEqual(payload["stats"]["pending_orders"], 1)
+
+        self.client.force_login(self.buyer)
+        payload = self.get().json()
+        self.assertEqual(payload["purchases"], self.client.get("/store/orders/").json())
+        self.assertEqual((payload["sales"], payload["listings"]), ([], []))
+
+    def test_include_selects_sections(self):
+        self.assertEqual(list(self.get("stats, purchases").json()), ["purchases", "stats"])
+        self.assertEqual(self.get("stock").status_code, 400)
+        self.client.logout()
+        self.assertEqual(self.get().status_code, 401)
+
+    @override_settings(DASHBOARD_CACHE_SECONDS=300)
+    def test_order_events_retire_the_cached_payload(self):
+        self.assertEqual(self.get("stats").json()["stats"]["pending_orders"], 1)
+        self.client.put(
+            f"/store/orders/{self.order_id}/status/", json.dumps({"status": "Cancelado"}),
+            content_type="application/json",
+        )
+        with assert_query_budget(views.get_dashboard):
+            stats = self.get("stats").json()["stats"]
+        self.assertEqual(stats["pending_orders"], 0)
+
+
+class SellerReputationTests(TestCase):
+    def setUp(self):
+        users, _ = seed_marketplace(listings=4, sellers=2, prefix="reputation")
+        self.first, self.second = sorted(users, key=lambda user: user.username)
+        self.listings = {
+            seller.pk: list(Listings.objects.filter(seller=seller).order_by("id").values_list("id", flat=True))
+            for seller in users
+        }
+        self.buyer = User.objects.create_user(username="reputation_buyer", password="x")
+        self.client.force_login(self.buyer)
+
+    def review(self, listing_ids, rating):
+        for listing_id in listing_ids:
+            self.client.post(
+                "/store/cart/add/", json.dumps({"listing_id": listing_id, "quantity": 1}),
+                content_type="application/json",
+            )
+        order_id = self.client.post("/store/orders/create/").json()["orders"][0]["id"]
+        return self.client.post(
+            "/store/reviews/create/", json.dumps({"order_id": order_id, "rating": rating}),
+            content_type="application/json",
+        )
+
+    def reputation(self, seller):
+        listing_id = self.listings[seller.pk][0]
+        return self.client.get("/store/listings/batch/", {"ids": listing_id}).json()[str(listing_id)]["seller"]["reputation"]
+
+    def test_reviews_update_listing_and_user_payloads(self):
+        self.assertEqual(self.reputation(self.first), {
+            "reviews": 0, "average": None, "histogram": {"1": 0, "2": 0, "3": 0, "4": 0, "5": 0},
+        })
+        # Two lines of the same seller still make one review.
+        self.assertEqual(self.review(self.listings[self.first.pk], 4).status_code, 201)
+        self.assertEqual(Reviews.objects.get().seller, self.first)
+        self.review(self.listings[self.first.pk][:1], 5)
+        self.review(self.listings[self.second.pk][:1], 2)
+
+        self.assertEqual(self.reputation(self.first), {
+            "reviews": 2, "average": 4.5, "histogram": {"1": 0, "2": 0, "3": 0, "4": 1, "5": 1},
+        })
+        self.assertEqual(self.reputation(self.second)["average"], 2.0)
+        with self.assertNumQueries(1):
+            listing = self.client.get(f"/store/listings/{self.listings[self.second.pk][0]}/").json()
+        self.assertEqual(listing["seller"]["reputation"]["reviews"], 1)
+        user = self.client.get(f"/users/{self.first.pk}/").json()
+        self.assertEqual((user["username"], user["reputation"]["reviews"]), (self.first.username, 2))
+
+    def test_backfill_matches_incremental_updates(self):
+        self.review(self.listings[self.first.pk], 3)
+        self.review(self.listings[self.second.pk], 5)
+        incremental = list(SellerReputation.objects.order_by("seller_id").values())
+        SellerReputation.objects.filter(seller=self.first).update(review_count=40)
+        SellerReputation.objects.create(seller=self.buyer, review_count=1, rating_total=5, rating_5=1)
+
+        with self.assertNumQueries(1):
+            reputation_rows()
+        self.assertEqual(rebuild_reputation(), 2)
+        self.assertEqual(list(SellerReputation.objects.order_by("seller_id").values()), incremental)
+
+    def test_seller_reviews_are_paged_with_a_cursor(self):
+        for rating in (1, 2, 3, 4, 5):
+            self.review(self.listings[self.first.pk][:1], rating)
+        self.review(self.listings[self.second.pk][:1], 5)
+        # Same timestamp on two reviews: the id breaks the tie.
+        Reviews.objects.filter(rating__in=(2, 3), seller=self.first).update(created_at=timezone.now())
+
+        url = f"/store/users/{self.first.username}/reviews/"
+        pages, cursor = [], None
+        while True:
+            with CaptureQueriesContext(connection) as queries:
+                page = self.client.get(url, {"limit": 2, **({"cursor": cursor} if cursor else {})}).json()
+            self.assertNotIn("store_order_details", queries[-1]["sql"])
+            pages.append([review["rating"] for review in page["reviews"]])
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+        expected = list(Reviews.objects.filter(seller=self.first).order_by("-created_at", "-id").values_list("rating", flat=True))
+        self.assertEqual(sum(pages, []), expected)
+        self.assertEqual([len(page) for page in pages], [2, 2, 1])
+
+        self.assertEqual(self.client.get(url, {"cursor": "nope"}).status_code, 400)
+        self.assertEqual(self.client.get(url, {"limit": "x"}).status_code, 400)
+        self.assertEqual(self.client.get("/store/users/nadie/reviews/").json(), {"reviews": [], "next_cursor": None})
+
+
+def image_bytes(size=(800, 600), mode="RGB", color="red"):
+    out = io.BytesIO()
+    images.Image.new(mode, size, color).save(out, "PNG")
+    return out.getvalue()
+
+
+@unittest.skipUnless(images.Image, "Pillow is not installed")
+class CardImageTests(TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        cache_dir = override_settings(IMAGE_CACHE_DIR=Path(tmp.name), IMAGE_THUMBNAIL_WIDTHS=(160, 320))
+        cache_dir.enable()
+        self.addCleanup(cache_dir.disable)
+        _, (self.card,) = seed_marketplace(listings=1, prefix="images")
+        self.url = f"/store/cards/{self.card.id}/image/"
+
+    def fetch(self, **params):
+        with mock.patch("store.images.download", return_value=image_bytes()) as download:
+            response = self.client.get(self.url, params)
+        return response, download
+
+    def test_source_is_fetched_once_and_thumbnails_follow(self):
+        response, download = self.fetch(w=300)
+        download.assert_called_once_with(self.card.image_url)
+        self.card.refresh_from_db()
+        digest = self.card.image_digest
+        # Thumbnail still queued: the original, briefly.
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(response["Location"], f"/store/images/{digest}/original")
+        self.assertEqual(response["Cache-Control"], "public, max-age=60")
+
+        images.schedule_thumbnails(digest).result()
+        with self.assertNumQueries(1):
+            response, download = self.fetch(w=300)
+        download.assert_not_called()
+        self.assertEqual(response["Location"], f"/store/images/{digest}/320.webp")
+        self.assertEqual(response["Cache-Control"], "public, max-age=86400")
+
+        image = self.client.get(response["Location"])
+        self.assertIsInstance(image, FileResponse)
+        self.assertEqual(image["Content-Type"], "image/webp")
+        self.assertEqual(image["Cache-Control"], images.IMMUTABLE)
+        with images.Image.open(io.BytesIO(b"".join(image.streaming_content))) as thumbnail:
+            self.assertEqual(thumbnail.size, (320, 240))
+
+    def test_thumbnail_is_rendered_when_asked_before_the_worker(self):
+        digest = images.store_original(image_bytes())
+        response = self.client.get(f"/store/images/{digest}/160.webp")
+        self.assertEqual(response.status_code, 200)
+        b"".join(response.streaming_content)
+        self.assertTrue(images.variant_path(digest, "160.webp").exists())
+
+    def test_corrupt_images_are_refused(self):
+        data = image_bytes()
+        corrupt = data[:len(data) // 2]
+        response = mock.Mock(**{"raise_for_status.return_value": None, "iter_content.return_value": [corrupt]})
+        response.__enter__ = mock.Mock(return_value=response)
+        response.__exit__ = mock.Mock(return_value=False)
+        with mock.patch("store.images.requests.get", return_value=response):
+            with self.assertRaisesMessage(images.ImageError, "corrupt"):
+                images.download("https://images.example.com/0.png")
+
+        # A corrupt original already in the cache: 404, not 500.
+        digest = images.store_original(corrupt)
+        with self.assertLogs("store.images", "WARNING"):
+            self.assertEqual(self.client.get(f"/store/images/{digest}/320.webp").status_code, 404)
+
+    def test_render_thumbnail_keeps_alpha_and_never_enlarges(self):
+        with images.Image.open(io.BytesIO(images.render_thumbnail(image_bytes((100, 50), "RGBA", (255, 0, 0, 128)), 320))) as image:
+            self.assertEqual((image.size, image.mode), ((100, 50), "RGBA"))
+
+    def test_blurhash_matches_the_reference_encoder(self):
+        gradient = images.Image.linear_gradient("L").convert("RGB")
+        self.assertEqual(images.blurhash(gradient), "L#HetWoffQof00WBfQWBxuj[fQj[")
+
+    def test_prefetch_records_size_and_blurhash(self):
+        import getdata
+
+        listing = Listings.objects.get()
+        cards = [self.card, Card.objects.create(
+            name="Broken", collection="Set", rarity="Rare", image_url="https://images.example.com/broken.png",
+            recommended_price=Decimal("1.00"),
+        )]
+
+        def download(url, session=None):
+            if url.endswith("broken.png"):
+                raise images.ImageError("Could not fetch the source image.")
+            return image_bytes((400, 560))
+
+        # Threads stand in for the process pool: same submit() interface.
+        with mock.patch("store.images.download", side_effect=download), ThreadPoolExecutor(2) as pool:
+            with self.assertLogs("getdata", "WARNING"):
+                self.assertEqual(getdata.prefetch_images(cards, 2, pool), 1)
+
+        card = self.client.get(f"/store/cards/{self.card.id}/").json()
+        self.assertEqual((card["image_width"], card["image_height"]), (400, 560))
+        self.assertEqual(len(card["image_blurhash"]), 28)
+        listing_card = self.client.get(f"/store/listings/{listing.id}/").json()["card"]
+        self.assertEqual(listing_card["image_blurhash"], card["image_blurhash"])
+        digest = Card.objects.get(id=self.card.id).image_digest
+        self.assertTrue(images.variant_path(digest, "320.webp").exists())
+        self.assertEqual(Card.objects.get(name="Broken").image_width, None)
+
+    def test_new_image_url_drops_the_digest(self):
+        self.fetch()
+        card = Card.objects.get(id=self.card.id)
+        self.assertTrue(card.image_digest)
+        card.image_url = "https://images.example.com/new.png"
+        card.save()
+        self.assertEqual(Card.objects.get(id=self.card.id).image_digest, "")
+
+    @override_settings(IMAGE_SENDFILE_HEADER="X-Accel-Redirect", IMAGE_SENDFILE_PREFIX="/protected/images/")
+    def test_sendfile_header_hands_off_the_file(self):
+        digest = images.store_original(image_bytes())
+        response = self.client.get(f"/store/images/{digest}/original")
+        self.assertEqual(response["X-Accel-Redirect"], f"/protected/images/{digest[:2]}/{digest}/original")
+        self.assertEqual((response["Content-Type"], response.content), ("image/png", b""))
+
+    def test_errors(self):
+        self.assertEqual(self.client.get(self.url, {"w": "x"}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {"w": "0"}).status_code, 400)
+        self.assertEqual(self.client.get("/store/cards/999999/image/").status_code, 404)
+        with mock.patch("store.images.download", side_effect=images.ImageError("Could not fetch the source image.")):
+            self.assertEqual(self.client.get(self.url).status_code, 502)
+
+        digest = images.store_original(image_bytes())
+        for variant in ("640.webp", "original.png", "../original"):
+            self.assertEqual(self.client.get(f"/store/images/{digest}/{variant}").status_code, 404)
+        self.assertEqual(self.client.get(f"/store/images/{'0' * 64}/original").status_code, 404)
+
+
+class MessageArchiveTests(TestCase):
+    def setUp(self):
+        users, _ = seed_marketplace(listings=1, prefix="archive")
+        self.seller = users[0]
+        self.buyer = User.objects.create_user(username="archive_buyer", email="archive_buyer@example.com", password="x")
+        self.order = Orders.objects.create(buyer_id=self.buyer, total_price=Decimal("5.00"), status="Completado")
+        Order_details.objects.create(
+            order_id=self.order, listing_id=Listings.objects.get(), quantity=1, unit_price=Decimal("5.00"),
+        )
+        for i in range(3):
+            Message.objects.create(order=self.order, sender=(self.buyer, self.seller)[i % 2], content=f"Mensaje {i}")
+        old = timezone.now() - timedelta(days=200)
+        Orders.objects.filter(id=self.order.id).update(created_at=old)
+        Message.objects.filter(order=self.order).update(created_at=old)
+
+    def messages(self):
+        return self.client.get(f"/store/orders/{self.order.id}/messages/").json()
+
+    def test_archived_history_is_served_unchanged(self):
+        before = self.messages()
+        self.assertEqual(archive_messages(days=90, dry_run=True), {"orders": 1, "messages": 3})
+        self.assertEqual(archive_messages(days=90), {"orders": 1, "messages": 3})
+
+        self.assertFalse(Message.objects.filter(order=self.order).exists())
+        self.assertEqual(self.messages(), before)
+        self.assertEqual(archive_messages(days=90), {"orders": 0, "messages": 0})
+
+    def test_late_messages_are_appended(self):
+        archive_messages(days=90)
+        late = Message.objects.create(order=self.order, sender=self.buyer, content="¿Sigue disponible?")
+        self.assertEqual([m["content"] for m in self.messages()][-2:], ["Mensaje 2", "¿Sigue disponible?"])
+        self.assertEqual(archive_messages(days=90), {"orders": 0, "messages": 0})  # still recent
+
+        Message.objects.filter(id=late.id).update(created_at=timezone.now() - timedelta(days=100))
+        archive_messages(days=90)
+        archive = MessageArchive.objects.get(order=self.order)
+        self.assertEqual((archive.message_count, archive.last_message_id), (4, late.id))
+        self.assertEqual(len(self.messages()), 4)
+
+    def test_zero_days_is_not_the_default(self):
+        Message.objects.create(order=self.order, sender=self.buyer, content="Gracias")
+        self.assertEqual(archive_messages(days=0, dry_run=True), {"orders": 1, "messages": 4})
+        self.assertEqual(archive_messages(days=90, dry_run=True), {"orders": 0, "messages": 0})
+        with self.assertRaises(ValueError):
+            archive_messages(batch_size=0)
+
+
+class AsyncViewTests(TestCase):
+    def setUp(self):
+        users, self.cards = seed_marketplace(listings=6, cards=3, prefix="async")
+        self.buyer = User.objects.create_user(username="async_buyer", email="async_buyer@example.com", password="x")
+        self.order = Orders.objects.create(buyer_id=self.buyer, total_price=Decimal("5.00"), status="Pendiente")
+        Message.objects.create(order=self.order, sender=self.buyer, content="¿Aceptas 4?")
+        self.factory = RequestFactory()
+
+    async def assertSamePayload(self, name, path, *args, **params):
+        request = self.factory.get(path, params)
+        sync_response = await sync_to_async(getattr(views, name))(request, *args)
+        async_response = await getattr(async_views, name)(request, *args)
+        self.assertEqual(async_response.status_code, sync_response.status_code)
+        if async_response.streaming:
+            sync_body = await sync_to_async(b"".join)(sync_response.streaming_content)
+            async_body = b"".join([chunk async for chunk in async_response.streaming_content])
+            self.assertEqual(async_body, sync_body)
+        else:
+            self.assertEqual(async_response.content, sync_response.content)
+
+    async def test_payloads_match_sync_views(self):
+        card_id = self.cards[0].id
+        await self.assertSamePayload("get_card", f"/store/cards/{card_id}/", card_id)
+        await self.assertSamePayload("get_card", "/store/cards/0/", 0)
+        await self.assertSamePayload("search_cards", "/store/cards/search/", q="Card 1")
+        await self.assertSamePayload("search_cards", "/store/cards/search/")
+        await self.assertSamePayload("list_listings", "/store/listings/", sort="price")
+        await self.assertSamePayload("list_listings", "/store/listings/", format="ndjson")
+        await self.assertSamePayload("list_listings", "/store/listings/", min_price="x")
+        await self.assertSamePayload("list_order_messages", "/messages/", self.order.id)
+
+    async def test_home_feed(self):
+        response = await async_views.get_home_feed(self.factory.get("/store/home-feed/"))
+        feed = json.loads(response.content)
+        self.assertEqual(len(feed["recommendations"]), 6)
+        self.assertEqual(len(feed["new_arrivals"]), 6)
+        self.assertEqual(len(feed["activity"]), 5)
+
+    def test_async_views_keep_sync_budgets(self):
+        for name in async_views.ASYNC_VIEW_NAMES:
+            view = getattr(async_views, name)
+            self.assertTrue(iscoroutinefunction(view), name)
+            self.assertEqual(view.query_budget, getattr(views, name).query_budget, name)
+
+    def test_served_through_async_middleware(self):
+        with override_settings(ROOT_URLCONF=hot_urlconf(async_views)):
+            response = async_to_sync(self.async_client.get)("/store/cards/search/", {"q": self.cards[0].name})
+        self.assertEqual(response.json()[0]["name"], self.cards[0].name)
+        self.assertIn('desc="1 queries"', response["Server-Timing"])
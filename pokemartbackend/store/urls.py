@@ -1,5 +1,9 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import async_views, views
+
+# Los endpoints de lectura más usados tienen versión async para ASGI
+hot = async_views if settings.ASYNC_VIEWS else views
 
 urlpatterns = [
     # Health
@@ -7,12 +11,20 @@ urlpatterns = [
 
     # Cards
     path('cards/', views.list_limited_cards, name='list_limited_cards'),
-    path('cards/search/', views.search_cards, name='search_cards'),
-    path('cards/<int:card_id>/', views.get_card, name='get_card'),
+    path('cards/search/', hot.search_cards, name='search_cards'),
+    path('cards/export/', views.export_cards, name='export_cards'),
+    path('cards/batch/', views.get_cards_batch, name='get_cards_batch'),
+    path('cards/<int:card_id>/', hot.get_card, name='get_card'),
+    path('cards/<int:card_id>/image/', views.get_card_image, name='get_card_image'),
+    path('images/<str:digest>/<str:variant>', views.get_image, name='get_image'),
 
     # Listings
-    path('listings/', views.list_listings, name='list_listings'),
+    path('listings/', hot.list_listings, name='list_listings'),
     path('listings/create/', views.create_listing, name='create_listing'),
+    path('listings/bulk/', views.bulk_create_listings, name='bulk_create_listings'),
+    path('listings/bulk/update/', views.bulk_update_listings_view, name='bulk_update_listings'),
+    path('listings/facets/', views.listing_facets, name='listing_facets'),
+    path('listings/batch/', views.get_listings_batch, name='get_listings_batch'),
     path('listings/<int:listing_id>/', views.get_listing, name='get_listing'),
     path('listings/<int:listing_id>/update/', views.update_listing, name='update_listing'),
     path('listings/<int:listing_id>/delete/', views.delete_listing, name='delete_listing'),
@@ -26,20 +38,25 @@ urlpatterns = [
     # Orders
     path('orders/', views.list_orders, name='list_orders'),
     path('sales/', views.list_sales, name='list_sales'),
+    path('sales/export/', views.export_sales, name='export_sales'),
+    path('dashboard/', views.get_dashboard, name='get_dashboard'),
     path('orders/create/', views.create_order, name='create_order'),
     path('orders/<int:order_id>/', views.get_order, name='get_order'),
     path('orders/<int:order_id>/status/', views.update_order_status, name='update_order_status'),
 
     # Chat / Negotiation
-    path('orders/<int:order_id>/messages/', views.list_order_messages, name='list_order_messages'),
+    path('inbox/', views.get_inbox, name='get_inbox'),
+    path('orders/<int:order_id>/messages/', hot.list_order_messages, name='list_order_messages'),
     path('orders/<int:order_id>/messages/add/', views.add_order_message, name='add_order_message'),
+    path('orders/<int:order_id>/messages/read/', views.mark_order_messages_read, name='mark_order_messages_read'),
     path('orders/<int:order_id>/add-item/', views.add_item_to_order, name='add_item_to_order'),
     path('orders/<int:order_id>/remove-item/', views.remove_item_from_order, name='remove_item_from_order'),
     path('users/<str:username>/listings/', views.list_user_listings, name='list_user_listings'),
+    path('users/<str:username>/reviews/', views.list_user_reviews, name='list_user_reviews'),
 
     # Reviews
     path('reviews/create/', views.create_review, name='create_review'),
     path('reviews/<int:order_id>/', views.get_review, name='get_review'),
-    path('home-feed/', views.get_home_feed, name='get_home_feed'),
+    path('home-feed/', hot.get_home_feed, name='get_home_feed'),
     path('seller-stats/', views.seller_stats, name='seller_stats'),
 ]
\ No newline at end of file
@@ -3,12 +3,60 @@ import random
 
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
-from django.http import JsonResponse, HttpResponse
+from django.http import HttpResponse, HttpResponseRedirect
+from django.urls import reverse
+from django.conf import settings
+from django.core.cache import cache
 from django.db import transaction
 
-from .models import Orders, Order_details, Listings, Cart, Card, Reviews, Message
-
-
+from pokemartbackend.db import fan_out
+from pokemartbackend.http import NDJSON_CONTENT_TYPE, JsonResponse, StreamingJsonResponse, wants_ndjson
+from pokemartbackend.querybudget import query_budget
+from pokemartbackend.routers import analytics_reads, mark_written
+
+from .archive import order_messages
+from .dashboard import dashboard, parse_include
+from .catalog import (
+    CATALOG_SORTS,
+    MAX_ID,
+    cards_by_id,
+    catalog_facets,
+    catalog_version,
+    filter_catalog,
+    listings_by_id,
+)
+from .images import ImageError, cache_card_image, image_response, ready_variant
+from .inbox import is_participant, mark_read, message_posted, user_inbox
+from .inventory import bulk_update_listings, import_inventory, parse_inventory
+from .maintenance import normalize_status
+from .models import Orders, Order_details, Listings, ListingCatalogEntry, Cart, Card, Reviews, Message
+from .orders import OrderError, add_item, change_status, orders_placed, orders_version, remove_item
+from .reputation import first_seller, review_created, seller_reviews
+from .serializers import (
+    CARD_FIELDS,
+    CART_ITEM_FIELDS,
+    CATALOG_FIELDS,
+    FEED_LISTING_FIELDS,
+    ORDER_DETAIL_FIELDS,
+    ORDER_FIELDS,
+    ORDER_PREVIEW_FIELDS,
+    REVIEW_FIELDS,
+    SALES_EXPORT_FIELDS,
+    SALES_LISTING_FIELDS,
+    USER_LISTING_FIELDS,
+    encode_cart_item,
+    encode_feed_listing,
+    encode_inbox_entry,
+    encode_catalog_listing,
+    encode_order_detail,
+    encode_order_summary,
+    encode_review,
+    encode_sales_line,
+    encode_sales_listing,
+    encode_user_listing,
+)
+
+@query_budget(0)
 def health_check(request):
     return HttpResponse("OK", content_type="text/plain")
 
@@ -17,6 +65,7 @@ def health_check(request):
 
 @csrf_exempt
 @require_http_methods(["GET"])
+@query_budget(2)
 def list_limited_cards(request):
     total_cards = Card.objects.count()
     if total_cards == 0:
@@ -27,129 +76,187 @@ def list_limited_cards(request):
     start_index = random.randint(0, max_start_index)
     end_index = start_index + sample_size
 
-    cards = Card.objects.all().order_by("id")[start_index:end_index]
-
-    card_list = [
-        {
-            "id": card.id,
-            "name": card.name,
-            "collection": card.collection,
-            "rarity": card.rarity,
-            "image_url": card.image_url,
-            "recommended_price": str(card.recommended_price),
-        }
-        for card in cards
-    ]
-    return JsonResponse(card_list, safe=False)
+    cards = Card.objects.order_by("id").values(*CARD_FIELDS)[start_index:end_index]
+    return JsonResponse(list(cards), safe=False)
 
 
 @csrf_exempt
 @require_http_methods(["GET"])
+@query_budget(1)
 def get_card(request, card_id):
+    # Misma caché por id que cards/batch/
+    card = cards_by_id([card_id]).get(card_id)
+    if card is None:
+        return JsonResponse({"error": "Card not found."}, status=404)
+
+    return JsonResponse(card)
+
+
+MAX_BATCH_IDS = 200
+
+
+def parse_batch_ids(request):
+    """``?ids=1,2,3`` as a de-duplicated list of ints, or an error response."""
+    raw = [part for part in request.GET.get("ids", "").split(",") if part.strip()]
+    if not raw:
+        return None, JsonResponse({"error": "ids is required."}, status=400)
     try:
-        card = Card.objects.get(id=card_id)
-    except Card.DoesNotExist:
+        ids = list(dict.fromkeys(int(part) for part in raw))
+    except ValueError:
+        return None, JsonResponse({"error": "ids must be a comma-separated list of integers."}, status=400)
+    if not all(1 <= pk <= MAX_ID for pk in ids):
+        return None, JsonResponse({"error": f"ids must be between 1 and {MAX_ID}."}, status=400)
+    if len(ids) > MAX_BATCH_IDS:
+        return None, JsonResponse({"error": f"At most {MAX_BATCH_IDS} ids per request."}, status=400)
+    return ids, None
+
+
+@csrf_exempt
+@require_http_methods(["GET"])
+@query_budget(1)
+def get_cards_batch(request):
+    ids, error = parse_batch_ids(request)
+    if error:
+        return error
+    cards = cards_by_id(ids)
+    # Los ids inexistentes vuelven como null
+    return JsonResponse({str(pk): cards.get(pk) for pk in ids})
+
+
+@csrf_exempt
+@require_http_methods(["GET"])
+# 1 once cached; 2 when the source is fetched and the digest saved.
+@query_budget(2)
+def get_card_image(request, card_id):
+    """Redirect to the cached image of the card, a thumbnail of at least ``?w=`` pixels when given."""
+    width = request.GET.get("w")
+    if width is not None:
+        try:
+            width = int(width)
+        except ValueError:
+            return JsonResponse({"error": "w must be an integer."}, status=400)
+        if width < 1:
+            return JsonResponse({"error": "w must be at least 1."}, status=400)
+
+    card = Card.objects.filter(pk=card_id).values("image_url", "image_digest").first()
+    if card is None:
         return JsonResponse({"error": "Card not found."}, status=404)
+    try:
+        digest = cache_card_image(card_id, card["image_url"], card["image_digest"])
+    except ImageError as exc:
+        return JsonResponse({"error": str(exc)}, status=exc.status)
 
-    return JsonResponse({
-        "id": card.id,
-        "name": card.name,
-        "collection": card.collection,
-        "rarity": card.rarity,
-        "image_url": card.image_url,
-        "recommended_price": str(card.recommended_price),
-    })
+    variant, final = ready_variant(digest, width)
+    response = HttpResponseRedirect(reverse("get_image", args=[digest, variant]))
+    # Mientras se genera la miniatura, redirigir al original solo un rato
+    response["Cache-Control"] = f"public, max-age={86400 if final else 60}"
+    return response
+
+
+@csrf_exempt
+@require_http_methods(["GET", "HEAD"])
+@query_budget(0)
+def get_image(request, digest, variant):
+    """A cached original or thumbnail; the URL names its content, so it never changes."""
+    try:
+        return image_response(digest, variant)
+    except ImageError as exc:
+        return JsonResponse({"error": str(exc)}, status=exc.status)
 
 
 @csrf_exempt
 @require_http_methods(["GET"])
+@query_budget(1)
 def search_cards(request):
     query = request.GET.get("q", "").strip()
     if not query:
         return JsonResponse({"error": "Query parameter 'q' is required."}, status=400)
 
-    cards = Card.objects.filter(name__icontains=query).order_by("name").only("id", "name", "collection", "rarity", "image_url", "recommended_price")[:20]
-    card_list = [
-        {
-            "id": card.id,
-            "name": card.name,
-            "collection": card.collection,
-            "rarity": card.rarity,
-            "image_url": card.image_url,
-            "recommended_price": str(card.recommended_price),
-        }
-        for card in cards
-    ]
-    return JsonResponse(card_list, safe=False)
+    return JsonResponse(list(card_search(query)), safe=False)
+
+
+def card_search(query):
+    return Card.objects.filter(name__icontains=query).order_by("name").values(*CARD_FIELDS)[:20]
+
+
+@csrf_exempt
+@require_http_methods(["GET"])
+@query_budget(3)
+def export_cards(request):
+    """Stream the whole card catalog (admin only). ``?format=ndjson`` for NDJSON."""
+    if not request.user.is_authenticated:
+        return JsonResponse({"error": "Authentication required."}, status=401)
+    if not (request.user.is_staff or request.user.role == "admin"):
+        return JsonResponse({"error": "Admin access required."}, status=403)
+
+    ndjson = wants_ndjson(request)
+    cards = Card.objects.order_by("id").values(*CARD_FIELDS)
+    return StreamingJsonResponse(cards, ndjson=ndjson, filename="cards.ndjson" if ndjson else "cards.json")
 
 
 # ─── Listings Endpoints ────────────────────────────────────────────────────────
 
 @csrf_exempt
 @require_http_methods(["GET"])
+@query_budget(1)
 def list_listings(request):
-    listings = Listings.objects.filter(status__in=["Available", "Disponible"]).select_related("card_id", "seller").order_by("-created_at")
+    listings, error = catalog_listings(request)
+    if error:
+        return error
+    return StreamingJsonResponse(listings, encode_catalog_listing, ndjson=wants_ndjson(request))
 
-    data = [
-        {
-            "id": listing.id,
-            "seller": {
-                "id": listing.seller.id,
-                "username": listing.seller.username,
-            },
-            "card": {
-                "id": listing.card_id.id,
-                "name": listing.card_id.name,
-                "collection": listing.card_id.collection,
-                "rarity": listing.card_id.rarity,
-                "image_url": listing.card_id.image_url,
-                "recommended_price": str(listing.card_id.recommended_price),
-            },
-            "price": str(listing.price),
-            "quantity": listing.quantity,
-            "condition": listing.condition,
-            "status": listing.status,
-            "description": listing.description,
-            "created_at": listing.created_at.isoformat(),
-        }
-        for listing in listings
-    ]
-    return JsonResponse(data, safe=False)
+
+def catalog_listings(request):
+    """The sorted catalog rows for the request's filters, or an error response."""
+    # Filtros opcionales; cada uno tiene su índice en el catálogo
+    try:
+        listings = filter_catalog(request.GET)
+    except ValueError as exc:
+        return None, JsonResponse({"error": str(exc)}, status=400)
+
+    sort = request.GET.get("sort", "newest")
+    if sort not in CATALOG_SORTS:
+        return None, JsonResponse({"error": f"sort must be one of: {', '.join(CATALOG_SORTS)}."}, status=400)
+
+    return listings.order_by(CATALOG_SORTS[sort]).values(*CATALOG_FIELDS), None
 
 
 @csrf_exempt
 @require_http_methods(["GET"])
-def get_listing(request, listing_id):
+@query_budget(4)
+def listing_facets(request):
+    """Counts per rarity, collection, condition and price range for the current filters."""
     try:
-        listing = Listings.objects.select_related("card_id", "seller").get(id=listing_id)
-    except Listings.DoesNotExist:
+        return JsonResponse(catalog_facets(request.GET))
+    except ValueError as exc:
+        return JsonResponse({"error": str(exc)}, status=400)
+
+
+@csrf_exempt
+@require_http_methods(["GET"])
+@query_budget(1)
+def get_listing(request, listing_id):
+    listing = ListingCatalogEntry.objects.filter(listing_id=listing_id).values(*CATALOG_FIELDS).first()
+    if listing is None:
         return JsonResponse({"error": "Listing not found."}, status=404)
 
-    return JsonResponse({
-        "id": listing.id,
-        "seller": {
-            "id": listing.seller.id,
-            "username": listing.seller.username,
-        },
-        "card": {
-            "id": listing.card_id.id,
-            "name": listing.card_id.name,
-            "collection": listing.card_id.collection,
-            "rarity": listing.card_id.rarity,
-            "image_url": listing.card_id.image_url,
-            "recommended_price": str(listing.card_id.recommended_price),
-        },
-        "price": str(listing.price),
-        "quantity": listing.quantity,
-        "condition": listing.condition,
-        "status": listing.status,
-        "description": listing.description,
-        "created_at": listing.created_at.isoformat(),
-    })
+    return JsonResponse(encode_catalog_listing(listing))
+
+
+@csrf_exempt
+@require_http_methods(["GET"])
+@query_budget(1)
+def get_listings_batch(request):
+    ids, error = parse_batch_ids(request)
+    if error:
+        return error
+    listings = listings_by_id(ids)
+    return JsonResponse({str(pk): listings.get(pk) for pk in ids})
 
 
 @csrf_exempt
 @require_http_methods(["POST"])
+@query_budget(5)
 def create_listing(request):
     if not request.user.is_authenticated:
         return JsonResponse({"error": "Authentication required."}, status=401)
@@ -174,7 +281,7 @@ def create_listing(request):
         price=payload["price"],
         quantity=payload["quantity"],
         condition=payload["condition"],
-        status=payload.get("status", "Available"),
+        status=normalize_status(payload.get("status", "Available")),
         description=payload.get("description", ""),
     )
 
@@ -193,12 +300,13 @@ def create_listing(request):
 
 @csrf_exempt
 @require_http_methods(["PUT"])
+@query_budget(5)
 def update_listing(request, listing_id):
     if not request.user.is_authenticated:
         return JsonResponse({"error": "Authentication required."}, status=401)
 
     try:
-        listing = Listings.objects.get(id=listing_id, seller=request.user)
+        listing = Listings.objects.select_related("card_id", "seller").get(id=listing_id, seller=request.user)
     except Listings.DoesNotExist:
         return JsonResponse({"error": "Listing not found or not owned by you."}, status=404)
 
@@ -214,7 +322,7 @@ def update_listing(request, listing_id):
     if "condition" in payload:
         listing.condition = payload["condition"]
     if "status" in payload:
-        listing.status = payload["status"]
+        listing.status = normalize_status(payload["status"])
     if "description" in payload:
         listing.description = payload["description"]
 
@@ -230,8 +338,93 @@ def update_listing(request, listing_id):
     })
 
 
+def inventory_format(request, filename=""):
+    fmt = request.GET.get("format")
+    if fmt in ("csv", "ndjson"):
+        return fmt
+    if filename.endswith(".csv") or request.content_type == "text/csv":
+        return "csv"
+    if filename.endswith((".ndjson", ".jsonl")) or request.content_type == NDJSON_CONTENT_TYPE:
+        return "ndjson"
+    return None
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+# Sized for INVENTORY_MAX_ROWS=5000: SQLite splits each 500-row bulk_create
+# into ~16 statements (5,000 rows measured at 160 queries).
+@query_budget(200)
+def bulk_create_listings(request):
+    """Upload many listings as CSV or NDJSON; progress is streamed back as NDJSON."""
+    if not request.user.is_authenticated:
+        return JsonResponse({"error": "Authentication required."}, status=401)
+
+    upload = request.FILES.get("file")
+    fmt = inventory_format(request, upload.name if upload else "")
+    if fmt is None:
+        return JsonResponse({"error": "Send text/csv or application/x-ndjson, or pass ?format=csv|ndjson."}, status=400)
+    try:
+        text = (upload.read() if upload else request.body).decode("utf-8-sig")
+    except UnicodeDecodeError:
+        return JsonResponse({"error": "Inventory must be UTF-8 encoded."}, status=400)
+
+    rows = list(parse_inventory(text, fmt))
+    if not rows:
+        return JsonResponse({"error": "Inventory is empty."}, status=400)
+    if len(rows) > settings.INVENTORY_MAX_ROWS:
+        return JsonResponse(
+            {"error": f"At most {settings.INVENTORY_MAX_ROWS} rows per upload; use the import_inventory command."},
+            status=400,
+        )
+
+    events = import_inventory(request.user, rows, batch_size=settings.INVENTORY_BATCH_SIZE)
+    # Las inserciones ocurren al enviar el cuerpo, después del middleware de réplicas
+    mark_written()
+    return StreamingJsonResponse(events, ndjson=True, buffer_size=0)
+
+
+MAX_BULK_UPDATE_IDS = 500
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+@query_budget(8)
+def bulk_update_listings_view(request):
+    """Reprice or change the status of many of the seller's listings at once.
+
+    Body: {"ids": [...]} or {"filter": {...}}, plus "status" and/or "price"
+    ({"value": x}, {"percent": x} or {"recommended_factor": x}).
+    """
+    if not request.user.is_authenticated:
+        return JsonResponse({"error": "Authentication required."}, status=401)
+
+    try:
+        payload = json.loads(request.body.decode("utf-8"))
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return JsonResponse({"error": "Invalid JSON payload."}, status=400)
+    if not isinstance(payload, dict):
+        return JsonResponse({"error": "Invalid JSON payload."}, status=400)
+    # Conjuntos más grandes van por filtro: no todos los backends aceptan IN enormes
+    if len(payload.get("ids") or []) > MAX_BULK_UPDATE_IDS:
+        return JsonResponse({"error": f"At most {MAX_BULK_UPDATE_IDS} ids per request; use a filter."}, status=400)
+
+    try:
+        updated = bulk_update_listings(
+            request.user,
+            ids=payload.get("ids"),
+            filters=payload.get("filter"),
+            status=payload.get("status"),
+            price=payload.get("price"),
+        )
+    except ValueError as exc:
+        return JsonResponse({"error": str(exc)}, status=400)
+
+    return JsonResponse({"updated": len(updated), "ids": updated})
+
+
 @csrf_exempt
 @require_http_methods(["DELETE"])
+@query_budget(9)
 def delete_listing(request, listing_id):
     if not request.user.is_authenticated:
         return JsonResponse({"error": "Authentication required."}, status=401)
@@ -249,42 +442,18 @@ def delete_listing(request, listing_id):
 
 @csrf_exempt
 @require_http_methods(["GET"])
+@query_budget(3)
 def list_cart_items(request):
     if not request.user.is_authenticated:
         return JsonResponse({"error": "Authentication required."}, status=401)
 
-    cart_items = Cart.objects.filter(user_id=request.user).select_related("listing_id__card_id")
-    response_data = []
-    for item in cart_items:
-        listing = item.listing_id
-        card = listing.card_id
-        response_data.append(
-            {
-                "cart_item_id": item.id,
-                "quantity": item.quantity,
-                "added_at": item.added_at.isoformat(),
-                "listing": {
-                    "listing_id": listing.id,
-                    "price": str(listing.price),
-                    "condition": listing.condition,
-                    "status": listing.status,
-                    "description": listing.description,
-                    "card": {
-                        "card_id": card.id,
-                        "name": card.name,
-                        "collection": card.collection,
-                        "rarity": card.rarity,
-                        "image_url": card.image_url,
-                        "recommended_price": str(card.recommended_price),
-                    },
-                },
-            }
-        )
-    return JsonResponse(response_data, safe=False)
+    cart_items = Cart.objects.filter(user_id=request.user).values(*CART_ITEM_FIELDS)
+    return JsonResponse([encode_cart_item(row) for row in cart_items], safe=False)
 
 
 @csrf_exempt
 @require_http_methods(["POST"])
+@query_budget(5)
 def add_cart_item(request):
     if not request.user.is_authenticated:
         return JsonResponse({"error": "Authentication required."}, status=401)
@@ -334,6 +503,7 @@ def add_cart_item(request):
 
 @csrf_exempt
 @require_http_methods(["PUT"])
+@query_budget(5)
 def update_cart_item(request, cart_item_id):
     if not request.user.is_authenticated:
         return JsonResponse({"error": "Authentication required."}, status=401)
@@ -363,6 +533,7 @@ def update_cart_item(request, cart_item_id):
 
 @csrf_exempt
 @require_http_methods(["DELETE"])
+@query_budget(4)
 def delete_cart_item(request, cart_item_id):
     if not request.user.is_authenticated:
         return JsonResponse({"error": "Authentication required."}, status=401)
@@ -380,35 +551,34 @@ def delete_cart_item(request, cart_item_id):
 
 @csrf_exempt
 @require_http_methods(["POST"])
+@query_budget(12)
 def create_order(request):
     if not request.user.is_authenticated:
         return JsonResponse({"error": "Authentication required."}, status=401)
 
-    cart_items = Cart.objects.filter(user_id=request.user).select_related("listing_id")
+    cart_items = list(Cart.objects.filter(user_id=request.user).select_related("listing_id__card_id"))
 
-    if not cart_items.exists():
+    if not cart_items:
         return JsonResponse({"error": "Cart is empty."}, status=400)
 
+    # Agrupar items por vendedor
+    items_by_seller = {}
+    for item in cart_items:
+        items_by_seller.setdefault(item.listing_id.seller_id, []).append(item)
+
     with transaction.atomic():
-        # Agrupar items por vendedor
-        items_by_seller = {}
-        for item in cart_items:
-            seller_id = item.listing_id.seller.id
-            if seller_id not in items_by_seller:
-                items_by_seller[seller_id] = []
-            items_by_seller[seller_id].append(item)
-
-        created_orders = []
-        for seller_id, items in items_by_seller.items():
-            total_price = sum(item.listing_id.price * item.quantity for item in items)
-            
-            order = Orders.objects.create(
+        # Una orden por vendedor, todas en un solo INSERT
+        created_orders = Orders.objects.bulk_create([
+            Orders(
                 buyer_id=request.user,
-                total_price=total_price,
+                total_price=sum(item.listing_id.price * item.quantity for item in items),
                 status="Pendiente",
             )
-            
-            order_details_list = [
+            for items in items_by_seller.values()
+        ])
+
+        details = [
+            [
                 Order_details(
                     order_id=order,
                     listing_id=item.listing_id,
@@ -417,11 +587,15 @@ def create_order(request):
                 )
                 for item in items
             ]
-            Order_details.objects.bulk_create(order_details_list)
-            created_orders.append(order)
+            for order, items in zip(created_orders, items_by_seller.values())
+        ]
+        Order_details.objects.bulk_create([detail for group in details for detail in group])
+
+        # Registra el evento de creación; los receptores reservan el stock
+        orders_placed(list(zip(created_orders, details)), request.user)
 
         # Clear the cart
-        cart_items.delete()
+        Cart.objects.filter(id__in=[item.id for item in cart_items]).delete()
 
     return JsonResponse({
         "orders": [
@@ -431,11 +605,11 @@ def create_order(request):
                 "status": o.status,
                 "items": [
                     {
-                        "name": d.listing_id.card_id.name,
-                        "quantity": d.quantity
-                    } for d in o.order_details.all()
+                        "name": item.listing_id.card_id.name,
+                        "quantity": item.quantity
+                    } for item in items
                 ]
-            } for o in created_orders
+            } for o, items in zip(created_orders, items_by_seller.values())
         ]
     }, status=201)
 
@@ -443,71 +617,64 @@ def create_order(request):
 
 @csrf_exempt
 @require_http_methods(["GET"])
+@query_budget(4)
 def list_orders(request):
     if not request.user.is_authenticated:
         return JsonResponse({"error": "Authentication required."}, status=401)
 
     # Compras: órdenes donde soy el comprador
-    orders = Orders.objects.filter(buyer_id=request.user).order_by("-created_at")
+    orders = list(Orders.objects.filter(buyer_id=request.user).order_by("-created_at").values(*ORDER_FIELDS))
+
+    # Primera carta de cada orden para el icono/nombre, en una sola consulta
+    previews = first_order_details(Order_details.objects.filter(order_id__buyer_id=request.user))
 
     data = []
     for order in orders:
-        # Intentar obtener la primera carta de la orden para el icono/nombre
-        first_detail = Order_details.objects.filter(order_id=order).select_related("listing_id__card_id").first()
-        data.append({
-            "id": order.id,
-            "type": "order",
-            "total_price": float(order.total_price),
-            "status": order.status,
-            "created_at": order.created_at.isoformat(),
-            "item_name": first_detail.listing_id.card_id.name if first_detail else "Varios",
-            "image": first_detail.listing_id.card_id.image_url if first_detail else None,
-            "seller": first_detail.listing_id.seller.username if first_detail else "Varios"
-        })
+        preview = previews.get(order["id"])
+        data.append(encode_order_summary(
+            order, preview,
+            seller=preview["listing_id__seller__username"] if preview else "Varios",
+        ))
     return JsonResponse(data, safe=False)
 
 
+def first_order_details(details):
+    """Map order id -> values() row of its first detail (lowest detail id)."""
+    previews = {}
+    for row in details.order_by("order_id", "id").values(*ORDER_PREVIEW_FIELDS):
+        previews.setdefault(row["order_id"], row)
+    return previews
+
+
 @csrf_exempt
 @require_http_methods(["GET"])
+@query_budget(5)
 def list_sales(request):
     if not request.user.is_authenticated:
         return JsonResponse({"error": "Authentication required."}, status=401)
 
     # 1. Obtener Publicaciones Activas (Listings sin ventas aún o disponibles)
-    active_listings = Listings.objects.filter(seller=request.user, status__in=["Available", "Disponible"]).select_related("card_id").order_by("-created_at")
-    
+    active_listings = (
+        ListingCatalogEntry.objects.filter(seller=request.user, status="Available")
+        .order_by("-created_at")
+        .values(*SALES_LISTING_FIELDS)
+    )
+
     # 2. Obtener Negociaciones/Órdenes (Ventas en curso o completadas)
-    orders = Orders.objects.filter(order_details__listing_id__seller=request.user).distinct().order_by("-created_at")
+    orders = (
+        Orders.objects.filter(order_details__listing_id__seller=request.user)
+        .distinct()
+        .order_by("-created_at")
+        .values(*ORDER_FIELDS, "buyer_id__username")
+    )
+    previews = first_order_details(Order_details.objects.filter(listing_id__seller=request.user))
 
-    data = []
-    
     # Agregar listings disponibles
-    for listing in active_listings:
-        data.append({
-            "id": f"listing_{listing.id}", # Prefijo para distinguir de órdenes
-            "real_id": listing.id,
-            "type": "listing",
-            "total_price": float(listing.price),
-            "status": "Available",
-            "created_at": listing.created_at.isoformat(),
-            "item_name": listing.card_id.name,
-            "image": listing.card_id.image_url,
-            "buyer": None
-        })
+    data = [encode_sales_listing(listing) for listing in active_listings]
 
     # Agregar órdenes
     for order in orders:
-        first_detail = Order_details.objects.filter(order_id=order, listing_id__seller=request.user).select_related("listing_id__card_id").first()
-        data.append({
-            "id": order.id,
-            "type": "order",
-            "total_price": float(order.total_price),
-            "status": order.status,
-            "created_at": order.created_at.isoformat(),
-            "item_name": first_detail.listing_id.card_id.name if first_detail else "Varios",
-            "image": first_detail.listing_id.card_id.image_url if first_detail else None,
-            "buyer": order.buyer_id.username
-        })
+        data.append(encode_order_summary(order, previews.get(order["id"]), buyer=order["buyer_id__username"]))
     
     # Ordenar por fecha (las más recientes arriba)
     data.sort(key=lambda x: x["created_at"], reverse=True)
@@ -516,57 +683,67 @@ def list_sales(request):
 
 @csrf_exempt
 @require_http_methods(["GET"])
-def get_order(request, order_id):
+@query_budget(4)
+def get_dashboard(request):
+    """Purchases, sales, active listings and stats in one response (``?include=`` selects)."""
     if not request.user.is_authenticated:
         return JsonResponse({"error": "Authentication required."}, status=401)
 
     try:
-        order = Orders.objects.select_related('buyer_id').get(id=order_id)
-        
-        # Verificar si es comprador
-        is_buyer = order.buyer_id == request.user
-        
-        # Verificar si es vendedor de algún item
-        details = Order_details.objects.filter(order_id=order).select_related("listing_id__card_id", "listing_id__seller")
-        is_seller = any(detail.listing_id.seller == request.user for detail in details)
-        
-        if not (is_buyer or is_seller):
-             return JsonResponse({"error": "Order not found."}, status=404)
-             
-    except Orders.DoesNotExist:
+        include = parse_include(request.GET.get("include"))
+    except ValueError as exc:
+        return JsonResponse({"error": str(exc)}, status=400)
+    return JsonResponse(dashboard(request.user, include))
+
+
+@csrf_exempt
+@require_http_methods(["GET"])
+@query_budget(3)
+def export_sales(request):
+    """Stream every order line sold by the current seller, newest first."""
+    if not request.user.is_authenticated:
+        return JsonResponse({"error": "Authentication required."}, status=401)
+
+    ndjson = wants_ndjson(request)
+    lines = (
+        Order_details.objects.filter(listing_id__seller=request.user)
+        .order_by("-order_id__created_at", "id")
+        .values(*SALES_EXPORT_FIELDS)
+    )
+    return StreamingJsonResponse(
+        lines, encode_sales_line, ndjson=ndjson, filename="sales.ndjson" if ndjson else "sales.json",
+    )
+
+
+@csrf_exempt
+@require_http_methods(["GET"])
+@query_budget(4)
+def get_order(request, order_id):
+    if not request.user.is_authenticated:
+        return JsonResponse({"error": "Authentication required."}, status=401)
+
+    order = Orders.objects.filter(id=order_id).values(*ORDER_FIELDS, "buyer_id", "buyer_id__username").first()
+    if order is None:
         return JsonResponse({"error": "Order not found."}, status=404)
 
-    details_data = []
-    seller_names = set()
-    for detail in details:
-        listing = detail.listing_id
-        card = listing.card_id
-        seller_names.add(listing.seller.username)
-        details_data.append({
-            "id": detail.id,
-            "listing": {
-                "id": listing.id,
-                "price": str(listing.price),
-                "condition": listing.condition,
-                "seller_username": listing.seller.username,
-                "card": {
-                    "id": card.id,
-                    "name": card.name,
-                    "image_url": card.image_url,
-                },
-            },
-            "quantity": detail.quantity,
-            "unit_price": str(detail.unit_price),
-        })
+    # Verificar si es comprador
+    is_buyer = order["buyer_id"] == request.user.id
+
+    # Verificar si es vendedor de algún item
+    details = list(Order_details.objects.filter(order_id=order_id).order_by("id").values(*ORDER_DETAIL_FIELDS))
+    is_seller = any(row["listing_id__seller_id"] == request.user.id for row in details)
+
+    if not (is_buyer or is_seller):
+        return JsonResponse({"error": "Order not found."}, status=404)
 
     return JsonResponse({
-        "id": order.id,
-        "buyer_username": order.buyer_id.username,
-        "seller_usernames": list(seller_names),
-        "total_price": float(order.total_price),
-        "status": order.status,
-        "created_at": order.created_at.isoformat(),
-        "details": details_data,
+        "id": order["id"],
+        "buyer_username": order["buyer_id__username"],
+        "seller_usernames": list({row["listing_id__seller__username"] for row in details}),
+        "total_price": float(order["total_price"]),
+        "status": order["status"],
+        "created_at": order["created_at"],
+        "details": [encode_order_detail(row) for row in details],
         "is_seller": is_seller
     })
 
@@ -575,6 +752,7 @@ def get_order(request, order_id):
 
 @csrf_exempt
 @require_http_methods(["POST"])
+@query_budget(9)
 def create_review(request):
     if not request.user.is_authenticated:
         return JsonResponse({"error": "Authentication required."}, status=401)
@@ -593,7 +771,7 @@ def create_review(request):
         return JsonResponse({"error": "Rating must be an integer between 1 and 5."}, status=400)
 
     try:
-        order = Orders.objects.get(id=payload["order_id"], buyer_id=request.user)
+        order = Orders.objects.annotate(seller_id=first_seller()).get(id=payload["order_id"], buyer_id=request.user)
     except Orders.DoesNotExist:
         return JsonResponse({"error": "Order not found or not owned by you."}, status=404)
 
@@ -602,9 +780,11 @@ def create_review(request):
 
     review = Reviews.objects.create(
         order_id=order,
+        seller_id=order.seller_id,
         rating=rating,
         comment=payload.get("comment", ""),
     )
+    review_created(review)
 
     return JsonResponse({
         "id": review.id,
@@ -617,36 +797,64 @@ def create_review(request):
 
 @csrf_exempt
 @require_http_methods(["GET"])
+@query_budget(1)
 def get_review(request, order_id):
-    try:
-        review = Reviews.objects.select_related("order_id").get(order_id__id=order_id)
-    except Reviews.DoesNotExist:
+    review = Reviews.objects.filter(order_id=order_id).values(*REVIEW_FIELDS).first()
+    if review is None:
         return JsonResponse({"error": "Review not found for this order."}, status=404)
 
-    return JsonResponse({
-        "id": review.id,
-        "order_id": review.order_id.id,
-        "rating": review.rating,
-        "comment": review.comment,
-        "created_at": review.created_at.isoformat(),
-    })
+    return JsonResponse(encode_review(review))
+
+
+MAX_REVIEWS_PAGE = 50
+
+
+@csrf_exempt
+@require_http_methods(["GET"])
+@query_budget(1)
+def list_user_reviews(request, username):
+    """The seller's reviews, newest first; pass ``next_cursor`` back as ``?cursor=`` for the next page."""
+    try:
+        limit = min(int(request.GET.get("limit", 20)), MAX_REVIEWS_PAGE)
+    except ValueError:
+        return JsonResponse({"error": "limit must be an integer."}, status=400)
+    if limit < 1:
+        return JsonResponse({"error": "limit must be at least 1."}, status=400)
+
+    try:
+        rows, next_cursor = seller_reviews(username, request.GET.get("cursor"), limit)
+    except ValueError as exc:
+        return JsonResponse({"error": str(exc)}, status=400)
+    return JsonResponse({"reviews": [encode_review(row) for row in rows], "next_cursor": next_cursor})
 
 # ─── Chat Endpoints ───────────────────────────────────────────────────────────
 
 @csrf_exempt
 @require_http_methods(["POST"])
+# 4 plus the transaction (BEGIN, or a savepoint pair inside tests) normally;
+# 11 on the first message of an order that predates inboxes.
+@query_budget(12)
 def add_order_message(request, order_id):
     if not request.user.is_authenticated:
         return JsonResponse({"error": "Autenticación requerida."}, status=401)
-    
+
     try:
         payload = json.loads(request.body.decode("utf-8"))
-        order = Orders.objects.get(id=order_id)
-        message = Message.objects.create(
-            order=order,
-            sender=request.user,
-            content=payload["content"]
-        )
+        content = payload["content"]
+    except Exception as e:
+        return JsonResponse({"error": str(e)}, status=400)
+
+    # Solo el comprador y los vendedores de la orden pueden escribir
+    if not is_participant(order_id, request.user):
+        if Orders.objects.filter(id=order_id).exists():
+            return JsonResponse({"error": "No participas en esta orden."}, status=403)
+        return JsonResponse({"error": "Orden no encontrada."}, status=404)
+
+    try:
+        # El mensaje y los contadores de no leídos se guardan juntos o no se guardan
+        with transaction.atomic():
+            message = Message.objects.create(order_id=order_id, sender=request.user, content=content)
+            message_posted(message)
         return JsonResponse({
             "id": message.id,
             "sender": message.sender.username,
@@ -658,191 +866,152 @@ def add_order_message(request, order_id):
 
 @csrf_exempt
 @require_http_methods(["GET"])
+@query_budget(2)
 def list_order_messages(request, order_id):
-    messages = Message.objects.filter(order_id=order_id).order_by("created_at")
-    return JsonResponse([
-        {
-            "id": m.id,
-            "sender": m.sender.username,
-            "content": m.content,
-            "created_at": m.created_at.isoformat()
-        }
-        for m in messages
-    ], safe=False)
+    # Incluye el historial archivado de órdenes cerradas
+    return JsonResponse(order_messages(order_id), safe=False)
+
+@csrf_exempt
+@require_http_methods(["POST"])
+# 2 normally; 7 when the order predates inboxes and its rows are opened.
+@query_budget(8)
+def mark_order_messages_read(request, order_id):
+    if not request.user.is_authenticated:
+        return JsonResponse({"error": "Autenticación requerida."}, status=401)
+    if not mark_read(order_id, request.user):
+        return JsonResponse({"error": "Orden no encontrada."}, status=404)
+    return JsonResponse({"order_id": order_id, "unread": 0})
+
+@csrf_exempt
+@require_http_methods(["GET"])
+@query_budget(3)
+def get_inbox(request):
+    """Unread counts and last-message previews for all of the user's orders."""
+    if not request.user.is_authenticated:
+        return JsonResponse({"error": "Autenticación requerida."}, status=401)
+    rows, unread = user_inbox(request.user)
+    return JsonResponse({"unread": unread, "orders": [encode_inbox_entry(row) for row in rows]})
 
 @csrf_exempt
 @require_http_methods(["GET"])
+@query_budget(1)
 def list_user_listings(request, username):
-    listings = Listings.objects.filter(seller__username=username, status__in=["Available", "Disponible"]).select_related("card_id").order_by("-created_at")
-    data = [
-        {
-            "id": l.id,
-            "card": {
-                "name": l.card_id.name,
-                "image_url": l.card_id.image_url,
-                "rarity": l.card_id.rarity,
-            },
-            "price": float(l.price),
-            "condition": l.condition
-        }
-        for l in listings
-    ]
-    return JsonResponse(data, safe=False)
+    listings = (
+        ListingCatalogEntry.objects.filter(seller_username=username, status="Available")
+        .order_by("-created_at")
+        .values(*USER_LISTING_FIELDS)
+    )
+    return JsonResponse([encode_user_listing(row) for row in listings], safe=False)
 
 @csrf_exempt
 @require_http_methods(["POST"])
+@query_budget(14)
 def add_item_to_order(request, order_id):
     if not request.user.is_authenticated:
         return JsonResponse({"error": "Auth required"}, status=401)
     
     try:
         payload = json.loads(request.body.decode("utf-8"))
-        listing_id = payload.get("listing_id")
-        quantity = int(payload.get("quantity", 1))
-        
-        order = Orders.objects.get(id=order_id)
-        listing = Listings.objects.get(id=listing_id)
-        
-        # Verificar si ya está en la orden
-        detail, created = Order_details.objects.get_or_create(
-            order_id=order,
-            listing_id=listing,
-            defaults={"quantity": quantity, "unit_price": listing.price}
-        )
-        
-        if not created:
-            detail.quantity += quantity
-            detail.save()
-            
-        # Recalcular total de la orden
-        total = sum(d.quantity * d.unit_price for d in Order_details.objects.filter(order_id=order))
-        order.total_price = total
-        order.save()
-        
-        return JsonResponse({"message": "Item agregado a la negociación", "total": float(total)})
+        order = add_item(order_id, payload.get("listing_id"), int(payload.get("quantity", 1)), request.user)
+        return JsonResponse({"message": "Item agregado a la negociación", "total": float(order.total_price)})
+    except OrderError as e:
+        return JsonResponse({"error": str(e)}, status=e.status)
     except Exception as e:
         return JsonResponse({"error": str(e)}, status=400)
 
 @csrf_exempt
 @require_http_methods(["POST"])
+@query_budget(12)
 def remove_item_from_order(request, order_id):
     if not request.user.is_authenticated:
         return JsonResponse({"error": "Auth required"}, status=401)
-    
+
     try:
         payload = json.loads(request.body.decode("utf-8"))
-        detail_id = payload.get("detail_id")
-        
-        order = Orders.objects.get(id=order_id)
-        
-        # Validar que no quede vacía
-        count = Order_details.objects.filter(order_id=order).count()
-        if count <= 1:
-            return JsonResponse({"error": "La negociación debe tener al menos una carta."}, status=400)
-            
-        Order_details.objects.filter(id=detail_id).delete()
-        
-        total = sum(d.quantity * d.unit_price for d in Order_details.objects.filter(order_id=order))
-        order.total_price = total
-        order.save()
-        
-        return JsonResponse({"message": "Item removido", "total": float(total)})
+        order = remove_item(order_id, payload.get("detail_id"), request.user)
+        return JsonResponse({"message": "Item removido", "total": float(order.total_price)})
+    except OrderError as e:
+        return JsonResponse({"error": str(e)}, status=e.status)
     except Exception as e:
         return JsonResponse({"error": str(e)}, status=400)
 
 @csrf_exempt
 @require_http_methods(["PUT"])
+@query_budget(11)
 def update_order_status(request, order_id):
     if not request.user.is_authenticated:
         return JsonResponse({"error": "Autenticación requerida."}, status=401)
     
     try:
         payload = json.loads(request.body.decode("utf-8"))
-        order = Orders.objects.get(id=order_id)
-        
-        # Solo un vendedor de la orden puede cambiar el estado, 
+        # Solo un vendedor de la orden puede cambiar el estado,
         # excepto para cancelar que también puede el comprador.
-        is_seller = Order_details.objects.filter(order_id=order, listing_id__seller=request.user).exists()
-        is_buyer = order.buyer_id == request.user
-        
-        new_status = payload.get("status")
-        
-        if is_seller:
-            # Vendedor puede hacer cualquier cosa
-            pass
-        elif is_buyer and new_status == "Cancelado":
-            # Comprador solo puede cancelar
-            pass
-        else:
-            return JsonResponse({"error": "No tienes permiso para realizar esta acción."}, status=403)
-            
-        order.status = new_status
-        order.save()
+        order = change_status(order_id, payload.get("status"), request.user)
         return JsonResponse({"id": order.id, "status": order.status})
+    except OrderError as e:
+        return JsonResponse({"error": str(e)}, status=e.status)
     except Exception as e:
         return JsonResponse({"error": str(e)}, status=400)
 
 @csrf_exempt
 @require_http_methods(["GET"])
+@query_budget(3)
 def get_home_feed(request):
+    # Independent reads run concurrently; recommendations need the ids first
+    available_ids, new_arrivals = fan_out(
+        lambda: list(feed_available().values_list("listing_id", flat=True)),
+        lambda: list(latest_feed_listings()),
+    )
     # 1. Recommendations (Shuffle some available listings)
-    all_available = list(Listings.objects.filter(status__in=["Available", "Disponible"]).select_related("card_id", "seller"))
-    recommendations = random.sample(all_available, min(len(all_available), 8)) if all_available else []
-    
-    # 2. Latest Activity (Mix of new listings and new orders)
-    recent_listings = Listings.objects.filter(status="Available").select_related("card_id", "seller").order_by("-created_at")[:5]
-    recent_orders = Orders.objects.select_related("buyer_id").order_by("-created_at")[:5]
-    
+    # Sample ids first so only the 8 chosen rows are loaded and joined
+    sampled_ids = sample_feed_ids(available_ids)
+    recommendations = list(feed_listings(sampled_ids)) if sampled_ids else []
+    return JsonResponse(home_feed(recommendations, new_arrivals))
+
+
+def feed_available():
+    return ListingCatalogEntry.objects.filter(status="Available")
+
+
+def sample_feed_ids(available_ids):
+    return random.sample(available_ids, min(len(available_ids), 8))
+
+
+def feed_listings(ids):
+    return ListingCatalogEntry.objects.filter(listing_id__in=ids).values(*FEED_LISTING_FIELDS)
+
+
+def latest_feed_listings():
+    # New Arrivals (Last 12 latest); the 5 newest also feed Latest Activity
+    return feed_available().order_by("-created_at").values(*FEED_LISTING_FIELDS)[:12]
+
+
+def home_feed(recommendations, new_arrivals):
+    random.shuffle(recommendations)
     activity = []
-    for l in recent_listings:
+    for l in new_arrivals[:5]:
         activity.append({
             "type": "listing",
-            "user": l.seller.username,
-            "card_name": l.card_id.name,
-            "timestamp": l.created_at.isoformat(),
-            "image": l.card_id.image_url
+            "user": l["seller_username"],
+            "card_name": l["card_name"],
+            "timestamp": l["created_at"],
+            "image": l["card_image_url"]
         })
-    
+
     # Sort activity by timestamp
     activity.sort(key=lambda x: x["timestamp"], reverse=True)
-    
-    # 3. New Arrivals (Last 12 latest)
-    new_arrivals = Listings.objects.filter(status__in=["Available", "Disponible"]).select_related("card_id", "seller").order_by("-created_at")[:12]
 
-    return JsonResponse({
-        "recommendations": [
-            {
-                "id": l.id,
-                "price": str(l.price),
-                "condition": l.condition,
-                "seller": l.seller.username,
-                "card": {
-                    "name": l.card_id.name,
-                    "image_url": l.card_id.image_url,
-                    "collection": l.card_id.collection,
-                    "rarity": l.card_id.rarity
-                }
-            } for l in recommendations
-        ],
+    return {
+        "recommendations": [encode_feed_listing(l) for l in recommendations],
         "activity": activity,
-        "new_arrivals": [
-             {
-                "id": l.id,
-                "price": str(l.price),
-                "condition": l.condition,
-                "seller": l.seller.username,
-                "card": {
-                    "name": l.card_id.name,
-                    "image_url": l.card_id.image_url,
-                    "collection": l.card_id.collection
-                }
-            } for l in new_arrivals
-        ]
-    })
+        "new_arrivals": [encode_feed_listing(l, with_rarity=False) for l in new_arrivals]
+    }
 
 
 @csrf_exempt
 @require_http_methods(["GET"])
+@query_budget(8)
+@analytics_reads()
 def seller_stats(request):
     """Return aggregated statistics for the current seller's dashboard."""
     if not request.user.is_authenticated:
@@ -853,25 +1022,23 @@ def seller_stats(request):
 
     user = request.user
 
+    # Cached until one of the seller's orders or any listing changes
+    cache_key = None
+    if settings.SELLER_STATS_CACHE_SECONDS:
+        cache_key = f"stats:seller:{user.pk}:{orders_version(user.pk)}:{catalog_version()}"
+        stats = cache.get(cache_key)
+        if stats is not None:
+            return JsonResponse(stats)
+
     # ── 1. Cards sold (completed orders where user is seller) ──
     completed_details = Order_details.objects.filter(
         listing_id__seller=user,
         order_id__status__in=["Completado", "Finalizado"]
-    ).select_related("listing_id__card_id")
-
-    total_cards_sold = completed_details.aggregate(total=Sum("quantity"))["total"] or 0
-
-    # ── 2. Total revenue ──
-    total_revenue = 0
-    for d in completed_details:
-        total_revenue += float(d.unit_price) * d.quantity
+    )
 
     # ── 3. Monthly revenue (last 6 months) ──
     monthly_data = (
-        Order_details.objects.filter(
-            listing_id__seller=user,
-            order_id__status__in=["Completado", "Finalizado"]
-        )
+        completed_details
         .annotate(month=TruncMonth("order_id__created_at"))
         .values("month")
         .annotate(
@@ -881,6 +1048,41 @@ def seller_stats(request):
         .order_by("month")
     )
 
+    # ── 4. Price comparison: real price vs recommended (active listings) ──
+    active_listings = Listings.objects.filter(
+        seller=user,
+        status="Available"
+    ).order_by("-created_at").values("price", "card_id__name", "card_id__recommended_price")[:20]
+
+    # ── 5. Sales by card (top sellers) ──
+    top_cards = (
+        completed_details
+        .values(name=F("listing_id__card_id__name"))
+        .annotate(sold=Sum("quantity"))
+        .order_by("-sold", "name")[:8]
+    )
+
+    # Los agregados son independientes: se consultan en paralelo
+    totals, monthly_data, active_listings, top_cards, active_count, pending_count = fan_out(
+        # ── 1 + 2. Cards sold and total revenue in one aggregate ──
+        lambda: completed_details.aggregate(
+            total=Sum("quantity"),
+            revenue=Sum(F("unit_price") * F("quantity")),
+        ),
+        lambda: list(monthly_data),
+        lambda: list(active_listings),
+        lambda: list(top_cards),
+        # ── 6. Active listings count ──
+        lambda: Listings.objects.filter(seller=user, status="Available").count(),
+        # ── 7. Pending orders ──
+        lambda: Orders.objects.filter(
+            order_details__listing_id__seller=user,
+            status="Pendiente"
+        ).distinct().count(),
+    )
+    total_cards_sold = totals["total"] or 0
+    total_revenue = float(totals["revenue"] or 0)
+
     monthly_revenue = [
         {
             "month": item["month"].strftime("%b %Y") if item["month"] else "",
@@ -890,49 +1092,21 @@ def seller_stats(request):
         for item in monthly_data
     ]
 
-    # ── 4. Price comparison: real price vs recommended (active listings) ──
-    active_listings = Listings.objects.filter(
-        seller=user,
-        status__in=["Available", "Disponible"]
-    ).select_related("card_id").order_by("-created_at")[:20]
-
     price_comparison = [
         {
-            "name": l.card_id.name[:20],
-            "your_price": float(l.price),
-            "recommended": float(l.card_id.recommended_price),
+            "name": l["card_id__name"][:20],
+            "your_price": float(l["price"]),
+            "recommended": float(l["card_id__recommended_price"]),
         }
         for l in active_listings
     ]
 
-    # ── 5. Sales by card (top sellers) ──
-    top_cards = (
-        Order_details.objects.filter(
-            listing_id__seller=user,
-            order_id__status__in=["Completado", "Finalizado"]
-        )
-        .values(name=F("listing_id__card_id__name"))
-        .annotate(sold=Sum("quantity"))
-        .order_by("-sold")[:8]
-    )
-
     cards_sold_breakdown = [
         {"name": item["name"][:18], "sold": item["sold"]}
         for item in top_cards
     ]
 
-    # ── 6. Active listings count ──
-    active_count = Listings.objects.filter(
-        seller=user, status__in=["Available", "Disponible"]
-    ).count()
-
-    # ── 7. Pending orders ──
-    pending_count = Orders.objects.filter(
-        order_details__listing_id__seller=user,
-        status="Pendiente"
-    ).distinct().count()
-
-    return JsonResponse({
+    stats = {
         "total_cards_sold": total_cards_sold,
         "total_revenue": round(total_revenue, 2),
         "active_listings": active_count,
@@ -940,4 +1114,7 @@ def seller_stats(request):
         "monthly_revenue": monthly_revenue,
         "price_comparison": price_comparison,
         "cards_sold_breakdown": cards_sold_breakdown,
-    })
\ No newline at end of file
+    }
+    if cache_key:
+        cache.set(cache_key, stats, settings.SELLER_STATS_CACHE_SECONDS)
+    return JsonResponse(stats)
\ No newline at end of file
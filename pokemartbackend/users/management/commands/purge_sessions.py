@@ -0,0 +1,47 @@
+"""Bulk-delete expired sessions and record the session table size.
+
+Intended to run from cron, e.g. hourly:
+
+    0 * * * * cd /srv/pokemart && python manage.py purge_sessions
+"""
+
+from django.core.management.base import BaseCommand
+
+from users.sessions import (
+    purge_expired_sessions,
+    record_session_stats,
+    session_table_stats,
+    uses_session_table,
+)
+
+
+class Command(BaseCommand):
+    help = "Delete expired rows from django_session in batches and report table size."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            help="Rows deleted per statement (defaults to SESSION_PURGE_BATCH_SIZE)",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report table size, do not delete anything",
+        )
+
+    def handle(self, *args, **options):
+        if not uses_session_table():
+            self.stdout.write("Session engine does not use the database; nothing to purge.")
+            return
+
+        before = session_table_stats()
+        self.stdout.write(f"Sessions before: total={before['total']} expired={before['expired']}")
+        if options["dry_run"]:
+            return
+
+        deleted = purge_expired_sessions(options["batch_size"])
+        after = record_session_stats()
+        self.stdout.write(self.style.SUCCESS(
+            f"Deleted {deleted} expired sessions (total={after['total']} expired={after['expired']})"
+        ))
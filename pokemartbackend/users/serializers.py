@@ -0,0 +1,18 @@
+"""Compact encoders for user payloads (see store.serializers)."""
+
+USER_FIELDS = ("id", "username", "email", "role", "avatar_url")
+
+
+def encode_user(row):
+    return {
+        "id": row["id"],
+        "username": row["username"],
+        "email": row["email"],
+        "role": row["role"],
+        "avatarUrl": row["avatar_url"],
+    }
+
+
+def user_payload(user):
+    """Encode an already-loaded User instance (e.g. right after authenticate())."""
+    return encode_user({field: getattr(user, field) for field in USER_FIELDS})
@@ -0,0 +1,100 @@
+"""Housekeeping helpers for the django_session table."""
+
+import json
+import logging
+import os
+import tempfile
+
+from django.conf import settings
+from django.core import checks
+from django.contrib.sessions.models import Session
+from django.db.models import Count, Q
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+def uses_session_table() -> bool:
+    """signed_cookies keeps sessions client-side, so there is nothing to purge."""
+    return not settings.SESSION_ENGINE.endswith("signed_cookies")
+
+
+def check_session_cache(app_configs=None, **kwargs) -> list:
+    """System check: cache-backed sessions need a cache shared by every worker."""
+    if not settings.SESSION_ENGINE.endswith(("cache", "cached_db")):
+        return []
+    backend = settings.CACHES.get(settings.SESSION_CACHE_ALIAS, {}).get("BACKEND", "")
+    if "LocMem" not in backend and "DummyCache" not in backend:
+        return []
+    return [
+        checks.Error(
+            f"SESSION_ENGINE {settings.SESSION_ENGINE} needs a shared cache, but the "
+            f"{settings.SESSION_CACHE_ALIAS!r} cache is per-process ({backend}).",
+            hint="Set REDIS_URL, or use SESSION_BACKEND=db.",
+            id="users.E001",
+        )
+    ]
+
+
+def session_table_stats() -> dict:
+    """Return total and expired row counts for django_session in one query."""
+    if not uses_session_table():
+        return {"total": 0, "expired": 0}
+    counts = Session.objects.aggregate(
+        total=Count("pk"),
+        expired=Count("pk", filter=Q(expire_date__lt=timezone.now())),
+    )
+    return {"total": counts["total"], "expired": counts["expired"]}
+
+
+def purge_expired_sessions(batch_size: int | None = None) -> int:
+    """Delete expired sessions in primary-key batches.
+
+    Small batches keep each DELETE short so SQLite's writer lock is never
+    held long enough to stall logins and checkouts.
+    """
+    if not uses_session_table():
+        return 0
+
+    batch_size = batch_size or settings.SESSION_PURGE_BATCH_SIZE
+    now = timezone.now()
+    deleted = 0
+    while True:
+        keys = list(
+            Session.objects.filter(expire_date__lt=now)
+            .values_list("session_key", flat=True)[:batch_size]
+        )
+        if not keys:
+            break
+        count, _ = Session.objects.filter(session_key__in=keys).delete()
+        deleted += count
+        if len(keys) < batch_size:
+            break
+    return deleted
+
+
+def record_session_stats() -> dict:
+    """Snapshot table size to SESSION_STATS_PATH so metrics can read it without a COUNT.
+
+    A file rather than the cache: purge_sessions runs in its own process,
+    and the default LocMem cache would take the snapshot with it.
+    """
+    stats = session_table_stats()
+    stats["measured_at"] = timezone.now().isoformat()
+    path = settings.SESSION_STATS_PATH
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Write then rename, so a scrape never reads a half-written file.
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".session-stats-")
+    with os.fdopen(fd, "w", encoding="utf-8") as fh:
+        json.dump(stats, fh)
+    os.replace(tmp, path)
+    logger.info("django_session size: total=%s expired=%s", stats["total"], stats["expired"])
+    return stats
+
+
+def recorded_session_stats() -> dict | None:
+    try:
+        with open(settings.SESSION_STATS_PATH, encoding="utf-8") as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return None
@@ -1,3 +1,62 @@
-from django.test import TestCase
+import io
+import tempfile
+from datetime import timedelta
+from pathlib import Path
 
-# Create your tests here.
+from django.contrib.sessions.models import Session
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from pokemartbackend.metrics import render_prometheus
+
+from .sessions import check_session_cache, recorded_session_stats
+
+LOCMEM = {"sessions": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+REDIS = {"sessions": {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": "redis://"}}
+
+
+class SessionCacheCheckTests(SimpleTestCase):
+    @override_settings(SESSION_ENGINE="django.contrib.sessions.backends.cached_db", CACHES=LOCMEM)
+    def test_cached_db_on_a_per_process_cache_fails(self):
+        self.assertEqual([error.id for error in check_session_cache()], ["users.E001"])
+
+    @override_settings(SESSION_ENGINE="django.contrib.sessions.backends.cached_db", CACHES=REDIS)
+    def test_cached_db_on_a_shared_cache_passes(self):
+        self.assertEqual(check_session_cache(), [])
+
+    @override_settings(SESSION_ENGINE="django.contrib.sessions.backends.db", CACHES=LOCMEM)
+    def test_db_sessions_need_no_cache(self):
+        self.assertEqual(check_session_cache(), [])
+
+
+@override_settings(SESSION_ENGINE="django.contrib.sessions.backends.db")
+class PurgeSessionsTests(TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        stats_path = override_settings(SESSION_STATS_PATH=Path(tmp.name) / "stats" / "sessions.json")
+        stats_path.enable()
+        self.addCleanup(stats_path.disable)
+
+        now = timezone.now()
+        Session.objects.bulk_create(
+            [Session(session_key=f"expired{i}", session_data="", expire_date=now - timedelta(days=1)) for i in range(5)]
+            + [Session(session_key="live", session_data="", expire_date=now + timedelta(days=1))]
+        )
+
+    def test_expired_rows_are_deleted_in_batches_and_stats_recorded(self):
+        self.assertIsNone(recorded_session_stats())
+        out = io.StringIO()
+        call_command("purge_sessions", batch_size=2, stdout=out)
+
+        self.assertEqual(list(Session.objects.values_list("session_key", flat=True)), ["live"])
+        self.assertIn("Deleted 5 expired sessions", out.getvalue())
+        stats = recorded_session_stats()
+        self.assertEqual((stats["total"], stats["expired"]), (1, 0))
+        self.assertIn('pokemart_session_rows{state="total"} 1', render_prometheus())
+
+    def test_dry_run_deletes_nothing(self):
+        call_command("purge_sessions", dry_run=True, stdout=io.StringIO())
+        self.assertEqual(Session.objects.count(), 6)
+        self.assertIsNone(recorded_session_stats())
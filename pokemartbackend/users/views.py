@@ -1,15 +1,21 @@
 import json
 
-from django.http import JsonResponse
 from django.contrib.auth import get_user_model, authenticate, login, logout
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 
+from pokemartbackend.http import JsonResponse
+from pokemartbackend.querybudget import query_budget
+from store.serializers import REPUTATION_FIELDS, encode_reputation, prefixed
+
+from .serializers import USER_FIELDS, encode_user, user_payload
+
 User = get_user_model()
 
 
 @csrf_exempt
 @require_http_methods(["POST"])
+@query_budget(3)
 def create_user(request):
     try:
         payload = json.loads(request.body.decode("utf-8"))
@@ -68,17 +74,12 @@ def create_user(request):
         print(f"Error sending verification email: {e}")
         pass  # Don't block registration if email fails
 
-    return JsonResponse({
-        "id": user.id,
-        "username": user.username,
-        "email": user.email,
-        "role": user.role,
-        "avatarUrl": user.avatar_url,
-    }, status=201)
+    return JsonResponse(user_payload(user), status=201)
 
 
 @csrf_exempt
 @require_http_methods(["POST"])
+@query_budget(7)
 def login_user(request):
     try:
         payload = json.loads(request.body.decode("utf-8"))
@@ -112,17 +113,12 @@ def login_user(request):
         return JsonResponse({"error": "Invalid credentials."}, status=401)
 
     login(request, user)
-    return JsonResponse({
-        "id": user.id,
-        "username": user.username,
-        "email": user.email,
-        "role": user.role,
-        "avatarUrl": user.avatar_url,
-    }, status=200)
+    return JsonResponse(user_payload(user), status=200)
 
 
 @csrf_exempt
 @require_http_methods(["POST"])
+@query_budget(3)
 def logout_user(request):
     logout(request)
     return JsonResponse({"message": "Logged out successfully."}, status=200)
@@ -130,34 +126,23 @@ def logout_user(request):
 
 @csrf_exempt
 @require_http_methods(["GET"])
+@query_budget(1)
 def get_user(request, user_id):
-    try:
-        user = User.objects.get(id=user_id)
-    except User.DoesNotExist:
+    user = User.objects.filter(id=user_id).values(*USER_FIELDS, *prefixed("reputation__", REPUTATION_FIELDS)).first()
+    if user is None:
         return JsonResponse({"error": "User not found."}, status=404)
-    return JsonResponse({
-        "id": user.id,
-        "username": user.username,
-        "email": user.email,
-        "role": user.role,
-        "avatarUrl": user.avatar_url,
-    }, status=200)
+    return JsonResponse({**encode_user(user), "reputation": encode_reputation(user, "reputation__")}, status=200)
 
 
 @csrf_exempt
 @require_http_methods(["GET"])
+@query_budget(2)
 def get_current_user(request):
     if not request.user.is_authenticated:
         return JsonResponse({"error": "Authentication required."}, status=401)
 
     user = request.user
-    return JsonResponse({
-        "id": user.id,
-        "username": user.username,
-        "email": user.email,
-        "role": user.role,
-        "avatarUrl": user.avatar_url,
-    }, status=200)
+    return JsonResponse(user_payload(user), status=200)
 
 
 # ────────────────────────────────────────────
@@ -171,6 +156,7 @@ from django.conf import settings
 
 @csrf_exempt
 @require_http_methods(["POST"])
+@query_budget(1)
 def forgot_password(request):
     """Generate a 6-digit OTP, store it in cache, and send via Resend."""
     try:
@@ -222,6 +208,7 @@ def forgot_password(request):
 
 @csrf_exempt
 @require_http_methods(["POST"])
+@query_budget(2)
 def reset_password(request):
     """Verify OTP and set a new password."""
     try:
@@ -263,6 +250,7 @@ def reset_password(request):
 
 @csrf_exempt
 @require_http_methods(["POST"])
+@query_budget(8)
 def verify_email(request):
     """Verify OTP and activate the user, then send welcome email."""
     try:
@@ -338,10 +326,6 @@ def verify_email(request):
     login(request, user, backend='django.contrib.auth.backends.ModelBackend')
 
     return JsonResponse({
-        "id": user.id,
-        "username": user.username,
-        "email": user.email,
-        "role": user.role,
-        "avatarUrl": user.avatar_url,
+        **user_payload(user),
         "message": "Correo verificado exitosamente."
     }, status=200)
\ No newline at end of file